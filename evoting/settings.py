@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+from decimal import Decimal
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,12 +43,14 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
+    'django_filters',
 
     'meeting',
     'users',
 ]
 
 MIDDLEWARE = [
+    'meeting.monitoring.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,6 +81,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'evoting.wsgi.application'
 
+# ASGI (uvicorn/daphne): голосование, регистрация и просмотр собрания обрабатываются асинхронными представлениями
+ASGI_APPLICATION = 'evoting.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -140,7 +146,7 @@ CSRF_COOKIE_SECURE=True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'meeting.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -160,3 +166,48 @@ CORS_ORIGIN_ALLOW_ALL = True
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 MEDIA_URL = '/media/'
+
+# Получение лицевых счетов пользователя одним запросом (False - прежний вариант с запросами по каждому счету)
+ACCOUNTS_BULK_QUERY = True
+
+# Подсчет итогов голосования: 'table' - накопленные итоги VoteTally, 'python' - по бюллетеням в приложении,
+# 'dense' - по бюллетеням в массивах по позициям бюллетеня (точные дробные количества),
+# 'postgres' - по бюллетеням в БД (jsonb_array_elements, в других БД используется 'python')
+VOTE_TALLY_ENGINE = 'table'
+
+# Доля голосов зарегистрированных лиц по вопросу, которую нужно превысить для кворума
+QUORUM_SHARE = Decimal('0.5')
+
+# Кеш бюллетеней отправленных собраний: LRU в памяти процесса и, при указании BACKEND, общий кеш из CACHES.
+# Без общего кеша сброс виден только своему процессу, остальные воркеры хранят бюллетень LOCAL_TIMEOUT секунд
+BALLOT_CACHE = {
+    'MAX_SIZE': 256,
+    'TIMEOUT': 3600,
+    'LOCAL_TIMEOUT': 5,
+    'BACKEND': None,
+}
+
+# Кеш пользователей для аутентификации по JWT (сбрасывается во всех воркерах при сохранении пользователя).
+# BACKEND - имя общего кеша из CACHES для версий записей; без него (None) пользователь загружается из БД
+USER_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 60,
+    'MAX_SIZE': 10000,
+    'BACKEND': None,
+}
+
+# Кеш проверки refresh-токенов по черному списку: BACKEND - имя общего кеша из CACHES (Redis, Memcached).
+# Без общего кеша (None) каждая проверка выполняется по БД; кеш в памяти процесса не допускается
+TOKEN_BLACKLIST_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'BACKEND': None,
+}
+
+# Метрики запросов (количество и время SQL-запросов, время сериализации) и лог медленных запросов
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': 1000,
+    'MAX_LOGGED_QUERIES': 500,
+}
@@ -0,0 +1,99 @@
+"""
+Production settings for evoting project.
+
+Включаются переменной окружения DJANGO_SETTINGS_MODULE=evoting.settings_production
+(manage.py, evoting/wsgi.py, evoting/asgi.py, gunicorn.conf.py). Параметры берутся из окружения.
+
+Соединения с PostgreSQL (DB_POOL):
+  - "" (по умолчанию) - постоянные соединения: соединение живет DB_CONN_MAX_AGE секунд и используется повторно
+    следующими запросами того же потока (gunicorn gthread/sync, WSGI);
+  - "psycopg" - пул соединений psycopg 3 в каждом процессе (рекомендуется для ASGI: там каждый запрос
+    выполняется в своем потоке, и постоянные соединения не переиспользуются);
+  - "pgbouncer" - соединения через pgbouncer в режиме pool_mode=transaction (DB_HOST/DB_PORT указывают на pgbouncer),
+    серверные курсоры отключены, так как в этом режиме они не работают.
+
+Общий кеш воркеров - Redis (REDIS_URL).
+"""
+
+import os
+from django.core.exceptions import ImproperlyConfigured
+from .settings import *
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name, default=""):
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+
+DEBUG = env_bool("DJANGO_DEBUG")
+
+ALLOWED_HOSTS = env_list("DJANGO_ALLOWED_HOSTS", "localhost")
+
+CSRF_TRUSTED_ORIGINS = env_list("DJANGO_CSRF_TRUSTED_ORIGINS")
+
+
+# Database
+
+DB_POOL = os.environ.get("DB_POOL", "")
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get("DB_NAME", "postgres"),
+        'USER': os.environ.get("DB_USER", "postgres"),
+        'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+        'HOST': os.environ.get("DB_HOST", "localhost"),
+        'PORT': os.environ.get("DB_PORT", "5432"),
+        # Постоянное соединение проверяется перед повторным использованием (после перезапуска БД или сети)
+        'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
+    }
+}
+
+if DB_POOL == "psycopg":
+    # Пул заменяет постоянные соединения (Django не допускает CONN_MAX_AGE вместе с пулом)
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        'timeout': int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    }
+elif DB_POOL == "pgbouncer":
+    # Соединения с PostgreSQL держит pgbouncer, серверное соединение выдается только на время транзакции
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DB_POOL:
+    raise ImproperlyConfigured(f"Неизвестный режим соединений DB_POOL={DB_POOL!r}: ожидается '', 'psycopg' или 'pgbouncer'")
+
+
+# Общий кеш воркеров (REDIS_URL, например redis://redis:6379/0): отметки проверенных refresh-токенов,
+# бюллетени и версии записей кеша пользователей. Без него каждое обновление токена проверяется по черному списку
+# в БД, пользователь для аутентификации загружается из БД, а бюллетени кешируются в памяти каждого воркера
+# на BALLOT_CACHE['LOCAL_TIMEOUT'] секунд
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+    TOKEN_BLACKLIST_CACHE = {**TOKEN_BLACKLIST_CACHE, 'BACKEND': 'default'}
+    BALLOT_CACHE = {**BALLOT_CACHE, 'BACKEND': 'default'}
+    USER_CACHE = {**USER_CACHE, 'BACKEND': 'default'}
+
+
+STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", os.path.join(BASE_DIR, 'static'))
+
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
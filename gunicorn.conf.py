@@ -0,0 +1,33 @@
+# Профиль запуска gunicorn: gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=wsgi (по умолчанию) - воркеры gthread, постоянные соединения с БД (DB_CONN_MAX_AGE);
+# SERVER_MODE=asgi - воркеры uvicorn для асинхронных представлений (голосование, регистрация, карточка собрания),
+#                    соединения с БД - пул psycopg (DB_POOL=psycopg) или pgbouncer
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "evoting.settings_production")
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "evoting.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "evoting.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Перезапуск воркеров после max_requests запросов (со случайным сдвигом, чтобы не перезапускались одновременно)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
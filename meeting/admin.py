@@ -1,7 +1,15 @@
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Prefetch
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .models import Main, Registrar, Issuer, Agenda, QuestionDetail, VoteCount, VotingResult, DjangoRelation
+from .models import Main, Registrar, Issuer, Agenda, QuestionDetail, VoteCount, VotingResult, DjangoRelation, VoteTally, VoteQuantity, RegisterImport
+from .services.import_service import queue_register_import
+from .services.quantity_service import format_json_quantity, sync_vote_quantities
+from .services.voting_service import NO_DETAIL
 
 class MeetingAdmin(admin.ModelAdmin):
     list_display = [ 
@@ -24,16 +32,110 @@ class DjangoRelationAdmin(admin.ModelAdmin):
             'user', 'account_id', 'meeting', 'vote_count', 'voting_result', 'registered'
         ]
     
+class RegisterImportForm(forms.Form):
+    meeting = forms.ModelChoiceField(queryset=Main.objects.filter(is_draft=False), label='Собрание')
+    register_file = forms.FileField(label='Файл реестра',
+                                    help_text='CSV или JSONL с полями account_id, account_fullname, quantity, user_id')
+
+# Количество голосов счета по вопросам (VoteQuantity): загруженные из реестра счета json_quantity не заполняют
+class VoteQuantityInline(admin.TabularInline):
+    model = VoteQuantity
+    fields = ('question_id', 'detail_id', 'quantity')
+    readonly_fields = fields
+    ordering = ('question_id', 'detail_id')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False  # Количество задается в json_quantity счета или загрузкой реестра
+
 class VoteCountAdmin(admin.ModelAdmin):
     list_display = [ 
-            'account_id', 'vote_count_id','account_fullname', 'meeting', 'json_quantity'
+            'account_id', 'vote_count_id','account_fullname', 'meeting', 'vote_quantities'
         ]
+    search_fields = ('=account_id', 'account_fullname')
+    inlines = [VoteQuantityInline]
+    change_list_template = 'admin/meeting/votecount/change_list.html'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('quantities', queryset=VoteQuantity.objects.order_by('question_id', 'detail_id'))
+        )
+
+    # Количество голосов из VoteQuantity в формате json_quantity
+    @admin.display(description='Количество голосов')
+    def vote_quantities(self, obj):
+        return format_json_quantity({
+            (row.question_id, None if row.detail_id == NO_DETAIL else row.detail_id): row.quantity
+            for row in obj.quantities.all()
+        })
+
+    # Количество голосов, заданное вручную в json_quantity, переносится в VoteQuantity
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'json_quantity' in form.changed_data:
+            sync_vote_quantities(obj)
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_register_view), name='meeting_votecount_import'),
+        ] + super().get_urls()
+
+    # Загрузка реестра акционеров: файл ставится в очередь и загружается командой process_register_imports
+    # (реестр в сотни тысяч строк загружается дольше таймаута запроса)
+    def import_register_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = RegisterImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            register_import = queue_register_import(form.cleaned_data['meeting'], form.cleaned_data['register_file'])
+            messages.success(request, f"Реестр поставлен в очередь загрузки (№ {register_import.pk}), "
+                                      f"ход загрузки - в разделе «Загрузки реестров».")
+            return redirect('admin:meeting_votecount_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Загрузка реестра акционеров',
+        }
+        return TemplateResponse(request, 'admin/meeting/votecount/import_register.html', context)
     
 class VotingResultAdmin(admin.ModelAdmin):
     list_display = [ 
             'account_id', 'voting_result_id','user_id', 'meeting_id', 'json_result'
         ]
     
+class VoteTallyAdmin(admin.ModelAdmin):
+    list_display = [ 
+            'meeting', 'question_id', 'detail_id', 'vote_type', 'quantity'
+        ]
+    list_filter = ('meeting',)
+
+class VoteQuantityAdmin(admin.ModelAdmin):
+    list_display = [ 
+            'account_id', 'meeting', 'question_id', 'detail_id', 'quantity'
+        ]
+    list_filter = ('meeting',)
+    
+class RegisterImportAdmin(admin.ModelAdmin):
+    list_display = [ 
+            'id', 'meeting', 'file', 'status', 'rows_done', 'created_at', 'finished_at'
+        ]
+    list_filter = ('status',)
+    readonly_fields = ('meeting', 'file', 'file_format', 'rows_done', 'report', 'created_at', 'finished_at')
+    actions = ['retry_imports']
+
+    def has_add_permission(self, request):
+        return False  # Загрузки создаются со страницы «Загрузить реестр»
+
+    # Прерванная загрузка продолжается со строки, на которой остановилась
+    @admin.action(description='Повторить загрузку')
+    def retry_imports(self, request, queryset):
+        updated = queryset.filter(status=RegisterImport.FAILED).update(status=RegisterImport.PENDING, finished_at=None)
+        messages.success(request, f"Поставлено в очередь загрузок: {updated}")
+
 class RegistrarAdmin(admin.ModelAdmin):
     list_display = [ 
             'registrar_name', 'registrar_id'
@@ -52,6 +154,9 @@ admin.site.register(QuestionDetail, QuestionDetailAdmin)
 admin.site.register(VoteCount, VoteCountAdmin)
 admin.site.register(VotingResult, VotingResultAdmin)
 admin.site.register(DjangoRelation, DjangoRelationAdmin)
+admin.site.register(VoteTally, VoteTallyAdmin)
+admin.site.register(VoteQuantity, VoteQuantityAdmin)
+admin.site.register(RegisterImport, RegisterImportAdmin)
 admin.site.register(Registrar, RegistrarAdmin)
 admin.site.register(Issuer, IssuerAdmin)
 
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class MeetingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meeting'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .authentication import get_blacklist_cache, get_user_cache
+
+        # Ошибка настройки общих кешей обнаруживается при запуске, а не при первом запросе
+        get_blacklist_cache()
+        get_user_cache()
@@ -0,0 +1,270 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+DEFAULTS = {
+    "ENABLED": True,
+    "TIMEOUT": 60,       # Время жизни записи в секундах (изменения через update() без сигналов видны не позже)
+    "MAX_SIZE": 10000,   # Количество пользователей в памяти процесса
+    "BACKEND": None,     # Имя общего кеша из settings.CACHES для версий записей; не задано - кеш не используется
+}
+
+BLACKLIST_DEFAULTS = {
+    "ENABLED": True,
+    "TIMEOUT": 300,    # Время жизни отметки "нет в черном списке" в секундах
+    "BACKEND": None,   # Имя общего кеша из settings.CACHES (Redis, Memcached); не задано - проверка всегда по БД
+}
+
+# Кеши в памяти процесса: сброс записи в одном воркере не виден остальным
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# Поля пользователя, которые добавляются в токены при выдаче
+USER_CLAIMS = ("username", "is_staff", "is_superuser")
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "USER_CACHE", {})}
+
+
+# Данные пользователя в токене: клиент и обновление токена получают их без запроса к БД
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+# Общий кеш воркеров по имени из settings.CACHES (None - имя не задано).
+# Кеш в памяти процесса не допускается: сброс в одном воркере не был бы виден остальным.
+# Настройки проверяются при запуске приложения (MeetingConfig.ready)
+def get_shared_cache(setting, name):
+    if not name:
+        return None
+
+    backend = settings.CACHES.get(name, {}).get("BACKEND")
+    if backend is None:
+        raise ImproperlyConfigured(f"{setting}: кеш {name!r} не задан в CACHES")
+    if backend in LOCAL_CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f"{setting}: кеш {name!r} ({backend}) хранится в памяти процесса, нужен общий кеш (Redis, Memcached)"
+        )
+    return caches[name]
+
+
+# Общий кеш версий записей кеша пользователей (None - кеш пользователей не используется)
+def get_user_cache():
+    config = get_config()
+    if not config["ENABLED"]:
+        return None
+    return get_shared_cache("USER_CACHE", config["BACKEND"])
+
+
+# Кеш пользователей для аутентификации (LRU в памяти процесса с временем жизни записи).
+# Хранятся значения полей, при каждом обращении создается новый экземпляр User,
+# поэтому изменения объекта в одном запросе не попадают в другие.
+# У записи пользователя есть версия - случайная метка в общем кеше, которая меняется при сохранении
+# или удалении пользователя в любом воркере (meeting/signals.py). Запись в памяти процесса действительна
+# только для текущей версии, поэтому снятые права и блокировка видны всем воркерам сразу
+class UserCache:
+    key_prefix = "user_version"
+
+    def __init__(self):
+        self._entries = OrderedDict()  # id пользователя -> (истекает, версия, значения полей)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._field_names = None
+
+    def _fields(self):
+        if self._field_names is None:
+            self._field_names = [field.attname for field in User._meta.concrete_fields]
+        return self._field_names
+
+    def _version_key(self, user_id):
+        return f"{self.key_prefix}:{user_id}"
+
+    # Текущая версия записи пользователя (читается до загрузки пользователя из БД и передается в set)
+    def version(self, user_id, cache):
+        key = self._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # Метки нет (первое обращение или вытеснена из кеша) - новая метка, прежние записи недействительны
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires, entry_version, values = entry
+                if expires > time.monotonic() and entry_version == version:
+                    self._entries.move_to_end(user_id)
+                    self._counters["hits"] += 1
+                    return User.from_db(DEFAULT_DB_ALIAS, self._fields(), values)
+                del self._entries[user_id]
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, user_id, user, version):
+        config = get_config()
+        values = tuple(getattr(user, name) for name in self._fields())
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + config["TIMEOUT"], version, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > config["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    # Сброс записи в этом процессе и, через новую версию, во всех воркерах
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._counters["invalidations"] += 1
+
+        cache = get_user_cache()
+        if cache is not None:
+            cache.set(self._version_key(user_id), uuid.uuid4().hex, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "size": len(self._entries), "max_size": get_config()["MAX_SIZE"]}
+
+
+user_cache = UserCache()
+
+
+# Пользователь по значению USER_ID_FIELD: из кеша или из БД (None, если не найден).
+# Без общего кеша (USER_CACHE["BACKEND"]) пользователь всегда загружается из БД
+def get_cached_user(user_id):
+    cache = get_user_cache()
+    users = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+    if cache is None:
+        return users.first()
+
+    version = user_cache.version(user_id, cache)
+    user = user_cache.get(user_id, version)
+    if user is None:
+        user = users.first()
+        if user is not None:
+            user_cache.set(user_id, user, version)
+    return user
+
+
+# Аутентификация по JWT без запроса пользователя к БД на каждый запрос: пользователь берется из кеша UserCache.
+# Проверки те же, что в JWTAuthentication (активность пользователя, смена пароля при CHECK_REVOKE_TOKEN)
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def get_blacklist_config():
+    return {**BLACKLIST_DEFAULTS, **getattr(settings, "TOKEN_BLACKLIST_CACHE", {})}
+
+
+# Общий кеш для отметок проверенных токенов (None - кеш не используется).
+# Кеш в памяти процесса не допускается: токен, внесенный в черный список, другие воркеры принимали бы
+# до истечения отметки
+def get_blacklist_cache():
+    config = get_blacklist_config()
+    if not config["ENABLED"]:
+        return None
+    return get_shared_cache("TOKEN_BLACKLIST_CACHE", config["BACKEND"])
+
+
+# Отметки refresh-токенов, уже проверенных по черному списку (jti, которых в нем нет), в общем кеше.
+# Повторное обновление тем же токеном не обращается к таблице BlacklistedToken, пока отметка жива.
+# Отметка снимается при внесении токена в черный список (meeting/signals.py)
+class BlacklistCache:
+    key_prefix = "token_clean"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _key(self, jti):
+        return f"{self.key_prefix}:{jti}"
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def is_clean(self, jti):
+        cache = get_blacklist_cache()
+        clean = cache is not None and cache.get(self._key(jti)) is not None
+        self._count("hits" if clean else "misses")
+        return clean
+
+    # Отметка живет не дольше самого токена
+    def mark_clean(self, jti, exp):
+        cache = get_blacklist_cache()
+        timeout = min(get_blacklist_config()["TIMEOUT"], int(exp - time.time()))
+        if cache is not None and timeout > 0:
+            cache.set(self._key(jti), 1, timeout)
+
+    def invalidate(self, jti):
+        cache = get_blacklist_cache()
+        if cache is not None:
+            cache.delete(self._key(jti))
+            self._count("invalidations")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+blacklist_cache = BlacklistCache()
+
+
+# Refresh-токен с проверкой по черному списку через BlacklistCache: к БД обращается только первая проверка токена
+# (без общего кеша - каждая проверка)
+class CachedBlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if get_blacklist_cache() is None:
+            return super().check_blacklist()
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_cache.is_clean(jti):
+            return
+
+        super().check_blacklist()
+        blacklist_cache.mark_clean(jti, self.payload["exp"])
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_cache.invalidate(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
@@ -0,0 +1,181 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    "MAX_SIZE": 256,      # Количество бюллетеней в памяти процесса
+    "TIMEOUT": 3600,      # Время жизни записи в секундах
+    "LOCAL_TIMEOUT": 5,   # Время жизни записи в памяти процесса без общего кеша: изменения, сделанные
+                          # в другом процессе (другом воркере), видны не позже
+    "BACKEND": None,      # Имя кеша из settings.CACHES (общий кеш для всех процессов)
+}
+
+# Счетчики кеша (только растут, в метриках Prometheus - тип counter); size и max_size в stats() - текущие значения
+COUNTERS = ("hits", "shared_hits", "misses", "sets", "invalidations")
+
+
+# Кеш собранных бюллетеней отправленных собраний (LRU в памяти процесса + общий кеш Django).
+# С общим кешем у бюллетеня собрания есть версия - случайная метка в общем кеше, которая меняется при сбросе
+# в любом процессе. Запись в памяти процесса действительна только для текущей версии, поэтому изменения
+# (в том числе через админку) видны всем воркерам сразу. Без общего кеша запись в памяти процесса
+# живет LOCAL_TIMEOUT секунд. Изменения через QuerySet.update() не отправляют сигналов,
+# после них нужно вызывать ballot_cache.invalidate(meeting_id)
+class BallotCache:
+    key_prefix = "ballot"
+
+    def __init__(self):
+        self._entries = OrderedDict()  # ключ -> (истекает, версия, бюллетень)
+        self._lock = threading.Lock()
+        self._generation = 0  # Счетчик сбросов в этом процессе (версия без общего кеша)
+        self._counters = dict.fromkeys(COUNTERS, 0)
+
+    def _config(self):
+        return {**DEFAULTS, **getattr(settings, "BALLOT_CACHE", {})}
+
+    def _shared(self, config):
+        return caches[config["BACKEND"]] if config["BACKEND"] else None
+
+    def _key(self, meeting_id):
+        return f"{self.key_prefix}:{int(meeting_id)}"
+
+    def _version_key(self, meeting_id):
+        return f"{self.key_prefix}_version:{int(meeting_id)}"
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # Версия бюллетеня до его сборки из БД (передается в set): бюллетень, собранный до сброса, не попадает в кеш
+    def version(self, meeting_id):
+        shared = self._shared(self._config())
+        if shared is None:
+            with self._lock:
+                return self._generation
+
+        key = self._version_key(meeting_id)
+        version = shared.get(key)
+        if version is None:
+            # Метки нет (первое обращение или вытеснена из кеша) - новая метка, прежние записи недействительны
+            shared.add(key, uuid.uuid4().hex, None)
+            version = shared.get(key)
+        return version
+
+    async def _aversion(self, shared, meeting_id):
+        key = self._version_key(meeting_id)
+        version = await shared.aget(key)
+        if version is None:
+            await shared.aadd(key, uuid.uuid4().hex, None)
+            version = await shared.aget(key)
+        return version
+
+    # Получение копии бюллетеня из кеша (None, если его нет). Копия полная (вместе с повесткой дня и подвопросами),
+    # поэтому изменение полученного бюллетеня не меняет запись в кеше
+    def get(self, meeting_id):
+        config = self._config()
+        shared = self._shared(config)
+        key = self._key(meeting_id)
+        if shared is None:
+            return self._local_result(key, None)
+
+        version = self.version(meeting_id)
+        ballot = self._get_local(key, version)
+        if ballot is not None:
+            return ballot
+        return self._shared_result(key, version, shared.get(f"{key}:{version}"), config)
+
+    # То же для асинхронных представлений: общий кеш читается без блокировки цикла событий
+    async def aget(self, meeting_id):
+        config = self._config()
+        shared = self._shared(config)
+        key = self._key(meeting_id)
+        if shared is None:
+            return self._local_result(key, None)
+
+        version = await self._aversion(shared, meeting_id)
+        ballot = self._get_local(key, version)
+        if ballot is not None:
+            return ballot
+        return self._shared_result(key, version, await shared.aget(f"{key}:{version}"), config)
+
+    def _local_result(self, key, version):
+        ballot = self._get_local(key, version)
+        if ballot is None:
+            self._count("misses")
+        return ballot
+
+    # Запись из памяти процесса, если она не истекла и относится к текущей версии (version=None - без общего кеша)
+    def _get_local(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, entry_version, ballot = entry
+                if expires > time.monotonic() and (version is None or entry_version == version):
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return copy.deepcopy(ballot)
+                del self._entries[key]
+        return None
+
+    def _shared_result(self, key, version, ballot, config):
+        if ballot is not None:
+            self._count("shared_hits")
+            self._store_local(key, version, ballot, config["TIMEOUT"], config)
+            return copy.deepcopy(ballot)
+
+        self._count("misses")
+        return None
+
+    # Сохранение бюллетеня в кеш (version - значение version() до сборки бюллетеня)
+    def set(self, meeting_id, ballot, version):
+        config = self._config()
+        shared = self._shared(config)
+        key = self._key(meeting_id)
+        ballot = copy.deepcopy(ballot)
+
+        if shared is None:
+            with self._lock:
+                if version != self._generation:
+                    return  # Кеш сброшен во время сборки бюллетеня
+            self._store_local(key, None, ballot, config["LOCAL_TIMEOUT"], config)
+        else:
+            # Бюллетень устаревшей версии никто не прочитает: запись в общем кеше привязана к версии
+            self._store_local(key, version, ballot, config["TIMEOUT"], config)
+            shared.set(f"{key}:{version}", ballot, config["TIMEOUT"])
+        self._count("sets")
+
+    def _store_local(self, key, version, ballot, timeout, config):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, version, ballot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > config["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    # Сброс бюллетеня собрания: в памяти этого процесса и, через новую версию, во всех процессах
+    def invalidate(self, meeting_id):
+        config = self._config()
+
+        with self._lock:
+            self._entries.pop(self._key(meeting_id), None)
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+        shared = self._shared(config)
+        if shared:
+            shared.set(self._version_key(meeting_id), uuid.uuid4().hex, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    # Счетчики попаданий и промахов
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "size": len(self._entries), "max_size": self._config()["MAX_SIZE"]}
+
+
+ballot_cache = BallotCache()
@@ -1,13 +1,24 @@
-from rest_framework.generics import get_object_or_404
-from meeting.models import Main, Agenda, QuestionDetail
+from asgiref.sync import sync_to_async
+from .cache import ballot_cache
+from .loader import load_meeting_tree
 
 
 # Получение бюллетеня (вопрос, решение, подвопросы и тд)
 def get_ballot_data(meeting_id):
-        meeting = get_object_or_404(Main, meeting_id=meeting_id)
+        # Бюллетени отправленных собраний не меняются и берутся из кеша
+        cached = ballot_cache.get(meeting_id)
+        if cached is not None:
+            return cached
+        return build_ballot_data(meeting_id)
 
-        # Повестка дня
-        agenda = Agenda.objects.filter(meeting=meeting)
+
+# Сборка бюллетеня из БД (при промахе кеша)
+def build_ballot_data(meeting_id):
+        # Версия берется до загрузки: бюллетень, сброшенный во время сборки, не попадет в кеш
+        version = ballot_cache.version(meeting_id)
+
+        # Собрание, повестка дня и подвопросы загружаются одним набором запросов
+        meeting = load_meeting_tree(meeting_id)
 
         # Структура бюллетеня
         ballot_data = {
@@ -19,18 +30,29 @@ def get_ballot_data(meeting_id):
             "agenda": []
         }
 
-        for question in agenda:
-            # Получение подвопросов (если есть)
-            details = QuestionDetail.objects.filter(question_id=question.question_id, 
-                                                    meeting_id=meeting ).values("detail_id", "detail_text")
-
+        for question in meeting.agenda.all():
             ballot_data["agenda"].append({
                 "question_id": question.question_id,
                 "question": question.question,
                 "cumulative": question.cumulative,
                 "decision": question.decision,
                 "seat_count": question.seat_count,
-                "details": list(details)
+                "details": [
+                    {"detail_id": detail.detail_id, "detail_text": detail.detail_text}
+                    for detail in question.details.all()
+                ]
             })
 
-        return ballot_data
\ No newline at end of file
+        # Черновики не кешируются, так как могут редактироваться
+        if not meeting.is_draft:
+            ballot_cache.set(meeting.meeting_id, ballot_data, version)
+
+        return ballot_data
+
+
+# Получение бюллетеня в асинхронных представлениях: из кеша без обращения к потокам, иначе сборка из БД в потоке
+async def aget_ballot_data(meeting_id):
+        cached = await ballot_cache.aget(meeting_id)
+        if cached is not None:
+            return cached
+        return await sync_to_async(build_ballot_data)(meeting_id)
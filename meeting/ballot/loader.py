@@ -0,0 +1,26 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from rest_framework.generics import get_object_or_404
+from meeting.models import Main, Agenda, QuestionDetail
+
+
+# Собрания вместе с эмитентом, повесткой дня и подвопросами (три запроса независимо от размера повестки)
+def meeting_tree_queryset():
+    details = QuestionDetail.objects.order_by("detail_id")
+    agenda = Agenda.objects.order_by("question_id").prefetch_related(Prefetch("details", queryset=details))
+    return Main.objects.select_related("issuer").prefetch_related(Prefetch("agenda", queryset=agenda))
+
+
+# Загрузка собрания с повесткой дня и подвопросами
+def load_meeting_tree(meeting_id):
+    return get_object_or_404(meeting_tree_queryset(), meeting_id=meeting_id)
+
+
+# То же для асинхронных представлений (некорректный meeting_id - 404, как в get_object_or_404 DRF)
+async def aload_meeting_tree(meeting_id):
+    try:
+        return await aget_object_or_404(meeting_tree_queryset(), meeting_id=meeting_id)
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
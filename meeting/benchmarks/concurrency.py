@@ -0,0 +1,116 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from meeting.benchmarks.utils import server_name, summarize
+
+
+# Запрос GET к WSGI-приложению. Медленный клиент (delay секунд на получение ответа) занимает поток воркера,
+# пока ответ не будет отправлен
+def wsgi_get(application, path, token, delay=0.0):
+    host = server_name()
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "SCRIPT_NAME": "", "QUERY_STRING": "",
+        "SERVER_NAME": host, "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": host, "HTTP_AUTHORIZATION": f"Bearer {token}", "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True, "wsgi.multiprocess": False, "wsgi.run_once": False,
+    }
+    statuses = []
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in body:
+            pass
+        if delay:
+            time.sleep(delay)
+    finally:
+        body.close()
+    return int(statuses[0].split()[0])
+
+
+# Запрос GET к ASGI-приложению. Медленный клиент ожидается в цикле событий и не занимает поток
+async def asgi_get(application, path, token, delay=0.0):
+    host = server_name()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", host.encode()), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0), "server": (host, 80),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Клиент не отключается до конца ответа
+        await asyncio.get_running_loop().create_future()
+
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        elif message["type"] == "http.response.body" and not message.get("more_body") and delay:
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def _report(timings, errors, elapsed):
+    return {
+        **summarize(timings),
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        "errors": len(errors),
+        "wall_seconds": round(elapsed, 3),
+    }
+
+
+# Прогон через WSGI: каждый клиент (path, token) последовательно отправляет requests запросов,
+# одновременно обрабатывается не более workers запросов (потоки воркера gunicorn gthread)
+def run_wsgi(targets, requests=10, workers=4, delay=0.0):
+    application = get_wsgi_application()
+    slots = threading.Semaphore(workers)
+    timings, errors = [], []
+
+    def client(path, token):
+        for _ in range(requests):
+            started = time.perf_counter()
+            with slots:
+                status = wsgi_get(application, path, token, delay)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        for future in [pool.submit(client, path, token) for path, token in targets]:
+            future.result()
+    return _report(timings, errors, time.perf_counter() - started)
+
+
+# Прогон через ASGI: все клиенты работают одновременно в одном цикле событий (один воркер uvicorn)
+def run_asgi(targets, requests=10, delay=0.0):
+    application = get_asgi_application()
+    timings, errors = [], []
+
+    async def client(path, token):
+        for _ in range(requests):
+            started = time.perf_counter()
+            status = await asgi_get(application, path, token, delay)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors.append(status)
+
+    async def main():
+        await asyncio.gather(*(client(path, token) for path, token in targets))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _report(timings, errors, time.perf_counter() - started)
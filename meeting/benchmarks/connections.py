@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from meeting.benchmarks.concurrency import wsgi_get
+from meeting.benchmarks.utils import summarize
+
+# Время жизни постоянного соединения, если в настройках оно не задано
+DEFAULT_CONN_MAX_AGE = 600
+
+
+# Параметры соединения на время замеров: reuse=False - новое соединение на каждый запрос (CONN_MAX_AGE=0, без пула),
+# reuse=True - пул из настроек или постоянные соединения (CONN_MAX_AGE из настроек или DEFAULT_CONN_MAX_AGE)
+@contextmanager
+def connection_mode(reuse):
+    settings_dict = connection.settings_dict
+    saved = {key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+    connection.close()
+
+    options = saved["OPTIONS"] or {}
+    if not reuse:
+        settings_dict.update(CONN_MAX_AGE=0, OPTIONS={key: value for key, value in options.items() if key != "pool"})
+    elif not options.get("pool"):
+        settings_dict.update(CONN_MAX_AGE=saved["CONN_MAX_AGE"] or DEFAULT_CONN_MAX_AGE, CONN_HEALTH_CHECKS=True)
+    try:
+        yield describe_connection()
+    finally:
+        # Соединение закрывается до восстановления настроек, чтобы оно было закрыто тем же способом, что и открыто
+        connection.close()
+        settings_dict.update(saved)
+
+
+def describe_connection():
+    settings_dict = connection.settings_dict
+    return {
+        "conn_max_age": settings_dict["CONN_MAX_AGE"],
+        "health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+        "pool": bool((settings_dict["OPTIONS"] or {}).get("pool")),
+    }
+
+
+# Время установки соединения с БД (мс)
+def measure_connect(repeat=20):
+    timings = []
+    for _ in range(repeat):
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return summarize(timings)
+
+
+# Последовательные запросы GET через WSGI-обработчик (как в воркере gunicorn): задержка запросов
+# и количество открытых соединений с БД (соединения закрываются по CONN_MAX_AGE в конце запроса)
+def measure_requests(path, token, repeat=100):
+    application = get_wsgi_application()
+    opened = []
+
+    def on_connection_created(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(on_connection_created)
+    try:
+        wsgi_get(application, path, token)
+        opened.clear()
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            status = wsgi_get(application, path, token)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert status == 200, f"{path}: {status}"
+    finally:
+        connection_created.disconnect(on_connection_created)
+
+    # При пуле connection_created отправляется при каждой выдаче соединения из пула, открытые соединения - в статистике пула
+    pool = getattr(connection, "pool", None)
+    if pool is not None:
+        return {**summarize(timings), "pool_checkouts": len(opened),
+                "connections_opened": pool.get_stats().get("connections_num", 0)}
+    return {**summarize(timings), "connections_opened": len(opened)}
@@ -0,0 +1,131 @@
+import random
+import uuid
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.models import Issuer, Main, Agenda, QuestionDetail, VoteCount, VotingResult, DjangoRelation, VoteQuantity
+from meeting.services.quantity_service import ballot_quantity_keys, vote_quantity_rows
+from meeting.services.voting_service import rebuild_vote_tally
+
+User = get_user_model()
+
+# Количество счетов, создаваемых за один проход bulk_create
+CHUNK_SIZE = 5000
+
+
+# Тестовое собрание с открытым голосованием: users пользователей (или готовые user_objects) по accounts_per_user лицевых счетов,
+# questions вопросов по details подвопросов (кумулятивное голосование для вопросов с подвопросами).
+# registered_ratio и voted_ratio - доля зарегистрированных и проголосовавших счетов
+def create_voting_fixture(users=1, accounts_per_user=10, questions=5, details=0, quantity=100, first_account_id=1,
+                          registered_ratio=0.0, voted_ratio=0.0, seed=0, issuer=None, user_objects=None):
+    prefix = uuid.uuid4().hex[:8]
+    now = timezone.now()
+    rng = random.Random(seed)
+
+    if issuer is None:
+        issuer = create_issuer()
+    meeting = Main.objects.create(
+        issuer=issuer, meeting_name=f"Бенчмарк {prefix}", meeting_location="Заочно",
+        meeting_date=(now + timedelta(days=10)).date(), decision_date=now.date(), record_date=now.date(),
+        annual_or_unscheduled=True, first_or_repeated=False, inter_or_extra_mural=False,
+        checkin=now - timedelta(days=2), closeout=now + timedelta(days=5), meeting_open=now - timedelta(days=1),
+        vote_counting=now + timedelta(days=9), meeting_close=now + timedelta(days=10),
+        early_registration=True, status=3, is_draft=False, sent_at=now.date()
+    )
+
+    agenda = Agenda.objects.bulk_create([
+        Agenda(meeting=meeting, question=f"Вопрос {number}", decision="Утвердить", cumulative=bool(details),
+               seat_count=details)
+        for number in range(questions)
+    ])
+    QuestionDetail.objects.bulk_create([
+        QuestionDetail(question_id=question, meeting_id=meeting, detail_text=f"Кандидат {number}")
+        for question in agenda for number in range(details)
+    ])
+
+    if user_objects is None:
+        user_objects = create_users(users)
+
+    ballot = get_ballot_data(meeting.meeting_id)
+    quantities = {key: quantity for key in ballot_quantity_keys(ballot)}
+    vote = make_vote(ballot, quantity) if voted_ratio else None
+
+    # Счета создаются частями, чтобы объем памяти не зависел от размера набора данных
+    accounts = {}
+    pending = []
+    account_id = first_account_id
+    for user in user_objects:
+        accounts[user.pk] = []
+        for _ in range(accounts_per_user):
+            accounts[user.pk].append(account_id)
+            pending.append((user, account_id))
+            account_id += 1
+            if len(pending) >= CHUNK_SIZE:
+                _create_accounts(meeting, pending, quantities, vote, registered_ratio, voted_ratio, rng)
+                pending = []
+    if pending:
+        _create_accounts(meeting, pending, quantities, vote, registered_ratio, voted_ratio, rng)
+
+    # Итоги по созданным бюллетеням
+    if voted_ratio:
+        rebuild_vote_tally(meeting)
+
+    return {"meeting": meeting, "users": user_objects, "accounts": accounts}
+
+
+# Удаление данных create_voting_fixture, сохраненных вне транзакции (собрание, эмитент и пользователи)
+def delete_voting_fixture(fixture):
+    meeting = fixture["meeting"]
+    issuer = meeting.issuer
+    meeting.delete()
+    issuer.delete()
+    User.objects.filter(pk__in=[user.pk for user in fixture["users"]]).delete()
+
+
+def create_issuer():
+    prefix = uuid.uuid4().hex[:8]
+    return Issuer.objects.create(full_name=f"ПАО Бенчмарк {prefix}", short_name="Бенчмарк",
+                                 address="Адрес", zip=625000, ogrn="1027700000000")
+
+
+def create_users(count):
+    prefix = uuid.uuid4().hex[:8]
+    return User.objects.bulk_create([
+        User(username=f"bench-{prefix}-{number}", avatar="gray") for number in range(count)
+    ], batch_size=CHUNK_SIZE)
+
+
+def _create_accounts(meeting, pending, quantities, vote, registered_ratio, voted_ratio, rng):
+    vote_counts = VoteCount.objects.bulk_create([
+        VoteCount(meeting=meeting, account_id=account_id, account_fullname=f"Акционер {account_id}")
+        for _, account_id in pending
+    ])
+    VoteQuantity.objects.bulk_create(
+        [row for vote_count in vote_counts for row in vote_quantity_rows(vote_count, quantities)], batch_size=CHUNK_SIZE
+    )
+    voting_results = VotingResult.objects.bulk_create([
+        VotingResult(meeting_id=meeting, account_id=account_id, user_id=user,
+                     json_result=vote if rng.random() < voted_ratio else None)
+        for user, account_id in pending
+    ])
+    DjangoRelation.objects.bulk_create([
+        DjangoRelation(vote_count=vote_count, voting_result=voting_result, user=voting_result.user_id,
+                       meeting=meeting, account_id=vote_count.account_id,
+                       registered=voting_result.json_result is not None or rng.random() < registered_ratio)
+        for vote_count, voting_result in zip(vote_counts, voting_results)
+    ])
+
+
+# Бюллетень, отдающий все голоса счета "За" (для кумулятивных вопросов - поровну между кандидатами)
+def make_vote(ballot, quantity=100):
+    instructions = []
+    for question in ballot["agenda"]:
+        if question["details"]:
+            share = quantity * question["seat_count"] // len(question["details"])
+            for detail in question["details"]:
+                instructions.append({"VoteInstr": {"QuestionId": question["question_id"],
+                                                   "DetailId": detail["detail_id"], "For": {"Quantity": share}}})
+        else:
+            instructions.append({"VoteInstr": {"QuestionId": question["question_id"], "For": {"Quantity": quantity}}})
+    return {"VoteDtls": {"VoteInstrForAgndRsltn": instructions}}
@@ -0,0 +1,110 @@
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.benchmarks.fixtures import create_issuer, create_users, create_voting_fixture, make_vote
+from meeting.benchmarks.utils import api_client, summarize, timed_call
+from meeting.services.account_service import get_accounts
+
+User = get_user_model()
+
+# Этапы жизненного цикла собрания в порядке выполнения
+STAGES = ("meeting_list", "meeting_detail", "register", "get_accounts", "vote_get", "vote_post", "admin_results")
+
+
+# Создание данных для прогона: issuers эмитентов по meetings_per_issuer собраний,
+# в каждом собрании questions вопросов по details подвопросов и accounts_per_user счетов у каждого пользователя
+def create_lifecycle_fixture(issuers=1, meetings_per_issuer=1, users=5, accounts_per_user=2, questions=5, details=0):
+    user_objects = create_users(users)
+    meetings = []
+    first_account_id = 1
+    for _ in range(issuers):
+        issuer = create_issuer()
+        for _ in range(meetings_per_issuer):
+            fixture = create_voting_fixture(accounts_per_user=accounts_per_user, questions=questions, details=details,
+                                            first_account_id=first_account_id, issuer=issuer, user_objects=user_objects)
+            meetings.append(fixture)
+            first_account_id += users * accounts_per_user
+
+    admin = User.objects.create(username=f"bench-admin-{uuid.uuid4().hex[:8]}", avatar="gray",
+                                is_staff=True, is_superuser=True)
+    return {"meetings": meetings, "users": user_objects, "admin": admin}
+
+
+# Прогон жизненного цикла собрания через API: список и карточка собрания, регистрация,
+# счета пользователя, получение и отправка бюллетеня, итоги для администратора.
+# Возвращает сводку по каждому этапу: перцентили задержки, запросы на вызов и пропускную способность.
+# Неожиданный ответ на любом этапе прерывает прогон с RuntimeError
+def run_lifecycle(fixture):
+    timings = defaultdict(list)
+    queries = defaultdict(list)
+
+    def call(stage, func, expected):
+        response, elapsed, count = timed_call(func)
+        status_code = getattr(response, "status_code", expected)
+        if status_code != expected:
+            # Не assert: проверка должна работать и при запуске python -O
+            raise RuntimeError(f"{stage}: ожидался ответ {expected}, получен {status_code} "
+                               f"{getattr(response, 'content', b'')[:200]}")
+        timings[stage].append(elapsed)
+        queries[stage].append(count)
+        return response
+
+    clients = {user.pk: api_client(user) for user in fixture["users"]}
+    admin_client = api_client(fixture["admin"])
+    started = time.perf_counter()
+
+    for item in fixture["meetings"]:
+        meeting = item["meeting"]
+        meeting_id = meeting.meeting_id
+        vote = make_vote(get_ballot_data(meeting_id))
+
+        for user in item["users"]:
+            client = clients[user.pk]
+            call("meeting_list", lambda: client.get("/api/meetings/"), 200)
+            call("meeting_detail", lambda: client.get(f"/api/meetings/{meeting_id}/"), 200)
+            call("register", lambda: client.post(f"/{meeting_id}/register/"), 200)
+            call("get_accounts", lambda: get_accounts(meeting, user), 200)
+
+            for account_id in item["accounts"][user.pk]:
+                call("vote_get", lambda: client.get(f"/{meeting_id}/vote/{account_id}/"), 200)
+                call("vote_post", lambda: client.post(f"/{meeting_id}/vote/{account_id}/", vote, format="json"), 201)
+
+        call("admin_results", lambda: admin_client.get(f"/{meeting_id}/all_vote_results/"), 200)
+
+    total_seconds = time.perf_counter() - started
+    requests_count = sum(len(values) for values in timings.values())
+    return {
+        "stages": {stage: summarize(timings[stage], queries[stage]) for stage in STAGES if timings[stage]},
+        "requests": requests_count,
+        "seconds": round(total_seconds, 3),
+        "throughput_rps": round(requests_count / total_seconds, 1) if total_seconds else 0.0,
+    }
+
+
+# Текущий коммит (для сравнения отчетов между версиями), None вне git-репозитория
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# Сравнение отчета с базовым: изменение задержки (в процентах) и количества запросов по этапам
+def compare_reports(report, baseline, metrics=("p50_ms", "p95_ms", "p99_ms")):
+    comparison = {}
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        stage_diff = {}
+        for metric in metrics:
+            if previous.get(metric):
+                stage_diff[f"{metric}_change_pct"] = round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+        if current.get("queries") is not None and previous.get("queries") is not None:
+            stage_diff["queries_change"] = current["queries"] - previous["queries"]
+        comparison[stage] = stage_diff
+    return comparison
@@ -0,0 +1,87 @@
+import random
+import time
+from collections import defaultdict
+from meeting.services.dense_tally import DenseTally
+from meeting.services.voting_service import VOTE_TYPES, summarize_vote_instructions
+
+
+# Бюллетень собрания из questions вопросов, у каждого второго вопроса details кандидатов
+def make_ballot(questions=10, details=5):
+    agenda = []
+    detail_id = 1
+    for question_id in range(1, questions + 1):
+        question_details = []
+        if details and question_id % 2 == 0:
+            question_details = [{"detail_id": detail_id + number} for number in range(details)]
+            detail_id += details
+        agenda.append({"question_id": question_id, "details": question_details})
+    return {"agenda": agenda}
+
+
+# Случайные бюллетени, в сумме не меньше instructions голосов; fractional_ratio - доля дробных количеств
+def make_results(ballot, instructions=1_000_000, fractional_ratio=0.0, seed=0):
+    rng = random.Random(seed)
+    keys = [(question["question_id"], detail["detail_id"]) for question in ballot["agenda"] for detail in question["details"]]
+    keys += [(question["question_id"], None) for question in ballot["agenda"] if not question["details"]]
+
+    results = []
+    count = 0
+    while count < instructions:
+        votes = []
+        for question_id, detail_id in keys:
+            vote_instr = {"QuestionId": question_id}
+            if detail_id is not None:
+                vote_instr["DetailId"] = detail_id
+            quantity = rng.randint(1, 10 ** 6)
+            if rng.random() < fractional_ratio:
+                quantity = f"{quantity}.{rng.randint(0, 999999):06d}"
+            vote_instr[rng.choice(VOTE_TYPES)] = {"Quantity": quantity}
+            votes.append({"VoteInstr": vote_instr})
+        results.append({"VoteDtls": {"VoteInstrForAgndRsltn": votes}})
+        count += len(votes)
+    return results, count
+
+
+# Прежний подсчет: вложенные словари вопрос -> подвопрос -> вариант голоса, количество через int()
+def nested_dict_tally(json_results):
+    summary_results = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    for json_result in json_results:
+        for vote in json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+            vote_instr = vote.get("VoteInstr", {})
+            question_id = vote_instr.get("QuestionId")
+            detail_id = vote_instr.get("DetailId", None)
+            for vote_type in ["For", "Against", "Abstain"]:
+                if vote_type in vote_instr:
+                    summary_results[question_id][detail_id][vote_type] += int(vote_instr[vote_type]["Quantity"])
+    return summary_results
+
+
+# Сравнение способов подсчета на одних и тех же бюллетенях (время в секундах и голосов в секунду)
+def run_tally_benchmark(questions=10, details=5, instructions=1_000_000, fractional_ratio=0.0, seed=0):
+    ballot = make_ballot(questions, details)
+    results, count = make_results(ballot, instructions, fractional_ratio, seed)
+
+    engines = {
+        "python": lambda: summarize_vote_instructions(results),
+        "dense": lambda: DenseTally(ballot).add_many(results).result(),
+    }
+    # Прежний подсчет через int() не работает с дробными количествами
+    if not fractional_ratio:
+        engines = {"nested_dict": lambda: nested_dict_tally(results), **engines}
+
+    report = {"instructions": count, "ballots": len(results), "fractional_ratio": fractional_ratio, "engines": {}}
+    outputs = {}
+    for name, engine in engines.items():
+        started = time.perf_counter()
+        outputs[name] = engine()
+        seconds = time.perf_counter() - started
+        report["engines"][name] = {"seconds": round(seconds, 3), "instructions_per_second": round(count / seconds)}
+
+    # Точные способы должны давать одинаковые суммы
+    exact = [outputs[name] for name in engines if name != "nested_dict"]
+    report["equal"] = all(output == exact[0] for output in exact)
+
+    baseline = report["engines"].get("nested_dict", report["engines"]["python"])["seconds"]
+    for name, values in report["engines"].items():
+        values["speedup"] = round(baseline / values["seconds"], 2) if values["seconds"] else None
+    return report
@@ -0,0 +1,82 @@
+import statistics
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# Перцентиль по отсортированному списку значений
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Многократный запуск функции с замером времени (мс) и количества SQL-запросов
+def measure(func, repeat=10, warmup=1):
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+
+    return summarize(timings, queries)
+
+
+# Сводка по замерам: перцентили задержки, запросы и пропускная способность
+def summarize(timings, queries=None):
+    total_seconds = sum(timings) / 1000
+    return {
+        "runs": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 3) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": max(queries) if queries else None,
+        "throughput_rps": round(len(timings) / total_seconds, 1) if total_seconds else 0.0,
+    }
+
+
+# Хост для запросов бенчмарков: первый разрешенный хост из ALLOWED_HOSTS
+def server_name():
+    from django.conf import settings
+
+    hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+    return hosts[0] if hosts else "localhost"
+
+
+# Клиент API от имени пользователя
+def api_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient(SERVER_NAME=server_name())
+    client.force_authenticate(user)
+    return client
+
+
+# Замер одного вызова: время (мс) и количество SQL-запросов
+def timed_call(func):
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed, len(context.captured_queries)
+
+
+# Сохранение отчета бенчмарка в JSON
+def write_report(report, path=None, stdout=None):
+    import json
+
+    text = json.dumps(report, ensure_ascii=False, indent=4, default=str)
+    if path:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+    if stdout is not None:
+        stdout.write(text)
@@ -0,0 +1,12 @@
+from django_filters import rest_framework as filters
+from meeting.models import Main
+
+
+# Фильтры списка собраний: статус, эмитент, вид собрания и период проведения
+# (meeting_date_after / meeting_date_before)
+class MeetingFilter(filters.FilterSet):
+    meeting_date = filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Main
+        fields = ['status', 'issuer', 'annual_or_unscheduled', 'meeting_date']
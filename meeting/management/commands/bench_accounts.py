@@ -0,0 +1,31 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from meeting.benchmarks.utils import measure
+from meeting.models import Main
+from meeting.services.account_service import get_accounts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сравнение производительности get_accounts: один запрос против запросов по каждому счету"
+
+    def add_arguments(self, parser):
+        parser.add_argument("meeting_id", type=int)
+        parser.add_argument("user_id", type=int)
+        parser.add_argument("--repeat", type=int, default=20, help="Количество повторов")
+
+    def handle(self, *args, **options):
+        try:
+            meeting = Main.objects.get(pk=options["meeting_id"])
+            user = User.objects.get(pk=options["user_id"])
+        except (Main.DoesNotExist, User.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        accounts = len(get_accounts(meeting, user, bulk=True))
+        report = {"meeting_id": meeting.meeting_id, "user_id": user.pk, "accounts": accounts}
+        for name, bulk in (("bulk", True), ("per_row", False)):
+            report[name] = measure(lambda: get_accounts(meeting, user, bulk=bulk), repeat=options["repeat"])
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=4))
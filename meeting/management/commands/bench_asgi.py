@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+from meeting.benchmarks.concurrency import run_asgi, run_wsgi
+from meeting.benchmarks.fixtures import create_voting_fixture, delete_voting_fixture
+from meeting.benchmarks.utils import write_report
+
+# Проверяемые маршруты: получение бюллетеня и карточка собрания
+ENDPOINTS = {
+    "vote": lambda meeting_id, account_id: f"/{meeting_id}/vote/{account_id}/",
+    "meeting": lambda meeting_id, account_id: f"/api/meetings/{meeting_id}/",
+}
+
+
+class Command(BaseCommand):
+    help = ("Сравнение WSGI и ASGI под одновременной нагрузкой медленных клиентов: "
+            "WSGI с ограниченным числом потоков против одного цикла событий ASGI")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100, help="Количество одновременных клиентов")
+        parser.add_argument("--requests", type=int, default=10, help="Количество запросов от каждого клиента")
+        parser.add_argument("--workers", type=int, default=8, help="Количество потоков WSGI-воркера")
+        parser.add_argument("--client-delay-ms", type=float, default=50,
+                            help="Время получения ответа медленным клиентом, мс")
+        parser.add_argument("--questions", type=int, default=10, help="Количество вопросов")
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="vote", help="Проверяемый маршрут")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        # Запросы выполняются в разных потоках со своими соединениями, поэтому тестовые данные
+        # сохраняются в БД (не в транзакции) и удаляются после замеров
+        fixture = create_voting_fixture(users=options["clients"], accounts_per_user=1, questions=options["questions"],
+                                        registered_ratio=1.0)
+        try:
+            report = self.run(fixture, options)
+        finally:
+            delete_voting_fixture(fixture)
+
+        write_report(report, options["output"], self.stdout)
+
+    def run(self, fixture, options):
+        path = ENDPOINTS[options["endpoint"]]
+        meeting_id = fixture["meeting"].meeting_id
+        targets = [
+            (path(meeting_id, fixture["accounts"][user.pk][0]), str(AccessToken.for_user(user)))
+            for user in fixture["users"]
+        ]
+        delay = options["client_delay_ms"] / 1000
+
+        wsgi = run_wsgi(targets, options["requests"], options["workers"], delay)
+        asgi = run_asgi(targets, options["requests"], delay)
+
+        return {
+            "database": connection.vendor,
+            "parameters": {key: options[key] for key in
+                           ("clients", "requests", "workers", "client_delay_ms", "questions", "endpoint")},
+            "wsgi": wsgi,
+            "asgi": asgi,
+            "throughput_ratio": round(asgi["throughput_rps"] / wsgi["throughput_rps"], 2) if wsgi["throughput_rps"] else None,
+        }
@@ -0,0 +1,53 @@
+import itertools
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from meeting.authentication import CachedJWTAuthentication, get_config, user_cache
+from meeting.benchmarks.fixtures import create_users
+from meeting.benchmarks.utils import measure, server_name, write_report
+from meeting.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = ("Аутентификация по JWT: запрос пользователя к БД на каждый запрос (JWTAuthentication) "
+            "против кеша пользователей (CachedJWTAuthentication), запросы к БД на вызов API и обновление токена. "
+            "Кеш пользователей работает только с общим кешем USER_CACHE['BACKEND']")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100, help="Количество пользователей (токены по кругу)")
+        parser.add_argument("--repeat", type=int, default=1000, help="Количество замеров")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        # Тестовые данные создаются в транзакции и откатываются после замеров
+        with transaction.atomic():
+            report = self.run(options)
+            transaction.set_rollback(True)
+
+        write_report(report, options["output"], self.stdout)
+
+    def run(self, options):
+        users = create_users(options["users"])
+        tokens = [CustomTokenObtainPairSerializer.get_token(user) for user in users]
+        factory = RequestFactory(SERVER_NAME=server_name())
+        requests = [factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token.access_token}") for token in tokens]
+        user_cache.clear()
+
+        report = {"database": connection.vendor, "users": len(users), "user_cache_backend": get_config()["BACKEND"]}
+        for name, authentication in (("jwt", JWTAuthentication()), ("cached", CachedJWTAuthentication())):
+            cycle = itertools.cycle(requests)
+            report[name] = measure(lambda: authentication.authenticate(next(cycle)),
+                                   repeat=options["repeat"], warmup=len(requests))
+
+        # Запрос к API и обновление токена с настройками проекта (DEFAULT_AUTHENTICATION_CLASSES)
+        client = APIClient(SERVER_NAME=server_name())
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens[0].access_token}")
+        report["api_request"] = measure(lambda: client.get("/api/meetings/"), repeat=min(options["repeat"], 100))
+        report["token_refresh"] = measure(
+            lambda: client.post("/api/token/refresh/", {"refresh": str(tokens[0])}, format="json"),
+            repeat=min(options["repeat"], 100)
+        )
+        report["user_cache"] = user_cache.stats()
+        return report
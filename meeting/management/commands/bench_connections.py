@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+from meeting.benchmarks.connections import connection_mode, measure_connect, measure_requests
+from meeting.benchmarks.fixtures import create_voting_fixture, delete_voting_fixture
+from meeting.benchmarks.utils import write_report
+
+
+class Command(BaseCommand):
+    help = ("Задержка запросов с новым соединением с БД на каждый запрос и с повторным использованием соединений "
+            "(постоянные соединения или пул из настроек)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Количество запросов в каждом режиме")
+        parser.add_argument("--questions", type=int, default=10, help="Количество вопросов")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        # Соединение закрывается между запросами, поэтому тестовые данные сохраняются в БД и удаляются после замеров
+        fixture = create_voting_fixture(users=1, accounts_per_user=1, questions=options["questions"],
+                                        registered_ratio=1.0)
+        try:
+            report = self.run(fixture, options)
+        finally:
+            delete_voting_fixture(fixture)
+
+        write_report(report, options["output"], self.stdout)
+
+    def run(self, fixture, options):
+        user = fixture["users"][0]
+        path = f"/{fixture['meeting'].meeting_id}/vote/{fixture['accounts'][user.pk][0]}/"
+        token = str(AccessToken.for_user(user))
+
+        with connection_mode(reuse=False) as settings:
+            connect = measure_connect()
+            fresh = {"settings": settings, **measure_requests(path, token, options["requests"])}
+        with connection_mode(reuse=True) as settings:
+            reused = {"settings": settings, **measure_requests(path, token, options["requests"])}
+
+        return {
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "connect": connect,
+            "new_connection_per_request": fresh,
+            "reused_connections": reused,
+            "saved_p50_ms": round(fresh["p50_ms"] - reused["p50_ms"], 3),
+        }
@@ -0,0 +1,86 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from meeting.benchmarks.fixtures import create_voting_fixture
+from meeting.benchmarks.utils import summarize, write_report
+from meeting.models import DjangoRelation, VoteCount, VotingResult
+from meeting.services.account_service import accounts_queryset
+
+# Индексы горячих выборок (миграция 0018)
+HOT_INDEXES = [
+    "relation_user_meeting_idx",
+    "relation_registered_idx",
+    "vote_count_fullname_idx",
+    "voting_result_voted_idx",
+]
+
+
+# Горячие выборки: имя, запрос и способ его выполнения
+def hot_queries(meeting, user_id, account_id):
+    return {
+        "registered": DjangoRelation.objects.filter(user_id=user_id, meeting=meeting, account_id=account_id,
+                                                    registered=True),
+        "has_account": DjangoRelation.objects.filter(meeting=meeting, user_id=user_id, account_id=account_id),
+        "get_accounts": accounts_queryset(meeting, user_id),
+        "has_voted": VotingResult.objects.filter(meeting_id=meeting, account_id=account_id, user_id=user_id,
+                                                 json_result__isnull=False),
+        "vote_count": VoteCount.objects.filter(meeting=meeting, account_id=account_id).values("account_fullname"),
+        "registered_users_page": DjangoRelation.objects.filter(meeting=meeting, registered=True)
+                                                       .order_by("account_id").values("account_id")[:100],
+    }
+
+
+class Command(BaseCommand):
+    help = "Планы выполнения (EXPLAIN) и время горячих выборок с новыми индексами и без них"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Количество лицевых счетов")
+        parser.add_argument("--accounts-per-user", type=int, default=10, help="Лицевых счетов на пользователя")
+        parser.add_argument("--repeat", type=int, default=200, help="Повторов каждой выборки")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        # Данные и удаление индексов выполняются в транзакции и откатываются после замеров
+        with transaction.atomic():
+            started = time.perf_counter()
+            fixture = create_voting_fixture(users=max(1, options["rows"] // options["accounts_per_user"]),
+                                            accounts_per_user=options["accounts_per_user"], questions=3,
+                                            registered_ratio=0.5, voted_ratio=0.3)
+            self.stdout.write(f"Данные созданы за {time.perf_counter() - started:.1f} с")
+            self.analyze()
+
+            report = {"vendor": connection.vendor, "rows": options["rows"]}
+            report["with_indexes"] = self.run(fixture, options["repeat"])
+
+            with connection.cursor() as cursor:
+                for name in HOT_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+            self.analyze()
+            report["without_indexes"] = self.run(fixture, options["repeat"])
+
+            transaction.set_rollback(True)
+
+        write_report(report, options["output"], self.stdout)
+
+    # Обновление статистики планировщика
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def run(self, fixture, repeat):
+        meeting = fixture["meeting"]
+        accounts = [(user_id, account_id) for user_id, ids in fixture["accounts"].items() for account_id in ids]
+        rng = random.Random(0)
+        samples = [rng.choice(accounts) for _ in range(repeat)]
+
+        results = {}
+        for name, queryset in hot_queries(meeting, *samples[0]).items():
+            timings = []
+            for user_id, account_id in samples:
+                queryset = hot_queries(meeting, user_id, account_id)[name]
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {"plan": queryset.explain(), **summarize(timings)}
+        return results
@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from meeting.benchmarks.lifecycle import create_lifecycle_fixture, run_lifecycle, current_commit, compare_reports
+from meeting.benchmarks.utils import write_report
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный тест жизненного цикла собрания: регистрация, получение и отправка бюллетеня, "
+            "итоги голосования и список собраний")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--issuers", type=int, default=2, help="Количество эмитентов")
+        parser.add_argument("--meetings", type=int, default=2, help="Количество собраний у каждого эмитента")
+        parser.add_argument("--users", type=int, default=20, help="Количество пользователей")
+        parser.add_argument("--accounts", type=int, default=3, help="Количество лицевых счетов у пользователя в собрании")
+        parser.add_argument("--questions", type=int, default=10, help="Количество вопросов")
+        parser.add_argument("--details", type=int, default=0, help="Количество кандидатов в каждом вопросе")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+        parser.add_argument("--baseline", help="Отчет предыдущего прогона (JSON) для сравнения")
+
+    def handle(self, *args, **options):
+        # Тестовые данные создаются в транзакции и откатываются после замеров
+        with transaction.atomic():
+            fixture = create_lifecycle_fixture(
+                issuers=options["issuers"], meetings_per_issuer=options["meetings"], users=options["users"],
+                accounts_per_user=options["accounts"], questions=options["questions"], details=options["details"]
+            )
+            try:
+                result = run_lifecycle(fixture)
+            except RuntimeError as e:
+                raise CommandError(f"Прогон прерван: {e}")
+            transaction.set_rollback(True)
+
+        report = {
+            "commit": current_commit(),
+            "database": connection.vendor,
+            "parameters": {key: options[key] for key in ("issuers", "meetings", "users", "accounts", "questions", "details")},
+            **result,
+        }
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+            report["baseline_commit"] = baseline.get("commit")
+            report["comparison"] = compare_reports(report, baseline)
+
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from meeting.benchmarks.tally import run_tally_benchmark
+from meeting.benchmarks.utils import write_report
+
+
+class Command(BaseCommand):
+    help = "Сравнение способов подсчета итогов голосования на сгенерированных бюллетенях (без обращения к БД)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--instructions", type=int, default=1_000_000, help="Количество голосов во всех бюллетенях")
+        parser.add_argument("--questions", type=int, default=10, help="Количество вопросов")
+        parser.add_argument("--details", type=int, default=5, help="Количество кандидатов у каждого второго вопроса")
+        parser.add_argument("--fractional", type=float, default=0.0, help="Доля дробных количеств голосов")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        report = run_tally_benchmark(questions=options["questions"], details=options["details"],
+                                     instructions=options["instructions"], fractional_ratio=options["fractional"])
+        write_report(report, options["output"], self.stdout)
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.benchmarks.fixtures import create_voting_fixture, make_vote
+from meeting.benchmarks.utils import api_client, summarize, timed_call, write_report
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный тест приема бюллетеней: по одному счету (VoteView) и пакетами (VoteBatchView). "
+            "Оба способа - текущие (с проверкой бюллетеня и условной записью); прежний прием бюллетеней "
+            "без проверки в сравнении не участвует")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=1000, help="Количество лицевых счетов")
+        parser.add_argument("--questions", type=int, default=10, help="Количество вопросов")
+        parser.add_argument("--details", type=int, default=0, help="Количество кандидатов в каждом вопросе")
+        parser.add_argument("--batch-size", type=int, default=100, help="Размер пакета бюллетеней")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        # Тестовые данные создаются в транзакции и откатываются после замеров
+        with transaction.atomic():
+            report = self.run(options)
+            transaction.set_rollback(True)
+
+        write_report(report, options["output"], self.stdout)
+
+    def run(self, options):
+        fixture = create_voting_fixture(users=1, accounts_per_user=options["accounts"],
+                                        questions=options["questions"], details=options["details"])
+        meeting = fixture["meeting"]
+        user = fixture["users"][0]
+        accounts = fixture["accounts"][user.pk]
+        client = api_client(user)
+        vote = make_vote(get_ballot_data(meeting.meeting_id))
+
+        half = len(accounts) // 2
+        single_accounts, batch_accounts = accounts[:half], accounts[half:]
+
+        # Прием по одному счету
+        timings, queries = [], []
+        for account_id in single_accounts:
+            response, elapsed, count = timed_call(
+                lambda: client.post(f"/{meeting.meeting_id}/vote/{account_id}/", vote, format="json"))
+            if response.status_code != 201:
+                raise CommandError(f"Счет {account_id}: ожидался ответ 201, получен {response.status_code} "
+                                   f"{response.content[:200]}")
+            timings.append(elapsed)
+            queries.append(count)
+        single = summarize(timings, queries)
+
+        # Прием пакетами
+        batch_size = options["batch_size"]
+        timings, queries = [], []
+        for start in range(0, len(batch_accounts), batch_size):
+            batch = [{"account_id": account_id, **vote} for account_id in batch_accounts[start:start + batch_size]]
+            response, elapsed, count = timed_call(
+                lambda: client.post(f"/{meeting.meeting_id}/votes/", {"votes": batch}, format="json"))
+            if response.status_code != 201 or response.data["rejected"]:
+                raise CommandError(f"Пакет со счета {batch[0]['account_id']}: ответ {response.status_code} "
+                                   f"{response.content[:200]}")
+            timings.append(elapsed)
+            queries.append(count)
+        batched = summarize(timings, queries)
+
+        # Пропускная способность в бюллетенях в секунду
+        single_rate = len(single_accounts) / (single["mean_ms"] * single["runs"] / 1000)
+        batch_rate = len(batch_accounts) / (batched["mean_ms"] * batched["runs"] / 1000)
+
+        return {
+            "accounts": len(accounts),
+            "questions": options["questions"],
+            "details": options["details"],
+            "batch_size": batch_size,
+            "single": {**single, "votes_per_second": round(single_rate, 1)},
+            "batch": {**batched, "votes_per_second": round(batch_rate, 1),
+                      "queries_per_vote": round(batched["queries"] / batch_size, 3)},
+            "speedup": round(batch_rate / single_rate, 2),
+        }
@@ -0,0 +1,61 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from meeting.models import Main
+from meeting.services.import_service import (
+    DEFAULT_CHUNK_SIZE, REGISTER_FORMATS, detect_format, import_register, read_register
+)
+
+
+class Command(BaseCommand):
+    help = ("Загрузка реестра акционеров (CSV или JSONL с полями account_id, account_fullname, quantity, user_id) "
+            "в собрание: создание VoteCount, VotingResult и DjangoRelation")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл реестра")
+        parser.add_argument("--meeting", type=int, required=True, help="Номер собрания")
+        parser.add_argument("--format", choices=REGISTER_FORMATS, help="Формат файла (по умолчанию по расширению)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Строк в одной транзакции")
+        parser.add_argument("--resume", action="store_true",
+                            help="Продолжить прерванную загрузку с последней сохраненной строки")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            meeting = Main.objects.get(pk=options["meeting"])
+        except Main.DoesNotExist:
+            raise CommandError(f"Собрание {options['meeting']} не найдено.")
+        if meeting.is_draft:
+            raise CommandError("Реестр загружается только в отправленное собрание (повестка дня черновика может измениться).")
+
+        # Номер последней загруженной строки сохраняется после каждой части
+        progress_path = f"{path}.progress"
+        skip = 0
+        if options["resume"] and os.path.exists(progress_path):
+            with open(progress_path, encoding="utf-8") as file:
+                progress = json.load(file)
+            if progress.get("meeting_id") != meeting.meeting_id:
+                raise CommandError(f"Файл {progress_path} относится к другому собранию.")
+            skip = progress["rows"]
+            self.stdout.write(f"Продолжение загрузки со строки {skip + 1}")
+
+        def on_chunk(processed, report):
+            with open(progress_path, "w", encoding="utf-8") as file:
+                json.dump({"meeting_id": meeting.meeting_id, "rows": processed}, file)
+            self.stdout.write(f"Загружено строк: {processed} ({report['rows_per_second']} строк/с)")
+
+        file_format = options["format"] or detect_format(path)
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            report = import_register(meeting, read_register(file, file_format),
+                                     chunk_size=options["chunk_size"], skip=skip, on_chunk=on_chunk)
+
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+        for error in report["errors"]:
+            self.stderr.write(f"Строка {error['row']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено строк: {report['rows']}, связано со счетами пользователей: {report['linked']}, "
+            f"ошибок: {report['error_count']}, скорость: {report.get('rows_per_second', 0)} строк/с"
+        ))
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from meeting.models import RegisterImport
+from meeting.services.import_service import DEFAULT_CHUNK_SIZE, claim_register_import, run_register_import
+
+
+class Command(BaseCommand):
+    help = "Загрузка реестров акционеров, поставленных в очередь из админки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Работать постоянно, проверяя очередь с заданным интервалом")
+        parser.add_argument("--interval", type=int, default=10,
+                            help="Интервал между проверками очереди в секундах (для --loop)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Строк в одной транзакции")
+
+    def handle(self, *args, **options):
+        while True:
+            # Загрузки из очереди выполняются по одной, пока очередь не опустеет
+            while (register_import := claim_register_import()) is not None:
+                self.run(register_import, options["chunk_size"])
+
+            if not options["loop"]:
+                break
+
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def run(self, register_import, chunk_size):
+        self.stdout.write(f"Загрузка {register_import.pk} ({register_import.file.name}) в собрание "
+                          f"{register_import.meeting_id}")
+
+        def on_chunk(processed, report):
+            self.stdout.write(f"Загружено строк: {processed} ({report['rows_per_second']} строк/с)")
+
+        register_import = run_register_import(register_import, chunk_size=chunk_size, on_chunk=on_chunk)
+        report = register_import.report
+        if register_import.status == RegisterImport.FAILED:
+            self.stderr.write(f"Загрузка {register_import.pk} прервана на строке {register_import.rows_done + 1}: "
+                              f"{report['error']}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено строк: {report['rows']}, связано со счетами пользователей: {report['linked']}, "
+            f"ошибок: {report['error_count']}"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from meeting.benchmarks.utils import write_report
+from meeting.services.token_service import DEFAULT_BATCH_SIZE, get_token_table_sizes, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = ("Удаление просроченных токенов из черного списка JWT (OutstandingToken, BlacklistedToken) пачками "
+            "с отчетом о размере таблиц и скорости удаления")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Количество токенов, удаляемых в одной транзакции")
+        parser.add_argument("--pause", type=float, default=0, help="Пауза между пачками в секундах")
+        parser.add_argument("--limit", type=int, help="Максимальное количество удаляемых токенов за запуск")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать размер таблиц")
+        parser.add_argument("--output", help="Файл для сохранения отчета в JSON")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть больше 0")
+
+        report = {"before": get_token_table_sizes()}
+        if not options["dry_run"]:
+            report["purged"] = purge_expired_tokens(options["batch_size"], pause=options["pause"],
+                                                    limit=options["limit"])
+            report["after"] = get_token_table_sizes()
+
+        write_report(report, options["output"], self.stdout)
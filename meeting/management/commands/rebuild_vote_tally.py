@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from meeting.models import Main
+from meeting.services.voting_service import rebuild_vote_tally
+
+
+class Command(BaseCommand):
+    help = "Пересчет таблицы итогов голосования (VoteTally) по сохраненным бюллетеням"
+
+    def add_arguments(self, parser):
+        parser.add_argument("meeting_ids", nargs="*", type=int,
+                            help="Номера собраний (по умолчанию все отправленные собрания)")
+
+    def handle(self, *args, **options):
+        meeting_ids = options["meeting_ids"]
+        meetings = Main.objects.filter(is_draft=False)
+        if meeting_ids:
+            meetings = Main.objects.filter(meeting_id__in=meeting_ids)
+            missing = set(meeting_ids) - set(meetings.values_list("meeting_id", flat=True))
+            if missing:
+                raise CommandError(f"Собрания не найдены: {', '.join(map(str, sorted(missing)))}")
+
+        for meeting in meetings.order_by("meeting_id"):
+            rows = rebuild_vote_tally(meeting)
+            self.stdout.write(f"Собрание {meeting.meeting_id}: строк итогов {rows}")
+
+        self.stdout.write(self.style.SUCCESS("Пересчет итогов завершен."))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from meeting.models import Main
+
+
+class Command(BaseCommand):
+    help = "Обновление статусов собраний по датам регистрации, открытия, подсчета голосов и закрытия"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Работать постоянно, обновляя статусы с заданным интервалом")
+        parser.add_argument("--interval", type=int, default=60,
+                            help="Интервал между обновлениями в секундах (для --loop)")
+
+    def handle(self, *args, **options):
+        while True:
+            updated = Main.objects.advance_statuses()
+            changed = {status: count for status, count in updated.items() if count}
+            if changed or not options["loop"]:
+                details = ", ".join(f"статус {status}: {count}" for status, count in sorted(changed.items()))
+                self.stdout.write(f"Обновлено собраний - {details or 'нет изменений'}")
+
+            if not options["loop"]:
+                break
+
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0015_alter_questiondetail_question_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_id', models.IntegerField()),
+                ('detail_id', models.IntegerField(default=0)),
+                ('vote_type', models.CharField(choices=[('For', 'За'), ('Against', 'Против'), ('Abstain', 'Воздержался')], max_length=7)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='meeting.main')),
+            ],
+            options={
+                'db_table': 'meeting_vote_tally',
+                'unique_together': {('meeting', 'question_id', 'detail_id', 'vote_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0016_votetally'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='main',
+            index=models.Index(fields=['is_draft', '-meeting_date', '-meeting_id'], name='meeting_main_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='main',
+            index=models.Index(fields=['is_draft', 'status', '-meeting_date'], name='meeting_main_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='main',
+            index=models.Index(fields=['is_draft', 'annual_or_unscheduled', '-meeting_date'], name='meeting_main_kind_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0017_main_meeting_main_list_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='djangorelation',
+            index=models.Index(fields=['user', 'meeting', 'account_id'], include=('registered',), name='relation_user_meeting_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='djangorelation',
+            index=models.Index(condition=models.Q(('registered', True)), fields=['meeting', 'account_id'], name='relation_registered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='votecount',
+            index=models.Index(fields=['meeting', 'account_id'], include=('account_fullname',), name='vote_count_fullname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='votingresult',
+            index=models.Index(condition=models.Q(('json_result__isnull', False)), fields=['meeting_id', 'account_id', 'user_id'], name='voting_result_voted_idx'),
+        ),
+    ]
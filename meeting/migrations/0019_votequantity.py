@@ -0,0 +1,94 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:58
+
+import json
+from decimal import Decimal, InvalidOperation
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+# Разбор VoteCount.json_quantity (строка JSON или объект) в строки (question_id, detail_id, quantity).
+# Количество разбирается точно (Decimal), некорректные данные вызывают ошибку
+def parse_json_quantity(json_quantity):
+    if not json_quantity:
+        return []
+    if isinstance(json_quantity, str):
+        json_quantity = json.loads(json_quantity)
+
+    rows = {}
+    for vote in json_quantity.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+        vote_instr = vote.get("VoteInstr", {})
+        detail_id = vote_instr.get("DetailId")
+        key = (int(vote_instr["QuestionId"]), int(detail_id) if detail_id is not None else 0)
+        quantity = Decimal(str(vote_instr["Quantity"]))
+        if not quantity.is_finite():
+            raise ValueError(f"Некорректное количество голосов: {vote_instr['Quantity']}")
+        rows.setdefault(key, quantity)
+    return [(question_id, detail_id, quantity) for (question_id, detail_id), quantity in rows.items()]
+
+
+# Заполнение VoteQuantity по существующим счетам
+def backfill_vote_quantities(apps, schema_editor):
+    VoteCount = apps.get_model('meeting', 'VoteCount')
+    VoteQuantity = apps.get_model('meeting', 'VoteQuantity')
+
+    parsed = {}
+    pending = []
+    vote_counts = VoteCount.objects.exclude(json_quantity__isnull=True).values_list(
+        'vote_count_id', 'meeting_id', 'account_id', 'json_quantity'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+    for vote_count_id, meeting_id, account_id, json_quantity in vote_counts:
+        # Счета с одинаковым количеством голосов имеют одинаковый json_quantity
+        key = json_quantity if isinstance(json_quantity, str) else json.dumps(json_quantity, sort_keys=True)
+        if key not in parsed:
+            try:
+                parsed[key] = parse_json_quantity(json_quantity)
+            except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation) as e:
+                raise ValueError(
+                    f"VoteCount {vote_count_id}: некорректный json_quantity ({type(e).__name__}: {e})"
+                ) from e
+
+        # Поле quantity пока целое: счета с дробными количествами переносятся миграцией 0020 без округления
+        if any(quantity != quantity.to_integral_value() for _, _, quantity in parsed[key]):
+            continue
+
+        pending += [
+            VoteQuantity(vote_count_id=vote_count_id, meeting_id=meeting_id, account_id=account_id,
+                         question_id=question_id, detail_id=detail_id, quantity=quantity)
+            for question_id, detail_id, quantity in parsed[key]
+        ]
+        if len(pending) >= BATCH_SIZE:
+            VoteQuantity.objects.bulk_create(pending, ignore_conflicts=True)
+            pending = []
+
+    if pending:
+        VoteQuantity.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0018_djangorelation_relation_user_meeting_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteQuantity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_id', models.IntegerField()),
+                ('question_id', models.IntegerField()),
+                ('detail_id', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField()),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='meeting.main')),
+                ('vote_count', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quantities', to='meeting.votecount')),
+            ],
+            options={
+                'db_table': 'meeting_vote_quantity',
+                'unique_together': {('meeting', 'account_id', 'question_id', 'detail_id')},
+            },
+        ),
+        migrations.RunPython(backfill_vote_quantities, migrations.RunPython.noop),
+    ]
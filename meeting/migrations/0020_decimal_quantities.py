@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:01
+
+import json
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+# Повторное заполнение VoteQuantity по json_quantity с точными (дробными) количествами,
+# которые при заполнении в 0019 не переносились в целочисленное поле
+def resync_fractional_quantities(apps, schema_editor):
+    VoteCount = apps.get_model('meeting', 'VoteCount')
+    VoteQuantity = apps.get_model('meeting', 'VoteQuantity')
+
+    vote_counts = VoteCount.objects.exclude(json_quantity__isnull=True).values_list(
+        'vote_count_id', 'meeting_id', 'account_id', 'json_quantity'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+    for vote_count_id, meeting_id, account_id, json_quantity in vote_counts:
+        try:
+            data = json.loads(json_quantity) if isinstance(json_quantity, str) else json_quantity
+            rows = {}
+            for vote in data.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+                vote_instr = vote.get("VoteInstr", {})
+                detail_id = vote_instr.get("DetailId")
+                key = (int(vote_instr["QuestionId"]), int(detail_id) if detail_id is not None else 0)
+                rows.setdefault(key, Decimal(str(vote_instr["Quantity"])))
+        except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation):
+            continue
+
+        # Целые количества уже перенесены без потерь
+        if all(quantity == quantity.to_integral_value() for quantity in rows.values()):
+            continue
+
+        VoteQuantity.objects.filter(vote_count_id=vote_count_id).delete()
+        VoteQuantity.objects.bulk_create([
+            VoteQuantity(vote_count_id=vote_count_id, meeting_id=meeting_id, account_id=account_id,
+                         question_id=question_id, detail_id=detail_id, quantity=quantity)
+            for (question_id, detail_id), quantity in rows.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0019_votequantity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='votequantity',
+            name='quantity',
+            field=models.DecimalField(decimal_places=6, max_digits=30),
+        ),
+        migrations.AlterField(
+            model_name='votetally',
+            name='quantity',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=30),
+        ),
+        migrations.RunPython(resync_fractional_quantities, migrations.RunPython.noop),
+    ]
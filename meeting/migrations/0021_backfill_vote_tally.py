@@ -0,0 +1,54 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.db import migrations
+
+VOTE_TYPES = ("For", "Against", "Abstain")
+
+
+# Итоги голосования (VoteTally) по бюллетеням, сохраненным до появления таблицы итогов.
+# Итоги всех собраний пересчитываются заново, поэтому повторный запуск дает тот же результат.
+# Голоса с некорректным номером вопроса или количеством пропускаются
+def backfill_vote_tally(apps, schema_editor):
+    VotingResult = apps.get_model("meeting", "VotingResult")
+    VoteTally = apps.get_model("meeting", "VoteTally")
+
+    totals = defaultdict(Decimal)
+    results = VotingResult.objects.filter(json_result__isnull=False).values_list("meeting_id", "json_result")
+    for meeting_id, json_result in results.iterator(chunk_size=2000):
+        if not isinstance(json_result, dict):
+            continue
+        for vote in json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+            vote_instr = vote.get("VoteInstr", {})
+            try:
+                question_id = int(vote_instr.get("QuestionId"))
+                detail_id = int(vote_instr.get("DetailId") or 0)
+            except (TypeError, ValueError):
+                continue
+            for vote_type in VOTE_TYPES:
+                if vote_type not in vote_instr:
+                    continue
+                try:
+                    quantity = Decimal(str(vote_instr[vote_type]["Quantity"]))
+                except (InvalidOperation, KeyError, TypeError):
+                    continue
+                if quantity.is_finite():
+                    totals[(meeting_id, question_id, detail_id, vote_type)] += quantity
+
+    VoteTally.objects.all().delete()
+    VoteTally.objects.bulk_create(
+        [VoteTally(meeting_id=meeting_id, question_id=question_id, detail_id=detail_id, vote_type=vote_type,
+                   quantity=quantity)
+         for (meeting_id, question_id, detail_id, vote_type), quantity in totals.items()],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0020_decimal_quantities'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_vote_tally, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0021_backfill_vote_tally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisterImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='register_imports/')),
+                ('file_format', models.CharField(max_length=5)),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'В очереди'), (2, 'Выполняется'), (3, 'Завершена'), (4, 'Ошибка')], default=1)),
+                ('rows_done', models.IntegerField(default=0)),
+                ('report', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='meeting.main')),
+            ],
+            options={
+                'verbose_name': 'загрузка реестра',
+                'verbose_name_plural': 'загрузки реестров',
+                'db_table': 'meeting_register_import',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Индексы списка собраний в порядке MeetingPagination: собрания без даты - в конце (DESC NULLS LAST).
+# В PostgreSQL индекс DESC по умолчанию хранит NULL первыми и не подходит для такой сортировки.
+# SQLite не поддерживает NULLS LAST в индексах, там индексы остаются прежними (состояние моделей не меняется)
+INDEXES = {
+    "meeting_main_list_idx": '"is_draft", "meeting_date" DESC NULLS LAST, "meeting_id" DESC',
+    "meeting_main_status_idx": '"is_draft", "status", "meeting_date" DESC NULLS LAST',
+    "meeting_main_kind_idx": '"is_draft", "annual_or_unscheduled", "meeting_date" DESC NULLS LAST',
+}
+
+PREVIOUS_INDEXES = {
+    "meeting_main_list_idx": '"is_draft", "meeting_date" DESC, "meeting_id" DESC',
+    "meeting_main_status_idx": '"is_draft", "status", "meeting_date" DESC',
+    "meeting_main_kind_idx": '"is_draft", "annual_or_unscheduled", "meeting_date" DESC',
+}
+
+
+def recreate_indexes(indexes):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for name, columns in indexes.items():
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            schema_editor.execute(f'CREATE INDEX "{name}" ON "meeting_main" ({columns})')
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0022_registerimport'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_indexes(INDEXES), recreate_indexes(PREVIOUS_INDEXES)),
+    ]
@@ -5,6 +5,10 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Количество голосов хранится точно, с дробными акциями до QUANTITY_DECIMAL_PLACES знаков
+QUANTITY_MAX_DIGITS = 30
+QUANTITY_DECIMAL_PLACES = 6
+
 class Issuer(models.Model):
     issuer_id = models.AutoField(primary_key=True)
     full_name = models.CharField(max_length=300)
@@ -26,6 +30,29 @@ class Registrar(models.Model):
     class Meta:
         db_table = 'meeting_registrar'
 
+class MainQuerySet(models.QuerySet):
+    # Переходы статусов: статус и поле с датой его наступления (от последнего к первому)
+    STATUS_TRANSITIONS = [
+        (5, 'meeting_close'),  # Собрание завершилось
+        (4, 'vote_counting'),  # Голосование завершено
+        (3, 'meeting_open'),   # Разрешено голосование
+        (2, 'checkin'),        # Разрешена регистрация
+    ]
+
+    # Массовое обновление статусов отправленных собраний по наступившим датам
+    def advance_statuses(self, now=None):
+        now = now or timezone.now()
+        meetings = self.filter(is_draft=False)
+        updated = {}
+
+        # Сначала более поздние статусы, чтобы собрание сразу получило актуальный статус
+        for new_status, field in self.STATUS_TRANSITIONS:
+            updated[new_status] = meetings.filter(
+                models.Q(status__lt=new_status) | models.Q(status__isnull=True),
+                **{f'{field}__lte': now}
+            ).update(status=new_status)
+        return updated
+
 class Main(models.Model):
     STATUS_CHOICES = [
         (1, 'Ожидается'),
@@ -63,34 +90,14 @@ class Main(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.DO_NOTHING, blank=True, null=True) # Кто создал (email)
     sent_at = models.DateField(blank=True, null=True) # Дата отправления
 
+    objects = MainQuerySet.as_manager()
+
     # Автоматический расчет даты окончания приема бюллетеней (за два дня до собрания)
     def save(self, *args, **kwargs):
         if self.meeting_date:
             self.deadline_date = self.meeting_date - timedelta(days=2)
         super().save(*args, **kwargs)
 
-    # Обновление статуса собрания
-    def update_status(self):
-        if self.is_draft or self.status == 5:
-            return
-        
-        now = timezone.localtime(timezone.now())
-
-        if self.meeting_close and now >= self.meeting_close:
-            new_status = 5  # Собрание завершилось
-        elif self.vote_counting and now >= self.vote_counting:
-            new_status = 4  # Голосование завершено
-        elif self.meeting_open and now >= self.meeting_open:
-            new_status = 3  # Разрешено голосование
-        elif self.checkin and now >= self.checkin:
-            new_status = 2  # Разрешена регистрация
-        else:
-            new_status = 1  # Ожидается
-        
-        if self.status != new_status:
-            self.status = new_status
-            self.save(update_fields=['status'])
-
     # Обновление статуса черновка при отправке собрания
     def set_ready(self):
         self.is_draft = False
@@ -122,6 +129,15 @@ class Main(models.Model):
     
     class Meta:
         db_table = 'meeting_main'         
+        indexes = [
+            # Список собраний: фильтр по черновику, сортировка и период по дате
+            # (в PostgreSQL - с NULLS LAST по дате, миграция 0023)
+            models.Index(fields=['is_draft', '-meeting_date', '-meeting_id'], name='meeting_main_list_idx'),
+            # Фильтр по статусу
+            models.Index(fields=['is_draft', 'status', '-meeting_date'], name='meeting_main_status_idx'),
+            # Фильтр по виду собрания
+            models.Index(fields=['is_draft', 'annual_or_unscheduled', '-meeting_date'], name='meeting_main_kind_idx'),
+        ]
 
 class Agenda(models.Model):
     question_id = models.AutoField(primary_key=True)
@@ -158,6 +174,24 @@ class VoteCount(models.Model):
     class Meta:
         db_table = 'meeting_vote_count'
         unique_together = (('meeting', 'account_id'),)
+        indexes = [
+            # ФИО счета без обращения к таблице (index-only scan в PostgreSQL)
+            models.Index(fields=['meeting', 'account_id'], include=['account_fullname'], name='vote_count_fullname_idx'),
+        ]
+
+
+# Количество голосов лицевого счета по вопросу (подвопросу), нормализованное представление VoteCount.json_quantity
+class VoteQuantity(models.Model):
+    vote_count = models.ForeignKey(VoteCount, on_delete=models.CASCADE, related_name='quantities')
+    meeting = models.ForeignKey(Main, on_delete=models.CASCADE)
+    account_id = models.IntegerField()
+    question_id = models.IntegerField()
+    detail_id = models.IntegerField(default=0)  # 0 - вопрос без подвопросов
+    quantity = models.DecimalField(max_digits=QUANTITY_MAX_DIGITS, decimal_places=QUANTITY_DECIMAL_PLACES)
+
+    class Meta:
+        db_table = 'meeting_vote_quantity'
+        unique_together = (('meeting', 'account_id', 'question_id', 'detail_id'),)
 
 
 class VotingResult(models.Model):
@@ -170,6 +204,29 @@ class VotingResult(models.Model):
     class Meta:
         db_table = 'meeting_voting_result'
         unique_together = (('meeting_id', 'account_id', 'user_id'),)
+        indexes = [
+            # Проверка "голосовал ли" и выборка заполненных бюллетеней собрания
+            models.Index(fields=['meeting_id', 'account_id', 'user_id'], condition=models.Q(json_result__isnull=False),
+                         name='voting_result_voted_idx'),
+        ]
+
+# Накопленные итоги голосования по собранию (вопрос, подвопрос, вариант голоса)
+class VoteTally(models.Model):
+    VOTE_TYPE_CHOICES = [
+        ('For', 'За'),
+        ('Against', 'Против'),
+        ('Abstain', 'Воздержался')
+    ]
+
+    meeting = models.ForeignKey(Main, on_delete=models.CASCADE, related_name='tallies')
+    question_id = models.IntegerField()
+    detail_id = models.IntegerField(default=0)  # 0 - голос по вопросу без подвопросов
+    vote_type = models.CharField(max_length=7, choices=VOTE_TYPE_CHOICES)
+    quantity = models.DecimalField(max_digits=QUANTITY_MAX_DIGITS, decimal_places=QUANTITY_DECIMAL_PLACES, default=0)
+
+    class Meta:
+        db_table = 'meeting_vote_tally'
+        unique_together = (('meeting', 'question_id', 'detail_id', 'vote_type'),)
 
 class DjangoRelation(models.Model):
     vote_count = models.ForeignKey(VoteCount, on_delete=models.CASCADE)
@@ -182,6 +239,37 @@ class DjangoRelation(models.Model):
     class Meta:
         db_table = 'meeting_django_relation'
         unique_together = (('meeting', 'account_id', 'user'),)
+        indexes = [
+            # Счета пользователя в собрании (AccountContext, get_accounts, registered, has_account)
+            models.Index(fields=['user', 'meeting', 'account_id'], include=['registered'], name='relation_user_meeting_idx'),
+            # Зарегистрированные счета собрания
+            models.Index(fields=['meeting', 'account_id'], condition=models.Q(registered=True),
+                         name='relation_registered_idx'),
+        ]
+
+# Загрузка реестра акционеров, поставленная в очередь из админки (выполняется командой process_register_imports)
+class RegisterImport(models.Model):
+    PENDING, RUNNING, DONE, FAILED = 1, 2, 3, 4
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершена'),
+        (FAILED, 'Ошибка')
+    ]
+
+    meeting = models.ForeignKey(Main, on_delete=models.CASCADE)
+    file = models.FileField(upload_to='register_imports/')
+    file_format = models.CharField(max_length=5)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
+    rows_done = models.IntegerField(default=0)  # Загруженные строки: после ошибки загрузка продолжается с них
+    report = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'meeting_register_import'
+        verbose_name = 'загрузка реестра'
+        verbose_name_plural = 'загрузки реестров'
 
 class Docs(models.Model):
     meeting = models.ForeignKey(Main, on_delete=models.CASCADE) 
@@ -0,0 +1,214 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from rest_framework import serializers
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,      # Заголовок Server-Timing в ответах
+    "SLOW_REQUEST_MS": 1000,    # Порог медленного запроса: в лог пишется полный список SQL-запросов (None - не писать)
+    "MAX_LOGGED_QUERIES": 500,  # Сколько SQL-запросов запоминается для лога медленного запроса
+}
+
+# Границы корзин гистограмм
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+_current = ContextVar("request_stats", default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "REQUEST_METRICS", {})}
+
+
+# Замеры одного запроса: SQL-запросы, время SQL и сериализации
+class RequestStats:
+    def __init__(self, max_queries=0):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self.queries = []
+        self.max_queries = max_queries
+
+    # Обертка для connection.execute_wrapper
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.query_count += 1
+            self.sql_ms += elapsed
+            if len(self.queries) < self.max_queries:
+                self.queries.append((round(elapsed, 3), sql))
+
+
+@contextmanager
+def collect_request_stats(max_queries=0):
+    stats = RequestStats(max_queries)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# Учет времени сериализации в замерах текущего запроса
+@contextmanager
+def track_serialization():
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serializer_ms += (time.perf_counter() - started) * 1000
+
+
+# Сериализатор списка с замером времени формирования data
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with track_serialization():
+            return super().data
+
+
+# Замер времени формирования data (включая ленивые запросы к БД при обходе связанных объектов).
+# Для many=True в Meta указывается list_serializer_class = TimedListSerializer
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        with track_serialization():
+            return super().data
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    # Оценка перцентиля по корзинам (верхняя граница корзины)
+    def quantile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self):
+        seen = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            seen += count
+            yield bound, seen
+
+
+# Метрики запросов по имени маршрута (в памяти процесса, у каждого воркера свои)
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def _view(self, name):
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = {
+                "duration_ms": Histogram(DURATION_BUCKETS_MS),
+                "sql_ms": Histogram(DURATION_BUCKETS_MS),
+                "serializer_ms": Histogram(DURATION_BUCKETS_MS),
+                "queries": Histogram(QUERY_BUCKETS),
+                "response_bytes": Histogram(SIZE_BUCKETS),
+                "max_queries": 0,
+            }
+        return view
+
+    def observe(self, name, stats, duration_ms, response_bytes=None):
+        with self._lock:
+            view = self._view(name)
+            view["duration_ms"].observe(duration_ms)
+            view["sql_ms"].observe(stats.sql_ms)
+            view["serializer_ms"].observe(stats.serializer_ms)
+            view["queries"].observe(stats.query_count)
+            view["max_queries"] = max(view["max_queries"], stats.query_count)
+            if response_bytes is not None:
+                view["response_bytes"].observe(response_bytes)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    # Отчет по маршрутам, самые медленные (по p95) первыми
+    def report(self):
+        with self._lock:
+            rows = []
+            for name, view in self._views.items():
+                duration = view["duration_ms"]
+                rows.append({
+                    "view": name,
+                    "requests": duration.count,
+                    "mean_ms": round(duration.total / duration.count, 3) if duration.count else 0.0,
+                    "p50_ms": duration.quantile(50),
+                    "p95_ms": duration.quantile(95),
+                    "p99_ms": duration.quantile(99),
+                    "mean_sql_ms": round(view["sql_ms"].total / duration.count, 3) if duration.count else 0.0,
+                    "mean_serializer_ms": round(view["serializer_ms"].total / duration.count, 3) if duration.count else 0.0,
+                    "mean_queries": round(view["queries"].total / duration.count, 2) if duration.count else 0.0,
+                    "max_queries": view["max_queries"],
+                    "mean_response_bytes": round(view["response_bytes"].total / view["response_bytes"].count)
+                    if view["response_bytes"].count else None,
+                })
+        return sorted(rows, key=lambda row: (row["p95_ms"], row["mean_ms"]), reverse=True)
+
+    # Метрики в текстовом формате Prometheus
+    def render_prometheus(self, prefix="evoting"):
+        metrics = (
+            ("duration_ms", "request_duration_milliseconds", "Время обработки запроса"),
+            ("sql_ms", "request_sql_milliseconds", "Суммарное время SQL-запросов за запрос"),
+            ("serializer_ms", "request_serializer_milliseconds", "Время сериализации ответа"),
+            ("queries", "request_queries", "Количество SQL-запросов за запрос"),
+            ("response_bytes", "response_size_bytes", "Размер ответа"),
+        )
+        lines = []
+        with self._lock:
+            for key, metric, description in metrics:
+                name = f"{prefix}_{metric}"
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for view_name, view in sorted(self._views.items()):
+                    histogram = view[key]
+                    label = f'view="{_escape(view_name)}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+                    lines.append(f"{name}_sum{{{label}}} {round(histogram.total, 3)}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Отдельные значения в текстовом формате Prometheus: монотонные счетчики (имена из counters) - тип counter
+# с суффиксом _total, остальные - gauge
+def render_prometheus_values(prefix, values, counters=()):
+    lines = []
+    for key, value in values.items():
+        name, kind = (f"{prefix}_{key}_total", "counter") if key in counters else (f"{prefix}_{key}", "gauge")
+        lines += [f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,95 @@
+import logging
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from meeting.monitoring.metrics import collect_request_stats, get_config, request_metrics
+
+logger = logging.getLogger("meeting.monitoring")
+
+
+# Имя маршрута запроса (meeting-vote, admin-voting-results, meetings-list ...)
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.route or "unnamed"
+
+
+# Количество SQL-запросов, время SQL и сериализации, размер ответа по каждому маршруту.
+# Результаты отдаются в заголовке Server-Timing и накапливаются в гистограммах (MetricsView),
+# для медленных запросов в лог пишется полный список SQL-запросов.
+# Работает и в WSGI, и в ASGI: при асинхронной цепочке обертки SQL устанавливаются в потоке запроса,
+# в котором выполняются все его обращения к БД (sync_to_async), а не в потоке цикла событий
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        config = get_config()
+        if not config["ENABLED"]:
+            return self.get_response(request)
+
+        with collect_request_stats(self._max_queries(config)) as stats:
+            started = time.perf_counter()
+            with ExitStack() as stack:
+                self._wrap_connections(stack, stats)
+                response = self.get_response(request)
+            duration_ms = (time.perf_counter() - started) * 1000
+
+        return self._finish(request, response, stats, duration_ms, config)
+
+    async def __acall__(self, request):
+        config = get_config()
+        if not config["ENABLED"]:
+            return await self.get_response(request)
+
+        with collect_request_stats(self._max_queries(config)) as stats:
+            started = time.perf_counter()
+            stack = ExitStack()
+            await sync_to_async(self._wrap_connections)(stack, stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+            duration_ms = (time.perf_counter() - started) * 1000
+
+        return self._finish(request, response, stats, duration_ms, config)
+
+    def _max_queries(self, config):
+        return config["MAX_LOGGED_QUERIES"] if config["SLOW_REQUEST_MS"] is not None else 0
+
+    def _wrap_connections(self, stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+    def _finish(self, request, response, stats, duration_ms, config):
+        name = route_name(request)
+        response_bytes = None if response.streaming else len(response.content)
+        request_metrics.observe(name, stats, duration_ms, response_bytes)
+
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = ", ".join((
+                f'sql;dur={stats.sql_ms:.2f};desc="{stats.query_count} queries"',
+                f"serializer;dur={stats.serializer_ms:.2f}",
+                f"total;dur={duration_ms:.2f}",
+            ))
+
+        slow_ms = config["SLOW_REQUEST_MS"]
+        if slow_ms is not None and duration_ms >= slow_ms:
+            queries = "\n".join(f"  {elapsed} ms: {sql}" for elapsed, sql in stats.queries)
+            logger.warning(
+                "Медленный запрос %s %s (%s): %.1f ms, SQL: %d запросов за %.1f ms\n%s",
+                request.method, request.path, name, duration_ms, stats.query_count, stats.sql_ms, queries
+            )
+
+        return response
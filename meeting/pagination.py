@@ -0,0 +1,150 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Постраничный вывод по ключу (keyset): следующая страница выбирается условием по значениям полей сортировки
+# последней записи, а не смещением, поэтому скорость не зависит от номера страницы.
+# Записи с NULL в поле сортировки идут после остальных, последнее поле должно быть уникальным и не NULL
+class KeysetPagination(BasePagination):
+    ordering = ("-pk",)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Некорректный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            (field.lstrip("-"), field.startswith("-"), queryset.model._meta.get_field(field.lstrip("-")).null)
+            for field in self.ordering
+        ]
+
+        values, reverse = self.decode_cursor(request, queryset.model)
+        if values is not None:
+            queryset = queryset.filter(self._position_filter(values, reverse))
+
+        results = list(queryset.order_by(*self._order_by(reverse))[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Ссылки на соседние страницы
+        self.next_values = self._values(results[-1]) if results and (has_more or reverse) else None
+        self.previous_values = self._values(results[0]) if results and (values is not None) and (has_more or not reverse) else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.encode_cursor(self.next_values, reverse=False),
+            "previous": self.encode_cursor(self.previous_values, reverse=True),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query", "schema": {"type": "string"}},
+            {"name": self.page_size_query_param, "required": False, "in": "query", "schema": {"type": "integer"}},
+        ]
+
+    # Сортировка в порядке обхода (reverse - обратный обход для ссылки previous): NULL в прямом порядке последние
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending, nullable in self.fields:
+            nulls = ({"nulls_first": True} if reverse else {"nulls_last": True}) if nullable else {}
+            ordering.append(F(name).desc(**nulls) if descending != reverse else F(name).asc(**nulls))
+        return ordering
+
+    def _values(self, instance):
+        return [getattr(instance, name) for name, _, _ in self.fields]
+
+    # Условие "после позиции" в порядке обхода для сортировки (a, b): a > x OR (a = x AND b > y)
+    def _position_filter(self, values, reverse):
+        condition = Q()
+        for index, (name, descending, nullable) in enumerate(self.fields):
+            step = self._after(name, descending, nullable, values[index], reverse)
+            for (previous_name, _, _), value in zip(self.fields[:index], values):
+                step &= Q(**{f"{previous_name}__isnull": True}) if value is None else Q(**{previous_name: value})
+            condition |= step
+        return condition
+
+    # Значения поля после value в порядке обхода. Сравнение с NULL ложно, поэтому NULL проверяется отдельно:
+    # в прямом порядке NULL идут после любых значений, в обратном - перед ними
+    @staticmethod
+    def _after(name, descending, nullable, value, reverse):
+        if value is None:
+            return Q(**{f"{name}__isnull": False}) if reverse else Q(pk__in=[])
+
+        lookup = "lt" if descending != reverse else "gt"
+        step = Q(**{f"{name}__{lookup}": value})
+        if nullable and not reverse:
+            step |= Q(**{f"{name}__isnull": True})
+        return step
+
+    def encode_cursor(self, values, reverse):
+        if values is None:
+            return None
+        payload = {"v": [None if value is None else str(value) for value in values], "r": reverse}
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            raw_values = payload["v"]
+            if len(raw_values) != len(self.fields):
+                raise ValueError
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _, _), value in zip(self.fields, raw_values)
+            ]
+            return values, bool(payload.get("r"))
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+# Собрания: сначала ближайшие по дате, собрания без даты - в конце
+class MeetingPagination(KeysetPagination):
+    ordering = ("-meeting_date", "-meeting_id")
+
+
+# Черновики: сначала последние созданные
+class DraftPagination(KeysetPagination):
+    ordering = ("-meeting_id",)
+
+
+# Зарегистрированные счета собрания: по номеру счета
+class RegisteredAccountsPagination(KeysetPagination):
+    ordering = ("account_id", "id")
+    page_size = 100
+    max_page_size = 1000
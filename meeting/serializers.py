@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from django.db import transaction
+from .authentication import CachedBlacklistRefreshToken, add_user_claims, get_cached_user
+from .ballot.loader import meeting_tree_queryset
+from .monitoring.metrics import TimedSerializerMixin, TimedListSerializer
 from .models import Main, QuestionDetail, Agenda, Issuer, DjangoRelation, VoteCount, VotingResult
 from django.contrib.auth import get_user_model
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 
 User = get_user_model()
 
@@ -38,7 +42,7 @@ class AgendaSerializer(serializers.ModelSerializer):
         validated_data['details'] = details_data  
         return validated_data
 
-class MeetingCreateUpdateSerializer(serializers.ModelSerializer):
+class MeetingCreateUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     meeting_url = serializers.ReadOnlyField()
     agenda = AgendaSerializer(many=True)
     class Meta:
@@ -50,30 +54,36 @@ class MeetingCreateUpdateSerializer(serializers.ModelSerializer):
                 'early_registration', 'meeting_url', 'status', 'agenda'
             ]
     
+    # Собрание, вопросы и подвопросы создаются в одной транзакции пакетными вставками:
+    # число запросов не зависит от размера повестки, при ошибке ничего не сохраняется
     def create(self, validated_data):
         issuer = validated_data.get('issuer')
         meeting_name = validated_data.get('meeting_name')
         validated_data['meeting_name'] = issuer.full_name if not meeting_name else meeting_name
         agenda_data = validated_data.pop('agenda', [])
-        meeting = Main.objects.create(**validated_data)
 
-        for agenda_item in agenda_data:
-            details_data = agenda_item.pop('details', [])
+        with transaction.atomic():
+            meeting = Main.objects.create(**validated_data)
 
-            # Устанавливаем seat_count перед созданием Agenda
-            agenda_item['seat_count'] = len(details_data) 
+            # seat_count - количество подвопросов
+            questions = []
+            for agenda_item in agenda_data:
+                details_data = agenda_item.pop('details', [])
+                agenda_item['seat_count'] = len(details_data)
+                questions.append((Agenda(meeting=meeting, **agenda_item), details_data))
 
-            # Создание записи повестки дня
-            agenda = Agenda.objects.create(meeting=meeting, **agenda_item)
+            # Ключи вопросов возвращаются из bulk_create (RETURNING) и используются для подвопросов
+            Agenda.objects.bulk_create([agenda for agenda, _ in questions])
+            QuestionDetail.objects.bulk_create([
+                QuestionDetail(question_id=agenda, meeting_id=meeting, **detail)
+                for agenda, details_data in questions for detail in details_data
+            ])
 
-            # Создание подвопроса 
-            if details_data:
-                for detail in details_data:
-                    QuestionDetail.objects.create(question_id=agenda, meeting_id=meeting, **detail)
-        return meeting
+        # Созданное собрание с повесткой дня для ответа (три запроса)
+        return meeting_tree_queryset().get(pk=meeting.pk)
 
 
-class MeetingSerializer(serializers.ModelSerializer):
+class MeetingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     meeting_url = serializers.ReadOnlyField()
     agenda = AgendaSerializer(many=True)
     issuer = IssuerListSerializer()
@@ -98,16 +108,22 @@ class IssuerSerializer(serializers.ModelSerializer):
         model = Issuer
         fields = ['short_name']
     
-class MeetingListSerializer(serializers.ModelSerializer):
+class MeetingListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     issuer = IssuerSerializer()
     class Meta:
         model = Main
         fields = ['meeting_id', 'issuer', 'meeting_date', 'status', 'is_draft', 'first_or_repeated',
                   'annual_or_unscheduled', 'updated_at', 'created_by', 'sent_at']
+        list_serializer_class = TimedListSerializer
     
 # Добавление флага is_staff 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # Данные пользователя (is_staff и др.) записываются в токен при выдаче
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         
@@ -116,17 +132,36 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
     
 class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken  # Проверка по черному списку с кешем уже проверенных токенов
+
+    # Повторяет TokenRefreshSerializer.validate, но пользователь берется из кеша пользователей,
+    # а данные пользователя в новом access-токене и is_staff в ответе - текущие, а не из refresh-токена
+    # (права администратора, снятые после выдачи токена, не сохраняются до его истечения)
     def validate(self, attrs):
         try:
-            refresh = RefreshToken(attrs["refresh"])  # Декодируем токен
-            data = super().validate(attrs)  # Получаем новый access-токен
-            
-            # Получаем пользователя
-            user = User.objects.get(id=refresh["user_id"])
-            data["is_staff"] = user.is_staff  # Добавляем is_staff
+            refresh = self.token_class(attrs["refresh"])  # Проверяем токен
+
+            user = get_cached_user(refresh[api_settings.USER_ID_CLAIM])
+            if user is None:
+                raise User.DoesNotExist
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+            add_user_claims(refresh, user)
+            data = {"access": str(refresh.access_token)}  # Получаем новый access-токен
+
+            if api_settings.ROTATE_REFRESH_TOKENS:
+                if api_settings.BLACKLIST_AFTER_ROTATION:
+                    refresh.blacklist()
+                refresh.set_jti()
+                refresh.set_exp()
+                refresh.set_iat()
+                refresh.outstand()
+                data["refresh"] = str(refresh)
 
+            data["is_staff"] = user.is_staff  # Добавляем is_staff
             return data
         except TokenError as e:
             raise InvalidToken(str(e))
-        except User.DoesNotExist:
+        except (KeyError, User.DoesNotExist):
             raise InvalidToken("User not found")
\ No newline at end of file
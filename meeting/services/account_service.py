@@ -1,7 +1,44 @@
+from django.conf import settings
+from django.db.models import BooleanField, Exists, ExpressionWrapper, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from meeting.models import DjangoRelation, VoteCount, VotingResult
+from meeting.services.quantity_service import get_account_quantities, aget_account_quantities
 
 # Лицевые счета пользователя для голосования 
-def get_accounts(meeting, user):
+def get_accounts(meeting, user, bulk=None, context=None):
+      # Если счета уже загружены в AccountContext, запрос к БД не выполняется
+      if context is not None:
+            return context.account_list()
+
+      # По умолчанию используется один запрос с подзапросами (settings.ACCOUNTS_BULK_QUERY)
+      if bulk is None:
+            bulk = getattr(settings, "ACCOUNTS_BULK_QUERY", True)
+
+      if not bulk:
+            return get_accounts_per_row(meeting, user)
+
+      return list(accounts_queryset(meeting, user))
+
+# Запрос лицевых счетов пользователя с ФИО и признаком голосования
+def accounts_queryset(meeting, user):
+      account_fullname = VoteCount.objects.filter(
+            meeting=meeting, account_id=OuterRef("account_id")
+      ).values("account_fullname")[:1]
+
+      has_voted = VotingResult.objects.filter(
+            meeting_id=meeting,
+            account_id=OuterRef("account_id"),
+            user_id=user,
+            json_result__isnull=False
+      )
+
+      return DjangoRelation.objects.filter(user=user, meeting=meeting).annotate(
+            account_fullname=Coalesce(Subquery(account_fullname), Value("—")),
+            has_voted=Exists(has_voted)
+      ).values("account_id", "account_fullname", "has_voted")
+
+# Прежняя реализация (по два запроса на каждый счет), оставлена для сравнения производительности
+def get_accounts_per_row(meeting, user):
       # Находим связи пользователя с собранием
       relations = DjangoRelation.objects.filter(user=user, meeting=meeting)
 
@@ -31,17 +68,101 @@ def get_accounts(meeting, user):
       return accounts_info
 
 # Проверка зарагестрирован ли пользователь в собрании (по лицевому счету для досрочного голосования)
-def registered(meeting, user, account_id):
+def registered(meeting, user, account_id, context=None):
+      if context is not None:
+            return context.is_registered(account_id)
       is_registered = DjangoRelation.objects.filter(user=user, 
                                                     meeting=meeting, account_id = account_id, registered=True).exists()
       return is_registered
 
 # Проверка принадлежит ли лицевой счет пользователю
-def has_account(meeting, user, account_id):
+def has_account(meeting, user, account_id, context=None):
+    if context is not None:
+        return context.has_account(account_id)
     return DjangoRelation.objects.filter(
         meeting=meeting,
         user=user,
         account_id=account_id
     ).exists()
 
-      
\ No newline at end of file
+
+# Номер лицевого счета из запроса (пакетное голосование, регистрация): целое число или строка из цифр
+# (None - если номер некорректен)
+def parse_account_id(value):
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+# Счета пользователя в собрании для обработки одного запроса: связь, ФИО, регистрация и голосовал ли
+# загружаются одним запросом (с соединением VoteCount и VotingResult), количество голосов - вторым (quantities=True).
+# После загрузки get_accounts, registered и has_account отвечают по контексту без обращения к БД
+class AccountContext:
+    def __init__(self, meeting, user, accounts):
+        self.meeting = meeting
+        self.user = user
+        self.accounts = accounts  # {account_id: {account_id, account_fullname, registered, has_voted, voting_result_id}}
+
+    @classmethod
+    def load(cls, meeting, user, account_ids=None, quantities=False):
+        context = cls(meeting, user, {row["account_id"]: row for row in account_context_queryset(meeting, user, account_ids)})
+        if quantities:
+            context._set_quantities(get_account_quantities(meeting, list(context.accounts)) if context.accounts else {})
+        return context
+
+    # То же для асинхронных представлений
+    @classmethod
+    async def aload(cls, meeting, user, account_ids=None, quantities=False):
+        rows = account_context_queryset(meeting, user, account_ids)
+        context = cls(meeting, user, {row["account_id"]: row async for row in rows})
+        if quantities:
+            context._set_quantities(await aget_account_quantities(meeting, list(context.accounts)) if context.accounts else {})
+        return context
+
+    def _set_quantities(self, quantities):
+        for account_id, account in self.accounts.items():
+            account["quantities"] = quantities.get(account_id, {})
+
+    def get(self, account_id):
+        return self.accounts.get(account_id)
+
+    # Счета в формате get_accounts
+    def account_list(self):
+        return [
+            {"account_id": account["account_id"], "account_fullname": account["account_fullname"],
+             "has_voted": account["has_voted"]}
+            for account in self.accounts.values()
+        ]
+
+    def has_account(self, account_id):
+        return account_id in self.accounts
+
+    def is_registered(self, account_id):
+        account = self.accounts.get(account_id)
+        return bool(account and account["registered"])
+
+    # Зарегистрирован ли пользователь хотя бы по одному счету
+    def any_registered(self):
+        return any(account["registered"] for account in self.accounts.values())
+
+    def has_voted(self, account_id):
+        account = self.accounts.get(account_id)
+        return bool(account and account["has_voted"])
+
+    # Количество голосов счета {(вопрос, подвопрос): количество} (контекст загружается с quantities=True)
+    def quantities(self, account_id):
+        account = self.accounts.get(account_id)
+        return account.get("quantities", {}) if account else {}
+
+
+# Связи пользователя с собранием (все или по account_ids) с ФИО и признаком голосования
+def account_context_queryset(meeting, user, account_ids=None):
+    relations = DjangoRelation.objects.filter(meeting=meeting, user=user)
+    if account_ids is not None:
+        relations = relations.filter(account_id__in=account_ids)
+
+    return relations.annotate(
+        account_fullname=Coalesce(F("vote_count__account_fullname"), Value("—")),
+        has_voted=ExpressionWrapper(Q(voting_result__json_result__isnull=False), output_field=BooleanField())
+    ).order_by("account_id").values("account_id", "account_fullname", "registered", "has_voted", "voting_result_id")
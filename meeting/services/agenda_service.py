@@ -0,0 +1,109 @@
+from meeting.models import Agenda, QuestionDetail
+
+# Поля вопроса, которые можно изменить при редактировании черновика (seat_count считается по подвопросам)
+AGENDA_FIELDS = ("question", "decision", "single_vote_per_shareholder", "cumulative", "interest")
+
+
+# Изменения повестки дня черновика: новые, измененные и удаляемые вопросы и подвопросы.
+# Текущая повестка загружается двумя запросами, изменения вычисляются в памяти
+class AgendaDiff:
+    def __init__(self, meeting, agenda_data):
+        self.meeting = meeting
+        self.agenda_data = agenda_data
+
+        self.questions = {agenda.question_id: agenda for agenda in Agenda.objects.filter(meeting=meeting)}
+        self.details = {
+            detail.detail_id: detail for detail in QuestionDetail.objects.filter(meeting_id=meeting)
+        }
+
+        self.create_questions, self.update_questions = [], []
+        self.create_details, self.update_details = [], []  # Новые подвопросы - пары (вопрос, подвопрос)
+        self.keep_questions, self.keep_details = set(), set()
+        self._compute()
+
+    def _compute(self):
+        for item in self.agenda_data:
+            details_data = item.get("details") or []
+            fields = {name: item[name] for name in AGENDA_FIELDS if name in item}
+
+            # Вопрос обновляется, если он относится к этому собранию и еще не встречался в запросе, иначе создается
+            agenda = self.questions.get(item.get("question_id"))
+            if agenda is not None and agenda.question_id not in self.keep_questions:
+                self.keep_questions.add(agenda.question_id)
+                if self._assign(agenda, {**fields, "seat_count": len(details_data)}):
+                    self.update_questions.append(agenda)
+            else:
+                agenda = Agenda(meeting=self.meeting, seat_count=len(details_data), **fields)
+                self.create_questions.append(agenda)
+
+            for detail_item in details_data:
+                detail = self.details.get(detail_item.get("detail_id"))
+                if (agenda.question_id is not None and detail is not None
+                        and detail.question_id_id == agenda.question_id and detail.detail_id not in self.keep_details):
+                    self.keep_details.add(detail.detail_id)
+                    if self._assign(detail, {"detail_text": detail_item.get("detail_text", detail.detail_text)}):
+                        self.update_details.append(detail)
+                else:
+                    self.create_details.append(
+                        (agenda, QuestionDetail(meeting_id=self.meeting, detail_text=detail_item.get("detail_text")))
+                    )
+
+    # Присваивание значений полям, True - если что-то изменилось
+    @staticmethod
+    def _assign(instance, values):
+        changed = False
+        for name, value in values.items():
+            if getattr(instance, name) != value:
+                setattr(instance, name, value)
+                changed = True
+        return changed
+
+    @property
+    def delete_questions(self):
+        return set(self.questions) - self.keep_questions
+
+    # Удаляются подвопросы, которых нет в запросе (подвопросы удаляемых вопросов удаляются вместе с ними)
+    @property
+    def delete_details(self):
+        return {
+            detail_id for detail_id, detail in self.details.items()
+            if detail_id not in self.keep_details and detail.question_id_id in self.keep_questions
+        }
+
+    # Применение изменений: bulk_create, bulk_update и одно удаление на каждый уровень (вызывается в транзакции)
+    def apply(self):
+        delete_questions, delete_details = self.delete_questions, self.delete_details
+        if delete_details:
+            QuestionDetail.objects.filter(detail_id__in=delete_details).delete()
+        if delete_questions:
+            Agenda.objects.filter(meeting=self.meeting, question_id__in=delete_questions).delete()
+
+        # Ключи новых вопросов возвращаются из bulk_create и нужны для их подвопросов
+        Agenda.objects.bulk_create(self.create_questions)
+        Agenda.objects.bulk_update(self.update_questions, [*AGENDA_FIELDS, "seat_count"])
+
+        for agenda, detail in self.create_details:
+            detail.question_id = agenda
+        QuestionDetail.objects.bulk_create([detail for _, detail in self.create_details])
+        QuestionDetail.objects.bulk_update(self.update_details, ["detail_text"])
+
+        return self.summary()
+
+    def summary(self):
+        return {
+            "questions": {
+                "created": len(self.create_questions),
+                "updated": len(self.update_questions),
+                "deleted": len(self.delete_questions),
+            },
+            "details": {
+                "created": len(self.create_details),
+                "updated": len(self.update_details),
+                "deleted": len(self.delete_details),
+            },
+        }
+
+
+# Обновление повестки дня черновика по данным запроса (список вопросов с подвопросами)
+def update_agenda(meeting, agenda_data):
+    return AgendaDiff(meeting, agenda_data).apply()
@@ -0,0 +1,114 @@
+from decimal import Decimal
+from meeting.models import QUANTITY_DECIMAL_PLACES
+from meeting.services.voting_service import VOTE_TYPES, parse_quantity
+
+# Дробные количества хранятся целыми числами в единицах 10^-QUANTITY_DECIMAL_PLACES (фиксированная точка)
+SCALE = 10 ** QUANTITY_DECIMAL_PLACES
+
+
+# Количество голосов в единицах фиксированной точки (без потери точности)
+def to_fixed(value):
+    if type(value) is int:
+        return value * SCALE
+    return int(parse_quantity(value) * SCALE)
+
+
+# Подсчет итогов в заранее выделенных массивах: позиция (вопрос, подвопрос, вариант голоса) определяется
+# по бюллетеню собрания, поэтому на каждый голос приходится одно сложение по индексу вместо вложенных словарей.
+# Целые количества (обычный случай) складываются как есть, дробные - в фиксированной точке в отдельном массиве.
+# Номера вопросов строками и голоса по вопросам, которых нет в бюллетене, обрабатываются отдельно (_add_other)
+class DenseTally:
+    def __init__(self, ballot):
+        self.keys = []
+        self.positions = {}  # вопрос -> позиция или {подвопрос: позиция}
+        for question in ballot["agenda"]:
+            question_id = question["question_id"]
+            if question["details"]:
+                self.positions[question_id] = {}
+                for detail in question["details"]:
+                    self.positions[question_id][detail["detail_id"]] = len(self.keys)
+                    self.keys += [(question_id, detail["detail_id"], vote_type) for vote_type in VOTE_TYPES]
+            else:
+                self.positions[question_id] = len(self.keys)
+                self.keys += [(question_id, None, vote_type) for vote_type in VOTE_TYPES]
+
+        self.integers = [0] * len(self.keys)
+        self.fixed = [0] * len(self.keys)
+        self.seen = bytearray(len(self.keys))
+        self.extra = {}
+
+    # Добавление бюллетеня (json_result)
+    def add(self, json_result):
+        if not json_result:
+            return
+        positions, integers = self.positions, self.integers
+
+        for vote in json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+            vote_instr = vote.get("VoteInstr", {})
+            position = positions.get(vote_instr.get("QuestionId"))
+            if type(position) is dict:
+                position = position.get(vote_instr.get("DetailId"))
+            elif vote_instr.get("DetailId") is not None:
+                position = None
+            if position is None:
+                self._add_other(vote_instr)
+                continue
+
+            # Варианты голоса развернуты: это самый частый путь подсчета
+            if "For" in vote_instr:
+                quantity = vote_instr["For"]["Quantity"]
+                if type(quantity) is int and quantity > 0:
+                    integers[position] += quantity
+                else:
+                    self._add_fixed(position, quantity)
+            if "Against" in vote_instr:
+                quantity = vote_instr["Against"]["Quantity"]
+                if type(quantity) is int and quantity > 0:
+                    integers[position + 1] += quantity
+                else:
+                    self._add_fixed(position + 1, quantity)
+            if "Abstain" in vote_instr:
+                quantity = vote_instr["Abstain"]["Quantity"]
+                if type(quantity) is int and quantity > 0:
+                    integers[position + 2] += quantity
+                else:
+                    self._add_fixed(position + 2, quantity)
+
+    def add_many(self, json_results):
+        for json_result in json_results:
+            self.add(json_result)
+        return self
+
+    def _add_fixed(self, index, quantity):
+        self.fixed[index] += to_fixed(quantity)
+        self.seen[index] = 1
+
+    def _add_other(self, vote_instr):
+        question_id = int(vote_instr.get("QuestionId"))
+        detail_id = vote_instr.get("DetailId", None)
+        detail_id = int(detail_id) if detail_id is not None else None
+
+        position = self.positions.get(question_id)
+        if type(position) is dict:
+            position = position.get(detail_id)
+        elif detail_id is not None:
+            position = None
+
+        for offset, vote_type in enumerate(VOTE_TYPES):
+            if vote_type not in vote_instr:
+                continue
+            quantity = vote_instr[vote_type]["Quantity"]
+            if position is not None:
+                self._add_fixed(position + offset, quantity)
+            else:
+                key = (question_id, detail_id, vote_type)
+                self.extra[key] = self.extra.get(key, 0) + to_fixed(quantity)
+
+    # Суммы голосов {(вопрос, подвопрос, вариант голоса): количество} в том же виде, что summarize_vote_instructions
+    def result(self):
+        totals = {
+            key: self.integers[index] * SCALE + self.fixed[index]
+            for index, key in enumerate(self.keys) if self.integers[index] or self.seen[index]
+        }
+        totals.update(self.extra)
+        return {key: Decimal(f"{quantity}E-{QUANTITY_DECIMAL_PLACES}") for key, quantity in totals.items()}
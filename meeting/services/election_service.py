@@ -0,0 +1,127 @@
+from django.db.models import Max, OuterRef, Subquery
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from meeting.models import Main, VotingResult, VoteQuantity
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.services.voting_service import VOTE_TYPES, parse_quantity, quantity_to_json
+
+# Количество бюллетеней, получаемых из базы за одно обращение к курсору
+CHUNK_SIZE = 2000
+
+
+# Итоги одного кумулятивного вопроса (накапливаются по мере чтения бюллетеней)
+class CumulativeElection:
+    def __init__(self, question):
+        self.question_id = question["question_id"]
+        self.seat_count = question["seat_count"] or 0
+        self.candidates = {detail["detail_id"]: detail["detail_text"] for detail in question["details"]}
+        self.order = {detail_id: position for position, detail_id in enumerate(self.candidates)}
+        self.totals = {detail_id: dict.fromkeys(VOTE_TYPES, 0) for detail_id in self.candidates}
+        self.ballots = 0
+        self.invalid_ballots = 0
+
+    # Учет бюллетеня: голоса по кандидатам принимаются, только если всего распределено
+    # не больше количества голосов счета × число мест (иначе бюллетень по вопросу недействителен)
+    def add(self, votes, quantity):
+        if not votes:
+            return
+        self.ballots += 1
+
+        distributed = sum(sum(vote_types.values()) for vote_types in votes.values())
+        if (quantity is None or distributed > quantity * self.seat_count
+                or any(detail_id not in self.candidates for detail_id in votes)):
+            self.invalid_ballots += 1
+            return
+
+        for detail_id, vote_types in votes.items():
+            for vote_type, value in vote_types.items():
+                self.totals[detail_id][vote_type] += value
+
+    # Рейтинг кандидатов по голосам "За", при равенстве - по порядку в бюллетене.
+    # Если последнее место делят несколько кандидатов, это отмечается в tie_at_boundary
+    def result(self):
+        ranking = sorted(self.candidates, key=lambda detail_id: (-self.totals[detail_id]["For"], self.order[detail_id]))
+        elected = [detail_id for detail_id in ranking[:self.seat_count] if self.totals[detail_id]["For"] > 0]
+
+        tie_at_boundary = False
+        if 0 < self.seat_count < len(ranking):
+            last, first_out = ranking[self.seat_count - 1], ranking[self.seat_count]
+            tie_at_boundary = self.totals[last]["For"] == self.totals[first_out]["For"] > 0
+
+        return {
+            "QuestionId": self.question_id,
+            "seat_count": self.seat_count,
+            "ballots": self.ballots,
+            "invalid_ballots": self.invalid_ballots,
+            "candidates": [
+                {
+                    "DetailId": detail_id,
+                    "detail_text": self.candidates[detail_id],
+                    "rank": rank,
+                    "elected": detail_id in elected,
+                    **{vote_type: quantity_to_json(self.totals[detail_id][vote_type]) for vote_type in VOTE_TYPES}
+                }
+                for rank, detail_id in enumerate(ranking, 1)
+            ],
+            "elected": elected,
+            "tie_at_boundary": tie_at_boundary,
+        }
+
+
+# Голоса бюллетеня по подвопросам кумулятивных вопросов: {вопрос: {подвопрос: {вариант голоса: количество}}}
+def _cumulative_votes(json_result, question_ids):
+    votes = {}
+    if not json_result:
+        return votes
+    for vote in json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+        vote_instr = vote.get("VoteInstr", {})
+        question_id = int(vote_instr.get("QuestionId"))
+        if question_id not in question_ids:
+            continue
+        detail_id = vote_instr.get("DetailId")
+        detail_id = int(detail_id) if detail_id is not None else None
+        vote_types = votes.setdefault(question_id, {}).setdefault(detail_id, {})
+        for vote_type in VOTE_TYPES:
+            if vote_type in vote_instr:
+                vote_types[vote_type] = vote_types.get(vote_type, 0) + parse_quantity(vote_instr[vote_type]["Quantity"])
+    return votes
+
+
+# Итоги выборов по кумулятивным вопросам собрания за один проход по бюллетеням.
+# Количество голосов счета по каждому вопросу приходит вместе с бюллетенем (подзапрос к VoteQuantity),
+# в памяти хранятся только суммы по кандидатам
+def get_election_results(meeting_id):
+    meeting = get_object_or_404(Main, pk=meeting_id)
+    ballot = get_ballot_data(meeting_id)
+
+    elections = {
+        question["question_id"]: CumulativeElection(question)
+        for question in ballot["agenda"] if question["cumulative"] and question["details"]
+    }
+    if not elections:
+        return {"error": "В повестке дня нет вопросов с кумулятивным голосованием.", "status": status.HTTP_404_NOT_FOUND}
+
+    quantities = {
+        f"quantity_{question_id}": Subquery(
+            VoteQuantity.objects.filter(meeting=meeting, account_id=OuterRef("account_id"), question_id=question_id)
+            .values("account_id").annotate(quantity=Max("quantity")).values("quantity")[:1]
+        )
+        for question_id in elections
+    }
+    results = VotingResult.objects.filter(meeting_id=meeting, json_result__isnull=False).annotate(**quantities).values_list(
+        "json_result", *quantities
+    )
+
+    for json_result, *account_quantities in results.iterator(chunk_size=CHUNK_SIZE):
+        try:
+            votes = _cumulative_votes(json_result, elections)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+        for (question_id, election), quantity in zip(elections.items(), account_quantities):
+            election.add(votes.get(question_id), quantity)
+
+    return {
+        "data": ballot,
+        "ElectionResults": [election.result() for election in elections.values()],
+        "status": status.HTTP_200_OK
+    }
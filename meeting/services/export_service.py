@@ -0,0 +1,73 @@
+import csv
+from openpyxl import Workbook
+from django.db.models import OuterRef, Subquery
+from meeting.models import VoteCount, VotingResult
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.services.voting_service import VOTE_TYPES, iter_vote_instructions
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+EXPORT_COLUMNS = [
+    "account_id", "account_fullname", "username", "question_id", "question", "detail_id", "detail_text",
+    "For", "Against", "Abstain"
+]
+
+# Количество бюллетеней, получаемых из базы за одно обращение к курсору
+CHUNK_SIZE = 2000
+
+
+# Построчная выгрузка результатов голосования по счетам (одна строка на вопрос или подвопрос бюллетеня)
+def iter_result_rows(meeting):
+    ballot = get_ballot_data(meeting.meeting_id)
+    questions = {question["question_id"]: question["question"] for question in ballot["agenda"]}
+    details = {
+        detail["detail_id"]: detail["detail_text"]
+        for question in ballot["agenda"] for detail in question["details"]
+    }
+
+    account_fullname = VoteCount.objects.filter(
+        meeting=meeting, account_id=OuterRef("account_id")
+    ).values("account_fullname")[:1]
+
+    results = VotingResult.objects.filter(meeting_id=meeting, json_result__isnull=False).annotate(
+        account_fullname=Subquery(account_fullname)
+    ).order_by("account_id").values_list("account_id", "account_fullname", "user_id__username", "json_result")
+
+    # iterator() читает бюллетени частями через серверный курсор, память не зависит от размера собрания
+    for account_id, fullname, username, json_result in results.iterator(chunk_size=CHUNK_SIZE):
+        votes = {}
+        for question_id, detail_id, vote_type, quantity in iter_vote_instructions(json_result):
+            votes.setdefault((question_id, detail_id), {})[vote_type] = quantity
+
+        for (question_id, detail_id), quantities in votes.items():
+            yield [
+                account_id, fullname, username, question_id, questions.get(question_id, ""),
+                detail_id, details.get(detail_id, "") if detail_id is not None else "",
+                *(quantities.get(vote_type, 0) for vote_type in VOTE_TYPES)
+            ]
+
+
+# Буфер, возвращающий записанную строку (для потоковой записи CSV)
+class Echo:
+    def write(self, value):
+        return value
+
+
+# Потоковая выгрузка в CSV (с BOM для корректного открытия в Excel)
+def iter_csv(meeting):
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(EXPORT_COLUMNS)
+    for row in iter_result_rows(meeting):
+        yield writer.writerow(["" if value is None else value for value in row])
+
+
+# Выгрузка в XLSX во временный файл (openpyxl в режиме только записи)
+def write_xlsx(meeting, file):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Результаты")
+    sheet.append(EXPORT_COLUMNS)
+    for row in iter_result_rows(meeting):
+        sheet.append(row)
+    workbook.save(file)
+    file.seek(0)
+    return file
@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from meeting.models import VoteCount, VotingResult, DjangoRelation, VoteQuantity, RegisterImport
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.services.quantity_service import ballot_quantity_keys, vote_quantity_rows
+from meeting.services.voting_service import parse_quantity
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Сколько ошибок в строках реестра сохраняется в отчете
+MAX_REPORTED_ERRORS = 100
+
+REGISTER_FORMATS = ("csv", "jsonl")
+
+
+# Формат файла реестра по расширению
+def detect_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+# Построчное чтение реестра (CSV с заголовком или JSONL): account_id, account_fullname, quantity, user_id
+def read_register(file, file_format="csv"):
+    if file_format == "jsonl":
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(file)
+
+
+# Загрузка реестра акционеров в собрание: VoteCount и количество голосов по вопросам (VoteQuantity),
+# затем VotingResult и DjangoRelation для счетов с user_id.
+# Строки обрабатываются частями по chunk_size в отдельных транзакциях, существующие записи пропускаются,
+# поэтому прерванную загрузку можно продолжить с пропуском уже загруженных строк (skip)
+def import_register(meeting, rows, chunk_size=DEFAULT_CHUNK_SIZE, skip=0, on_chunk=None):
+    rows = iter(rows)
+    for _ in islice(rows, skip):
+        pass
+
+    report = {"rows": 0, "skipped": skip, "linked": 0, "errors": [], "error_count": 0}
+    quantity_keys = ballot_quantity_keys(get_ballot_data(meeting.meeting_id))
+    processed = skip
+    started = time.perf_counter()
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        with transaction.atomic():
+            _import_chunk(meeting, chunk, processed, report, quantity_keys)
+
+        processed += len(chunk)
+        report["rows"] += len(chunk)
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        report["rows_per_second"] = round(report["rows"] / report["seconds"], 1) if report["seconds"] else 0.0
+        if on_chunk:
+            on_chunk(processed, report)
+
+    return report
+
+
+def _add_error(report, line, message):
+    report["error_count"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": line, "error": message})
+
+
+def _import_chunk(meeting, chunk, offset, report, quantity_keys):
+    accounts = {}
+    for line, row in enumerate(chunk, offset + 1):
+        try:
+            account_id = int(row["account_id"])
+            quantity = parse_quantity(row["quantity"])
+            user_id = int(row["user_id"]) if row.get("user_id") not in (None, "") else None
+            account_fullname = str(row.get("account_fullname") or "").strip()
+        except (KeyError, TypeError, ValueError) as e:
+            _add_error(report, line, f"Некорректная строка реестра: {e}")
+            continue
+
+        # Первое вхождение счета в файле имеет приоритет
+        if account_id not in accounts:
+            accounts[account_id] = (line, account_fullname, quantity, user_id)
+
+    if not accounts:
+        return
+
+    VoteCount.objects.bulk_create([
+        VoteCount(meeting=meeting, account_id=account_id, account_fullname=account_fullname)
+        for account_id, (line, account_fullname, quantity, user_id) in accounts.items()
+    ], ignore_conflicts=True)
+
+    # Количество голосов по каждому вопросу (подвопросу) повестки дня
+    vote_counts = VoteCount.objects.filter(meeting=meeting, account_id__in=accounts).only("pk", "meeting_id", "account_id")
+    vote_count_ids = {}
+    quantity_rows = []
+    for vote_count in vote_counts:
+        vote_count_ids[vote_count.account_id] = vote_count.pk
+        quantity = accounts[vote_count.account_id][2]
+        quantity_rows += vote_quantity_rows(vote_count, {key: quantity for key in quantity_keys})
+    VoteQuantity.objects.bulk_create(quantity_rows, batch_size=DEFAULT_CHUNK_SIZE, ignore_conflicts=True)
+
+    # Связь счетов с пользователями
+    user_ids = {user_id for _, _, _, user_id in accounts.values() if user_id}
+    known_users = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    linked = {}
+    for account_id, (line, _, _, user_id) in accounts.items():
+        if user_id is None:
+            continue
+        if user_id not in known_users:
+            _add_error(report, line, f"Пользователь с id={user_id} не найден.")
+            continue
+        linked[account_id] = user_id
+
+    if not linked:
+        return
+
+    VotingResult.objects.bulk_create(
+        [VotingResult(meeting_id=meeting, account_id=account_id, user_id_id=user_id) for account_id, user_id in linked.items()],
+        ignore_conflicts=True
+    )
+
+    voting_result_ids = {
+        (account_id, user_id): voting_result_id
+        for account_id, user_id, voting_result_id in VotingResult.objects.filter(
+            meeting_id=meeting, account_id__in=linked
+        ).values_list("account_id", "user_id", "voting_result_id")
+    }
+
+    DjangoRelation.objects.bulk_create([
+        DjangoRelation(vote_count_id=vote_count_ids[account_id], voting_result_id=voting_result_ids[(account_id, user_id)],
+                       user_id=user_id, meeting=meeting, account_id=account_id)
+        for account_id, user_id in linked.items()
+    ], ignore_conflicts=True)
+    report["linked"] += len(linked)
+
+
+# Постановка загруженного файла реестра в очередь (файл сохраняется в MEDIA_ROOT/register_imports/).
+# Большой реестр загружается дольше таймаута запроса, поэтому загрузку выполняет команда process_register_imports
+def queue_register_import(meeting, upload):
+    return RegisterImport.objects.create(meeting=meeting, file=upload, file_format=detect_format(upload.name))
+
+
+# Следующая загрузка из очереди (None, если очередь пуста). Статус меняется условным UPDATE,
+# поэтому одну загрузку не возьмут несколько обработчиков
+def claim_register_import():
+    while True:
+        pk = RegisterImport.objects.filter(status=RegisterImport.PENDING).order_by("pk").values_list("pk", flat=True).first()
+        if pk is None:
+            return None
+        if RegisterImport.objects.filter(pk=pk, status=RegisterImport.PENDING).update(status=RegisterImport.RUNNING):
+            return RegisterImport.objects.get(pk=pk)
+
+
+# Выполнение загрузки из очереди. Номер загруженной строки сохраняется после каждой части,
+# после ошибки загрузка отмечается FAILED и при повторе продолжается с этой строки
+def run_register_import(register_import, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    def save_progress(processed, report):
+        register_import.rows_done = processed
+        register_import.report = report
+        register_import.save(update_fields=["rows_done", "report"])
+        if on_chunk:
+            on_chunk(processed, report)
+
+    try:
+        with register_import.file.open("rb") as raw:
+            file = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            report = import_register(register_import.meeting, read_register(file, register_import.file_format),
+                                     chunk_size=chunk_size, skip=register_import.rows_done, on_chunk=save_progress)
+    except Exception as e:
+        register_import.status = RegisterImport.FAILED
+        register_import.report = {**(register_import.report or {}), "error": f"{type(e).__name__}: {e}"}
+    else:
+        register_import.status = RegisterImport.DONE
+        register_import.report = report
+
+    register_import.finished_at = timezone.now()
+    register_import.save(update_fields=["status", "report", "finished_at"])
+    return register_import
@@ -0,0 +1,195 @@
+from collections import defaultdict
+from django.db import transaction
+from rest_framework import status
+from meeting.models import DjangoRelation, VotingResult
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.services.account_service import AccountContext, parse_account_id
+from meeting.services.voting_service import (
+    iter_vote_instructions, quantity_to_json, summarize_vote_instructions, add_totals_to_tally
+)
+
+# Максимальное количество бюллетеней в одном пакетном запросе
+MAX_BATCH_SIZE = 1000
+
+ALREADY_VOTED = "Вы уже проголосовали, повторное голосование невозможно."
+NOT_REGISTERED = "Вы не зарегистрированы на этом собрании."
+FOREIGN_ACCOUNT = "Вы не можете голосовать по данному лицевому счёту."
+INVALID_ACCOUNT = "Некорректный номер лицевого счета."
+INVALID_BALLOT = "Некорректные данные бюллетеня."
+
+
+class BallotValidationError(ValueError):
+    pass
+
+
+# Проверка бюллетеня по повестке дня и количеству голосов счета, возвращает бюллетень в нормализованном виде
+def validate_vote(ballot, quantities, vote_data):
+    try:
+        instructions = list(iter_vote_instructions(vote_data))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise BallotValidationError(INVALID_BALLOT)
+
+    if not instructions:
+        raise BallotValidationError("Нет данных для голосования.")
+
+    questions = {question["question_id"]: question for question in ballot["agenda"]}
+    used = defaultdict(int)
+    vote_instructions = {}
+
+    for question_id, detail_id, vote_type, quantity in instructions:
+        question = questions.get(question_id)
+        if question is None:
+            raise BallotValidationError(f"Вопрос {question_id} отсутствует в бюллетене.")
+
+        # Подвопрос должен относиться к вопросу, а для вопроса без подвопросов - отсутствовать
+        detail_ids = {detail["detail_id"] for detail in question["details"]}
+        if (detail_id not in detail_ids) if detail_ids else (detail_id is not None):
+            raise BallotValidationError(f"Подвопрос {detail_id} не относится к вопросу {question_id}.")
+
+        if quantity < 0:
+            raise BallotValidationError("Количество голосов не может быть отрицательным.")
+
+        vote_instr = vote_instructions.setdefault((question_id, detail_id), {"QuestionId": question_id})
+        if detail_id is not None:
+            vote_instr["DetailId"] = detail_id
+        if vote_type in vote_instr:
+            raise BallotValidationError(f"Повторный голос по вопросу {question_id}.")
+        vote_instr[vote_type] = {"Quantity": quantity_to_json(quantity)}
+        used[(question_id, detail_id)] += quantity
+
+    for question_id, question in questions.items():
+        question_used = {key: value for key, value in used.items() if key[0] == question_id}
+        if not question_used:
+            continue
+
+        if question["cumulative"]:
+            # Кумулятивное голосование: голоса распределяются между кандидатами, всего не больше количества × число мест
+            available = max(
+                (value for key, value in quantities.items() if key[0] == question_id), default=0
+            ) * question["seat_count"]
+            if sum(question_used.values()) > available:
+                raise BallotValidationError(f"Превышено количество голосов кумулятивного голосования по вопросу {question_id}.")
+        else:
+            for key, value in question_used.items():
+                if value > quantities.get(key, 0):
+                    raise BallotValidationError(f"Превышено количество голосов по вопросу {question_id}.")
+
+    return {"VoteDtls": {"VoteInstrForAgndRsltn": [{"VoteInstr": vote_instr} for vote_instr in vote_instructions.values()]}}
+
+
+# Данные счетов пользователя для голосования (регистрация, голосовал ли) и количество голосов по вопросам
+def get_voting_accounts(meeting, user, account_ids):
+    return AccountContext.load(meeting, user, account_ids, quantities=True).accounts
+
+
+# Проверка права голосовать по счету и бюллетеня, возвращает текст ошибки или нормализованный бюллетень
+def _check_vote(meeting, ballot, account, vote_data):
+    if account is None:
+        return FOREIGN_ACCOUNT, None
+    if not account["registered"] and not meeting.early_voting_allowed():
+        return NOT_REGISTERED, None
+    if account["has_voted"]:
+        return ALREADY_VOTED, None
+
+    try:
+        return None, validate_vote(ballot, account["quantities"], vote_data)
+    except BallotValidationError as e:
+        return str(e), None
+
+
+# Прием бюллетеня по одному лицевому счету (context - AccountContext, загруженный с quantities=True, если уже есть)
+def submit_vote(meeting, user, account_id, vote_data, context=None):
+    if context is None:
+        context = AccountContext.load(meeting, user, [account_id], quantities=True)
+    account = context.get(account_id)
+    error, json_result = _check_vote(meeting, get_ballot_data(meeting.meeting_id), account, vote_data)
+    if error:
+        forbidden = error in (FOREIGN_ACCOUNT, NOT_REGISTERED, ALREADY_VOTED)
+        return {"error": error, "status": status.HTTP_403_FORBIDDEN if forbidden else status.HTTP_400_BAD_REQUEST}
+
+    with transaction.atomic():
+        # Голос принимается только если по счету еще не голосовали (защита от повторной отправки)
+        accepted = VotingResult.objects.filter(
+            pk=account["voting_result_id"], json_result__isnull=True
+        ).update(json_result=json_result)
+
+        if accepted:
+            add_totals_to_tally(meeting, summarize_vote_instructions([json_result]))
+
+            # При досрочном голосовании счет считается зарегистрированным
+            if not account["registered"]:
+                DjangoRelation.objects.filter(meeting=meeting, user=user, account_id=account_id).update(registered=True)
+
+    if not accepted:
+        return {"error": ALREADY_VOTED, "status": status.HTTP_403_FORBIDDEN}
+
+    return {"message": "Ваш голос успешно сохранён.", "status": status.HTTP_201_CREATED}
+
+
+# Пакетный прием бюллетеней по нескольким лицевым счетам пользователя
+def submit_votes(meeting, user, votes):
+    if not isinstance(votes, list) or not votes:
+        return {"error": "Нет данных для голосования.", "status": status.HTTP_400_BAD_REQUEST}
+    if len(votes) > MAX_BATCH_SIZE:
+        return {"error": f"В одном запросе можно передать не более {MAX_BATCH_SIZE} бюллетеней.",
+                "status": status.HTTP_400_BAD_REQUEST}
+
+    rejected = []
+    checked = {}
+
+    # Номера счетов проверяются до обращения к БД, некорректные бюллетени отклоняются по отдельности
+    parsed = []
+    for vote in votes:
+        if not isinstance(vote, dict):
+            rejected.append({"account_id": None, "error": INVALID_BALLOT})
+            continue
+        account_id = parse_account_id(vote.get("account_id"))
+        if account_id is None:
+            rejected.append({"account_id": vote.get("account_id"), "error": INVALID_ACCOUNT})
+            continue
+        parsed.append((account_id, vote))
+
+    accounts = get_voting_accounts(meeting, user, [account_id for account_id, _ in parsed])
+    ballot = get_ballot_data(meeting.meeting_id)
+
+    for account_id, vote in parsed:
+        if account_id in checked:
+            rejected.append({"account_id": account_id, "error": "Повторный бюллетень по лицевому счету."})
+            continue
+
+        error, json_result = _check_vote(meeting, ballot, accounts.get(account_id), vote)
+        if error:
+            rejected.append({"account_id": account_id, "error": error})
+        else:
+            checked[account_id] = json_result
+
+    accepted = []
+    if checked:
+        with transaction.atomic():
+            voting_results = {accounts[account_id]["voting_result_id"]: account_id for account_id in checked}
+
+            # Блокируем строки счетов, по которым еще не голосовали
+            open_ids = list(VotingResult.objects.select_for_update().filter(
+                pk__in=voting_results, json_result__isnull=True
+            ).values_list("pk", flat=True))
+            accepted = [voting_results[pk] for pk in open_ids]
+
+            VotingResult.objects.bulk_update(
+                [VotingResult(pk=pk, json_result=checked[voting_results[pk]]) for pk in open_ids],
+                ["json_result"], batch_size=500
+            )
+            add_totals_to_tally(meeting, summarize_vote_instructions(checked[account_id] for account_id in accepted))
+
+            # При досрочном голосовании счета считаются зарегистрированными
+            unregistered = [account_id for account_id in accepted if not accounts[account_id]["registered"]]
+            if unregistered:
+                DjangoRelation.objects.filter(meeting=meeting, user=user, account_id__in=unregistered).update(registered=True)
+
+        accepted_ids = set(accepted)
+        rejected += [{"account_id": account_id, "error": ALREADY_VOTED} for account_id in checked if account_id not in accepted_ids]
+
+    return {
+        "accepted": sorted(accepted),
+        "rejected": rejected,
+        "status": status.HTTP_201_CREATED if accepted else status.HTTP_400_BAD_REQUEST
+    }
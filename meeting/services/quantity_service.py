@@ -0,0 +1,65 @@
+import json
+from collections import defaultdict
+from meeting.models import VoteQuantity
+from meeting.services.voting_service import NO_DETAIL, parse_vote_quantities, quantity_to_json
+
+
+# Ключи количества голосов по бюллетеню (вопрос, подвопрос) в порядке повестки дня, как в get_json_data
+def ballot_quantity_keys(ballot):
+    keys = []
+    for question in ballot["agenda"]:
+        if question["details"]:
+            keys += [(question["question_id"], detail["detail_id"]) for detail in question["details"]]
+        else:
+            keys.append((question["question_id"], None))
+    return keys
+
+
+# Строки VoteQuantity для счета по количеству голосов {(вопрос, подвопрос): количество}
+def vote_quantity_rows(vote_count, quantities):
+    return [
+        VoteQuantity(vote_count_id=vote_count.pk, meeting_id=vote_count.meeting_id, account_id=vote_count.account_id,
+                     question_id=question_id, detail_id=NO_DETAIL if detail_id is None else detail_id, quantity=quantity)
+        for (question_id, detail_id), quantity in quantities.items()
+    ]
+
+
+# Количество голосов счетов собрания: {account_id: {(вопрос, подвопрос): количество}}
+def get_account_quantities(meeting, account_ids):
+    return _group_quantities(_quantity_rows(meeting, account_ids))
+
+
+# То же для асинхронных представлений
+async def aget_account_quantities(meeting, account_ids):
+    return _group_quantities([row async for row in _quantity_rows(meeting, account_ids)])
+
+
+def _quantity_rows(meeting, account_ids):
+    return VoteQuantity.objects.filter(meeting=meeting, account_id__in=account_ids).order_by(
+        "account_id", "question_id", "detail_id"
+    ).values_list("account_id", "question_id", "detail_id", "quantity")
+
+
+def _group_quantities(rows):
+    quantities = defaultdict(dict)
+    for account_id, question_id, detail_id, quantity in rows:
+        quantities[account_id][(question_id, None if detail_id == NO_DETAIL else detail_id)] = quantity
+    return quantities
+
+
+# Количество голосов в прежнем формате VoteCount.json_quantity (строка, как ее формирует get_json_data)
+def format_json_quantity(quantities):
+    instructions = []
+    for (question_id, detail_id), quantity in quantities.items():
+        vote_instr = {"DetailId": detail_id} if detail_id is not None else {}
+        vote_instr.update({"Quantity": quantity_to_json(quantity), "QuestionId": question_id})
+        instructions.append({"VoteInstr": vote_instr})
+
+    result = {"VoteDtls": {"VoteInstrForAgndRsltn": instructions}}
+    return json.dumps(result, ensure_ascii=False, indent=4).replace("\n", " ")
+
+
+# Пересоздание строк VoteQuantity счета по его json_quantity (при ручном изменении счета)
+def sync_vote_quantities(vote_count):
+    VoteQuantity.objects.filter(vote_count=vote_count).delete()
+    VoteQuantity.objects.bulk_create(vote_quantity_rows(vote_count, parse_vote_quantities(vote_count.json_quantity)))
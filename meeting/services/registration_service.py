@@ -0,0 +1,121 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Exists, F, OuterRef, Q
+from rest_framework import status
+from meeting.models import DjangoRelation, VoteCount, VoteQuantity
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.services.account_service import parse_account_id
+from meeting.services.voting_service import parse_quantity, quantity_to_json
+
+# Максимальное количество лицевых счетов в одном запросе на регистрацию
+MAX_REGISTER_ACCOUNTS = 10000
+
+ALREADY_REGISTERED = "Вы уже зарегистрированы на это собрание."
+NOT_LINKED = "Вы не можете зарегистрироваться, так как не связаны с этим собранием."
+
+
+# Регистрация счетов пользователя одним UPDATE ... RETURNING: отмечаются только незарегистрированные счета,
+# возвращаются номера счетов, зарегистрированных этим запросом (account_ids=None - все счета пользователя)
+def register_accounts(meeting, user, account_ids=None):
+    sql = (f"UPDATE {DjangoRelation._meta.db_table} SET registered = %s "
+           f"WHERE meeting_id = %s AND user_id = %s AND registered = %s")
+    params = [True, meeting.pk, user.pk, False]
+
+    if account_ids is not None:
+        if connection.vendor == "postgresql":
+            sql += " AND account_id = ANY(%s)"
+            params.append(list(account_ids))
+        else:
+            sql += f" AND account_id IN ({', '.join(['%s'] * len(account_ids))})"
+            params += list(account_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql + " RETURNING account_id", params)
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+# Регистрация в собрании по всем или выбранным лицевым счетам.
+# Повторный запрос (в том числе параллельный двойной клик) не является ошибкой: счета уже зарегистрированы
+def register(meeting, user, account_ids=None):
+    if account_ids is not None:
+        # Номера счетов разбираются так же, как в пакетном голосовании (целые числа или строки из цифр)
+        parsed = [parse_account_id(account_id) for account_id in account_ids] if isinstance(account_ids, list) else []
+        if not parsed or None in parsed:
+            return {"error": "account_ids должен быть непустым списком номеров лицевых счетов.",
+                    "status": status.HTTP_400_BAD_REQUEST}
+        if len(parsed) > MAX_REGISTER_ACCOUNTS:
+            return {"error": f"В одном запросе можно зарегистрировать не более {MAX_REGISTER_ACCOUNTS} лицевых счетов.",
+                    "status": status.HTTP_400_BAD_REQUEST}
+        account_ids = sorted(set(parsed))
+
+    registered_accounts = register_accounts(meeting, user, account_ids)
+    if registered_accounts:
+        return {"message": "Вы успешно зарегистрированы на собрание.", "accounts": registered_accounts,
+                "status": status.HTTP_200_OK}
+
+    # Ничего не обновлено: либо счета уже зарегистрированы, либо пользователь не связан с собранием (по этим счетам)
+    relations = DjangoRelation.objects.filter(meeting=meeting, user=user)
+    if account_ids is not None:
+        relations = relations.filter(account_id__in=account_ids)
+    if not relations.exists():
+        return {"error": NOT_LINKED, "status": status.HTTP_400_BAD_REQUEST}
+
+    return {"message": ALREADY_REGISTERED, "accounts": [], "status": status.HTTP_200_OK}
+
+
+# Зарегистрированные счета собрания с ФИО (соединение со счетами VoteCount выполняется в БД)
+def registered_accounts_queryset(meeting):
+    return DjangoRelation.objects.filter(meeting=meeting, registered=True).annotate(
+        account_fullname=F("vote_count__account_fullname")
+    ).only("id", "account_id")
+
+
+# Кворум по вопросам повестки дня: голоса зарегистрированных счетов и всех счетов собрания, суммируются в БД по VoteQuantity.
+# Для кумулятивного вопроса количество голосов счета - количество по одному кандидату (без умножения на число мест)
+def get_quorum(meeting):
+    quantity_table = VoteQuantity._meta.db_table
+    relation_table = DjangoRelation._meta.db_table
+    sql = f"""
+        SELECT q.question_id, SUM(q.quantity), SUM(CASE WHEN r.account_id IS NOT NULL THEN q.quantity ELSE 0 END)
+        FROM (
+            SELECT question_id, account_id, MAX(quantity) AS quantity
+            FROM {quantity_table}
+            WHERE meeting_id = %s
+            GROUP BY question_id, account_id
+        ) q
+        LEFT JOIN (
+            SELECT DISTINCT account_id FROM {relation_table} WHERE meeting_id = %s AND registered = %s
+        ) r ON r.account_id = q.account_id
+        GROUP BY q.question_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [meeting.pk, meeting.pk, True])
+        sums = {
+            question_id: (parse_quantity(total or 0), parse_quantity(registered or 0))
+            for question_id, total, registered in cursor.fetchall()
+        }
+
+    registered = DjangoRelation.objects.filter(vote_count=OuterRef("pk"), registered=True)
+    accounts = VoteCount.objects.filter(meeting=meeting).alias(is_registered=Exists(registered)).aggregate(
+        total=Count("pk"), registered=Count("pk", filter=Q(is_registered=True))
+    )
+
+    # Доля голосов зарегистрированных лиц, которую нужно превысить для кворума (сравнивается точно, в Decimal;
+    # в настройках допускается и строка или число с плавающей точкой)
+    quorum_share = Decimal(str(getattr(settings, "QUORUM_SHARE", Decimal("0.5"))))
+
+    questions = []
+    for question in get_ballot_data(meeting.meeting_id)["agenda"]:
+        question_id = question["question_id"]
+        total, registered_quantity = sums.get(question_id, (0, 0))
+        share = registered_quantity / total if total else Decimal(0)
+        questions.append({
+            "QuestionId": question_id,
+            "total_quantity": quantity_to_json(total),
+            "registered_quantity": quantity_to_json(registered_quantity),
+            "registered_share": round(float(share), 6),
+            "has_quorum": share > quorum_share,
+        })
+
+    return {"accounts": accounts, "questions": questions}
@@ -0,0 +1,51 @@
+import time
+from django.db import connection, transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+# Размер таблиц черного списка: количество строк и, для PostgreSQL, размер на диске вместе с индексами (байт)
+def get_token_table_sizes():
+    sizes = {}
+    for model in (OutstandingToken, BlacklistedToken):
+        table = model._meta.db_table
+        size = {"rows": model.objects.count()}
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+                size["bytes"] = cursor.fetchone()[0]
+        sizes[table] = size
+    return sizes
+
+
+# Удаление просроченных токенов (выданных и внесенных в черный список) пачками по batch_size.
+# Каждая пачка удаляется в своей транзакции: блокировки держатся только на время одной пачки,
+# между пачками можно сделать паузу (pause, секунды), чтобы не нагружать БД во время голосования
+def purge_expired_tokens(batch_size=DEFAULT_BATCH_SIZE, before=None, pause=0, limit=None):
+    before = before or aware_utcnow()
+    expired = OutstandingToken.objects.filter(expires_at__lte=before).order_by("id")
+
+    result = {"outstanding": 0, "blacklisted": 0, "batches": 0}
+    started = time.perf_counter()
+    last_id = 0
+    while limit is None or result["outstanding"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - result["outstanding"])
+        ids = list(expired.filter(id__gt=last_id).values_list("id", flat=True)[:size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            result["blacklisted"] += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            result["outstanding"] += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        result["batches"] += 1
+        last_id = ids[-1]
+
+        if pause:
+            time.sleep(pause)
+
+    elapsed = time.perf_counter() - started
+    result["seconds"] = round(elapsed, 3)
+    result["rows_per_second"] = round((result["outstanding"] + result["blacklisted"]) / elapsed, 1) if elapsed else None
+    return result
@@ -1,9 +1,251 @@
+import json
 from collections import defaultdict
-from meeting.models import VotingResult, Main
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from meeting.models import VotingResult, VoteTally, Main, QUANTITY_MAX_DIGITS, QUANTITY_DECIMAL_PLACES
 from meeting.ballot.get_ballot import get_ballot_data
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 
+VOTE_TYPES = ("For", "Against", "Abstain")
+
+# Значение detail_id в таблице итогов для вопросов без подвопросов
+NO_DETAIL = 0
+
+# Способы подсчета итогов (settings.VOTE_TALLY_ENGINE)
+TALLY_ENGINES = ("table", "python", "dense", "postgres")
+
+
+# Количество голосов из бюллетеня или реестра: точное десятичное число (дробные акции)
+# не более чем с QUANTITY_DECIMAL_PLACES знаками после запятой
+def parse_quantity(value):
+    if isinstance(value, bool):
+        raise ValueError("Некорректное количество голосов.")
+    try:
+        quantity = Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+        valid = quantity.is_finite() and quantity.adjusted() < QUANTITY_MAX_DIGITS - QUANTITY_DECIMAL_PLACES
+        exact = valid and (quantity.as_tuple().exponent >= -QUANTITY_DECIMAL_PLACES
+                           or quantity == quantity.quantize(Decimal(1).scaleb(-QUANTITY_DECIMAL_PLACES)))
+    except InvalidOperation:
+        valid = exact = False
+
+    if not valid:
+        raise ValueError(f"Некорректное количество голосов: {value!r}")
+    if not exact:
+        raise ValueError(f"Количество голосов указано точнее {QUANTITY_DECIMAL_PLACES} знаков после запятой: {value}")
+    return quantity
+
+
+# Количество голосов для ответа API: целое число, если дробной части нет, иначе строка (без потери точности)
+def quantity_to_json(quantity):
+    if isinstance(quantity, int):
+        return quantity
+    if quantity == quantity.to_integral_value():
+        return int(quantity)
+    return format(quantity.normalize(), "f")
+
+
+# Разбор бюллетеня на голоса (вопрос, подвопрос, вариант голоса, количество)
+def iter_vote_instructions(json_result):
+    if not json_result:  # Если json_result = None, голосов нет
+        return
+
+    vote_details = json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", [])
+    for vote in vote_details:
+        vote_instr = vote.get("VoteInstr", {})
+        question_id = int(vote_instr.get("QuestionId"))
+        detail_id = vote_instr.get("DetailId", None)  # Может отсутствовать
+        detail_id = int(detail_id) if detail_id is not None else None
+
+        # Определение типа голоса (For, Against, Abstain)
+        for vote_type in VOTE_TYPES:
+            if vote_type in vote_instr:
+                yield question_id, detail_id, vote_type, parse_quantity(vote_instr[vote_type]["Quantity"])
+
+
+# Количество голосов по лицевому счету из VoteCount.json_quantity: {(вопрос, подвопрос): количество}
+def parse_vote_quantities(json_quantity):
+    if not json_quantity:
+        return {}
+    if isinstance(json_quantity, str):
+        json_quantity = json.loads(json_quantity)
+
+    quantities = {}
+    for vote in json_quantity.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", []):
+        vote_instr = vote.get("VoteInstr", {})
+        detail_id = vote_instr.get("DetailId", None)
+        key = (int(vote_instr.get("QuestionId")), int(detail_id) if detail_id is not None else None)
+        quantities[key] = parse_quantity(vote_instr["Quantity"])
+    return quantities
+
+
+# Суммирование голосов по набору бюллетеней: {(вопрос, подвопрос, вариант голоса): количество}
+def summarize_vote_instructions(json_results):
+    totals = defaultdict(int)
+    for json_result in json_results:
+        for question_id, detail_id, vote_type, quantity in iter_vote_instructions(json_result):
+            totals[(question_id, detail_id, vote_type)] += quantity
+    return totals
+
+
+# Формирование ответа из сумм голосов
+def format_summary(totals):
+    summary_results = defaultdict(lambda: defaultdict(dict))
+    for (question_id, detail_id, vote_type), quantity in totals.items():
+        summary_results[question_id][detail_id][vote_type] = quantity
+
+    response_data = []
+    for question_id in sorted(summary_results):
+        details = summary_results[question_id]
+        question_data = {"QuestionId": question_id, "results": []}
+        for detail_id in sorted(details, key=lambda d: (d is not None, d)):
+            votes = details[detail_id]
+            question_data["results"].append({
+                "DetailId": detail_id,
+                "For": quantity_to_json(votes.get("For", 0)),
+                "Against": quantity_to_json(votes.get("Against", 0)),
+                "Abstain": quantity_to_json(votes.get("Abstain", 0))
+            })
+        response_data.append(question_data)
+    return response_data
+
+
+def _tally_rows(meeting, totals):
+    return [
+        VoteTally(meeting=meeting, question_id=question_id,
+                  detail_id=NO_DETAIL if detail_id is None else detail_id,
+                  vote_type=vote_type, quantity=quantity)
+        for (question_id, detail_id, vote_type), quantity in totals.items()
+    ]
+
+
+# Добавление принятого бюллетеня к итогам (вызывается в транзакции сохранения голоса)
+def add_vote_to_tally(meeting, json_result):
+    add_totals_to_tally(meeting, summarize_vote_instructions([json_result]))
+
+
+# Блокировка итогов собрания до конца транзакции: прием голосов и пересчет итогов выполняются по очереди.
+# Блокируется строка собрания (FOR NO KEY UPDATE не мешает вставке строк, ссылающихся на собрание)
+def lock_meeting_tally(meeting):
+    list(Main.objects.select_for_update(no_key=True).filter(pk=meeting.pk).values_list("pk", flat=True))
+
+
+# Добавление сумм голосов к итогам собрания (вызывается в транзакции, в которой сохранены бюллетени)
+def add_totals_to_tally(meeting, totals):
+    if not totals:
+        return
+
+    # Пересчет итогов, начатый раньше, завершается до добавления голоса: бюллетень этой транзакции
+    # в пересчет не попал и добавляется к уже пересчитанным строкам
+    lock_meeting_tally(meeting)
+    rows = _tally_rows(meeting, totals)
+
+    # Создаем недостающие строки итогов с нулевым количеством
+    VoteTally.objects.bulk_create(
+        [VoteTally(meeting=meeting, question_id=row.question_id, detail_id=row.detail_id, vote_type=row.vote_type)
+         for row in rows],
+        ignore_conflicts=True
+    )
+
+    # Увеличиваем все затронутые строки одним UPDATE
+    keys = [Q(question_id=row.question_id, detail_id=row.detail_id, vote_type=row.vote_type) for row in rows]
+    increment = Case(
+        *[When(key, then=Value(row.quantity)) for key, row in zip(keys, rows)],
+        default=Value(0),
+        output_field=DecimalField(max_digits=QUANTITY_MAX_DIGITS, decimal_places=QUANTITY_DECIMAL_PLACES)
+    )
+    VoteTally.objects.filter(reduce(or_, keys), meeting=meeting).update(quantity=F("quantity") + increment)
+
+
+# Пересчет итогов собрания по сохраненным бюллетеням
+def rebuild_vote_tally(meeting):
+    with transaction.atomic():
+        # Голоса, принимаемые во время пересчета, ждут его завершения в add_totals_to_tally.
+        # Бюллетени читаются после получения блокировки: голоса, принятые до нее, уже зафиксированы
+        lock_meeting_tally(meeting)
+
+        totals = _dense_totals(meeting)
+
+        VoteTally.objects.filter(meeting=meeting).delete()
+        VoteTally.objects.bulk_create(_tally_rows(meeting, totals))
+
+    return len(totals)
+
+
+# Итоги из таблицы VoteTally (обновляется при каждом принятом бюллетене)
+def _table_totals(meeting):
+    tallies = VoteTally.objects.filter(meeting=meeting).values_list(
+        "question_id", "detail_id", "vote_type", "quantity"
+    )
+    return {
+        (question_id, None if detail_id == NO_DETAIL else detail_id, vote_type): quantity
+        for question_id, detail_id, vote_type, quantity in tallies
+    }
+
+
+# Подсчет по всем бюллетеням собрания в Python
+def _python_totals(meeting):
+    json_results = VotingResult.objects.filter(
+        meeting_id=meeting, json_result__isnull=False
+    ).values_list("json_result", flat=True).iterator(chunk_size=2000)
+    return summarize_vote_instructions(json_results)
+
+
+# Подсчет по всем бюллетеням собрания в массиве фиксированной точки (DenseTally)
+def _dense_totals(meeting):
+    from meeting.services.dense_tally import DenseTally
+
+    json_results = VotingResult.objects.filter(
+        meeting_id=meeting, json_result__isnull=False
+    ).values_list("json_result", flat=True).iterator(chunk_size=2000)
+    return DenseTally(get_ballot_data(meeting.meeting_id)).add_many(json_results).result()
+
+
+# Подсчет в PostgreSQL одним запросом: голоса бюллетеней разворачиваются jsonb_array_elements и суммируются в БД,
+# поэтому бюллетени не передаются в приложение
+def _postgres_totals(meeting):
+    sums = ", ".join(
+        f"SUM((vote_instr -> '{vote_type}' ->> 'Quantity')::numeric)" for vote_type in VOTE_TYPES
+    )
+    sql = f"""
+        SELECT (vote_instr ->> 'QuestionId')::integer, (vote_instr ->> 'DetailId')::integer, {sums}
+        FROM {VotingResult._meta.db_table} AS result
+        CROSS JOIN LATERAL jsonb_array_elements(result.json_result -> 'VoteDtls' -> 'VoteInstrForAgndRsltn') AS vote(value)
+        CROSS JOIN LATERAL (SELECT vote.value -> 'VoteInstr' AS vote_instr) AS instruction
+        WHERE result.meeting_id_id = %s AND result.json_result IS NOT NULL
+          AND jsonb_typeof(result.json_result -> 'VoteDtls' -> 'VoteInstrForAgndRsltn') = 'array'
+        GROUP BY 1, 2
+    """
+    totals = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [meeting.pk])
+        for question_id, detail_id, *quantities in cursor.fetchall():
+            for vote_type, quantity in zip(VOTE_TYPES, quantities):
+                if quantity is not None:
+                    totals[(question_id, detail_id, vote_type)] = parse_quantity(quantity)
+    return totals
+
+
+# Суммы голосов собрания выбранным способом (по умолчанию settings.VOTE_TALLY_ENGINE).
+# Способ "postgres" доступен только в PostgreSQL, в остальных БД подсчет выполняется в Python
+def get_vote_totals(meeting, engine=None):
+    engine = engine or getattr(settings, "VOTE_TALLY_ENGINE", "table")
+    if engine not in TALLY_ENGINES:
+        raise ValueError(f"Неизвестный способ подсчета итогов: {engine}")
+
+    if engine == "postgres":
+        return _postgres_totals(meeting) if connection.vendor == "postgresql" else _python_totals(meeting)
+    if engine == "python":
+        return _python_totals(meeting)
+    if engine == "dense":
+        return _dense_totals(meeting)
+    return _table_totals(meeting)
+
+
 # Получение суммарных результатов голосования по собранию
 def get_summarized_voting_results(meeting_id):
     meeting = get_object_or_404(Main, pk=meeting_id)
@@ -17,43 +259,8 @@ def get_summarized_voting_results(meeting_id):
             "status": status.HTTP_404_NOT_FOUND
         }
 
-    # Словарь для суммирования голосов
-    summary_results = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-
-    # Обрабатываем каждый результат голосования
-    for result in results:
-        if not result.json_result:  # Если json_result = None, пропускаем запись
-            continue
-
-        vote_details = result.json_result.get("VoteDtls", {}).get("VoteInstrForAgndRsltn", [])
-        for vote in vote_details:
-            vote_instr = vote.get("VoteInstr", {})
-            question_id = vote_instr.get("QuestionId")
-            detail_id = vote_instr.get("DetailId", None)  # Может отсутствовать
-            
-            # Определение типа голоса (For, Against, Abstain)
-            for vote_type in ["For", "Against", "Abstain"]:
-                if vote_type in vote_instr:
-                    quantity = int(vote_instr[vote_type]["Quantity"])
-                    summary_results[question_id][detail_id][vote_type] += quantity
-
-    # Формирование ответа
-    response_data = []
-    for question_id, details in summary_results.items():
-        question_data = {"QuestionId": question_id, "results": []}
-        for detail_id, votes in details.items():
-            question_data["results"].append({
-                "DetailId": detail_id,
-                "For": votes.get("For", 0),
-                "Against": votes.get("Against", 0),
-                "Abstain": votes.get("Abstain", 0)
-            })
-        response_data.append(question_data)
-
     return {
         "data": ballot,
-        "SummarizedVoteResults": response_data,
+        "SummarizedVoteResults": format_summary(get_vote_totals(meeting)),
         "status": status.HTTP_200_OK
     }
-
-
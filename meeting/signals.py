@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from meeting.authentication import blacklist_cache, user_cache
+from meeting.ballot.cache import ballot_cache
+from meeting.models import Main, Agenda, QuestionDetail
+
+
+def invalidate_ballot(meeting_id):
+    if meeting_id is not None:
+        # Сброс после фиксации транзакции, чтобы кеш не заполнился старыми данными
+        transaction.on_commit(lambda: ballot_cache.invalidate(meeting_id))
+
+
+# Изменение собрания, вопросов или подвопросов (в том числе через админку) сбрасывает кеш бюллетеня
+@receiver([post_save, post_delete], sender=Main)
+def invalidate_meeting_ballot(sender, instance, **kwargs):
+    invalidate_ballot(instance.meeting_id)
+
+
+@receiver([post_save, post_delete], sender=Agenda)
+def invalidate_agenda_ballot(sender, instance, **kwargs):
+    invalidate_ballot(instance.meeting_id)
+
+
+@receiver([post_save, post_delete], sender=QuestionDetail)
+def invalidate_detail_ballot(sender, instance, **kwargs):
+    invalidate_ballot(instance.meeting_id_id)
+
+
+# Изменение или удаление пользователя сбрасывает его запись в кеше аутентификации
+# (сразу и после фиксации транзакции, чтобы параллельный запрос не сохранил в кеш старые данные)
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+# Внесение токена в черный список (в том числе через админку) снимает отметку о проверке токена
+@receiver(post_save, sender=BlacklistedToken)
+def invalidate_blacklisted_token(sender, instance, **kwargs):
+    jti = instance.token.jti
+    blacklist_cache.invalidate(jti)
+    transaction.on_commit(lambda: blacklist_cache.invalidate(jti))
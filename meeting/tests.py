@@ -1,3 +1,1365 @@
-from django.test import TestCase
+import copy
+import csv
+import io
+import json
+import random
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import skipUnless
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from meeting.authentication import UserCache, get_blacklist_cache, get_user_cache, user_cache
+from meeting.ballot.cache import BallotCache, ballot_cache
+from meeting.benchmarks.fixtures import create_voting_fixture, make_vote
+from meeting.benchmarks.lifecycle import STAGES, create_lifecycle_fixture, run_lifecycle
+from meeting.management.commands.bench_indexes import HOT_INDEXES, hot_queries
+from meeting.ballot.get_ballot import get_ballot_data
+from meeting.ballot.get_json_data import get_json_data
+from meeting.ballot.loader import load_meeting_tree
+from meeting.monitoring.metrics import request_metrics
+from meeting.models import (
+    Main, Agenda, QuestionDetail, Issuer, DjangoRelation, VoteCount, VoteQuantity, VoteTally, VotingResult, RegisterImport
+)
+from meeting.services.export_service import EXPORT_COLUMNS
+from meeting.services.import_service import (
+    claim_register_import, import_register, queue_register_import, run_register_import
+)
+from meeting.services.ingestion_service import (
+    ALREADY_VOTED, FOREIGN_ACCOUNT, INVALID_ACCOUNT, INVALID_BALLOT, NOT_REGISTERED, BallotValidationError, submit_vote,
+    submit_votes, validate_vote
+)
+from meeting.services.account_service import AccountContext, get_accounts, has_account, registered
+from meeting.services.quantity_service import get_account_quantities
+from meeting.services.token_service import purge_expired_tokens
+from meeting.services import voting_service
+from meeting.services.dense_tally import DenseTally
+from meeting.services.voting_service import (
+    TALLY_ENGINES, VOTE_TYPES, format_summary, get_vote_totals, parse_quantity, quantity_to_json, rebuild_vote_tally,
+    summarize_vote_instructions
+)
+from meeting.serializers import MeetingCreateUpdateSerializer, MeetingSerializer
 
-# Create your tests here.
+User = get_user_model()
+
+
+# Собрание с повесткой дня из questions вопросов по details подвопросов в каждом
+def create_meeting(questions=1, details=0, **fields):
+    issuer = Issuer.objects.create(full_name="ПАО Эмитент", short_name="Эмитент", address="Адрес", zip=625000, ogrn="1")
+    meeting = Main.objects.create(issuer=issuer, annual_or_unscheduled=True, inter_or_extra_mural=False, **fields)
+    for number in range(questions):
+        agenda = Agenda.objects.create(meeting=meeting, question=f"Вопрос {number}", decision="Решение",
+                                       cumulative=bool(details), seat_count=details)
+        for detail in range(details):
+            QuestionDetail.objects.create(question_id=agenda, meeting_id=meeting, detail_text=f"Кандидат {detail}")
+    return meeting
+
+
+class EvotingTestCase(TestCase):
+    """Общая подготовка тестов: пустые кеши бюллетеней и пользователей, клиент API"""
+
+    def setUp(self):
+        ballot_cache.clear()
+        user_cache.clear()
+        self.client = APIClient()
+
+    # Общий для процессов кеш "shared" (файловый, как Redis для воркеров одного сервера) и настройки,
+    # которые его используют, например BALLOT_CACHE={"BACKEND": "shared"}
+    def shared_cache(self, **overrides):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        shared = self.settings(
+            CACHES={**settings.CACHES, "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                                  "LOCATION": cache_dir}},
+            **overrides
+        )
+        shared.enable()
+        self.addCleanup(shared.disable)
+
+    # Запросы клиента от имени пользователя (по умолчанию - нового администратора)
+    def login(self, user=None):
+        if user is None:
+            user = User.objects.create_user("admin", password="admin", is_staff=True)
+        self.client.force_authenticate(user)
+        return user
+
+
+class BallotQueryCountTest(EvotingTestCase):
+    """Количество запросов при сборке бюллетеня не зависит от размера повестки дня"""
+
+    def test_ballot_queries_do_not_grow_with_agenda(self):
+        for questions in (1, 10):
+            meeting = create_meeting(questions=questions, details=30)
+            with self.assertNumQueries(3):
+                ballot = get_ballot_data(meeting.meeting_id)
+            self.assertEqual(len(ballot["agenda"]), questions)
+            self.assertEqual(len(ballot["agenda"][-1]["details"]), 30)
+
+    def test_meeting_serializer_queries_do_not_grow_with_agenda(self):
+        for questions in (1, 10):
+            meeting = create_meeting(questions=questions, details=5)
+            with self.assertNumQueries(3):
+                data = MeetingSerializer(load_meeting_tree(meeting.meeting_id)).data
+            self.assertEqual(len(data["agenda"]), questions)
+
+    def test_retrieve_queries_do_not_grow_with_agenda(self):
+        self.login()
+        counts = []
+        for questions in (1, 10):
+            meeting = create_meeting(questions=questions, details=5, is_draft=False)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(f"/api/meetings/{meeting.meeting_id}/")
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class BallotCacheTest(EvotingTestCase):
+    """Кеш бюллетеней: сброс виден всем процессам через версию в общем кеше, без него - по LOCAL_TIMEOUT"""
+
+    def setUp(self):
+        super().setUp()
+        self.meeting = create_meeting(questions=1, is_draft=False)
+
+    def test_invalidation_reaches_other_workers(self):
+        self.shared_cache(BALLOT_CACHE={"BACKEND": "shared"})
+        meeting_id = self.meeting.meeting_id
+        worker, other = BallotCache(), BallotCache()
+
+        worker.set(meeting_id, {"meeting_name": "Старое"}, worker.version(meeting_id))
+        self.assertEqual(other.get(meeting_id), {"meeting_name": "Старое"})
+        self.assertEqual(other.get(meeting_id), {"meeting_name": "Старое"})
+        self.assertEqual((other.stats()["shared_hits"], other.stats()["hits"]), (1, 1))
+
+        # Сброс в одном процессе делает недействительной запись в памяти другого
+        worker.invalidate(meeting_id)
+        self.assertIsNone(other.get(meeting_id))
+        other.set(meeting_id, {"meeting_name": "Новое"}, other.version(meeting_id))
+        self.assertEqual(worker.get(meeting_id), {"meeting_name": "Новое"})
+
+    def test_stale_ballot_is_not_stored(self):
+        self.shared_cache(BALLOT_CACHE={"BACKEND": "shared"})
+        meeting_id = self.meeting.meeting_id
+        worker, other = BallotCache(), BallotCache()
+
+        # Бюллетень собран до сброса в другом процессе и не должен читаться после него
+        version = worker.version(meeting_id)
+        other.invalidate(meeting_id)
+        worker.set(meeting_id, {"meeting_name": "Старое"}, version)
+        self.assertIsNone(worker.get(meeting_id))
+        self.assertIsNone(other.get(meeting_id))
+
+    def test_local_entries_expire_without_shared_cache(self):
+        meeting_id = self.meeting.meeting_id
+        worker = BallotCache()
+        worker.set(meeting_id, {"meeting_name": "Старое"}, worker.version(meeting_id))
+        self.assertEqual(worker.get(meeting_id), {"meeting_name": "Старое"})
+
+        with self.settings(BALLOT_CACHE={"LOCAL_TIMEOUT": 0}):
+            worker.set(meeting_id, {"meeting_name": "Старое"}, worker.version(meeting_id))
+            self.assertIsNone(worker.get(meeting_id))
+
+        # Бюллетень, собранный до сброса в этом процессе, не сохраняется
+        version = worker.version(meeting_id)
+        worker.invalidate(meeting_id)
+        worker.set(meeting_id, {"meeting_name": "Старое"}, version)
+        self.assertIsNone(worker.get(meeting_id))
+
+    def test_returned_ballot_is_a_copy(self):
+        meeting = create_meeting(questions=2, details=2, is_draft=False)
+        ballot = get_ballot_data(meeting.meeting_id)  # Собран из БД и сохранен в кеш
+        expected = copy.deepcopy(ballot)
+        hits = ballot_cache.stats()["hits"]
+
+        # Изменение вложенных списков собранного и полученного из кеша бюллетеня не меняет запись в кеше
+        ballot["agenda"][0]["details"].clear()
+        cached = get_ballot_data(meeting.meeting_id)
+        self.assertEqual(cached, expected)
+        cached["agenda"].pop()
+        cached["agenda"][0]["question"] = "Изменено"
+        self.assertEqual(get_ballot_data(meeting.meeting_id), expected)
+        self.assertEqual(ballot_cache.stats()["hits"] - hits, 2)
+
+    def test_save_invalidates_ballot(self):
+        self.shared_cache(BALLOT_CACHE={"BACKEND": "shared"})
+        self.assertEqual(get_ballot_data(self.meeting.meeting_id)["meeting_name"], self.meeting.meeting_name)
+
+        # Сохранение через модель (как в админке) сбрасывает кеш после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.meeting_name = "Новое название"
+            self.meeting.save()
+        self.assertEqual(get_ballot_data(self.meeting.meeting_id)["meeting_name"], "Новое название")
+
+        # QuerySet.update() сигналов не отправляет - кеш сбрасывается явно
+        Main.objects.filter(pk=self.meeting.pk).update(meeting_name="Без сигнала")
+        self.assertEqual(get_ballot_data(self.meeting.meeting_id)["meeting_name"], "Новое название")
+        ballot_cache.invalidate(self.meeting.meeting_id)
+        self.assertEqual(get_ballot_data(self.meeting.meeting_id)["meeting_name"], "Без сигнала")
+
+
+class AccountsQueryTest(EvotingTestCase):
+    """Счета пользователя с ФИО и признаком голосования одним запросом, результат совпадает с прежней реализацией"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=2, accounts_per_user=6, questions=2, voted_ratio=0.5, seed=2)
+        self.meeting = fixture["meeting"]
+        self.user, self.other = fixture["users"]
+        self.accounts = fixture["accounts"][self.user.pk]
+        # Счет без записи в VoteCount с тем же номером получает ФИО "—"
+        VoteCount.objects.filter(meeting=self.meeting, account_id=self.accounts[0]).update(account_id=-1)
+
+    def test_bulk_matches_per_row(self):
+        with self.assertNumQueries(1):
+            accounts = get_accounts(self.meeting, self.user, bulk=True)
+        by_account_id = lambda account: account["account_id"]
+        self.assertEqual(sorted(accounts, key=by_account_id),
+                         sorted(get_accounts(self.meeting, self.user, bulk=False), key=by_account_id))
+
+        self.assertEqual(sorted(map(by_account_id, accounts)), self.accounts)
+        self.assertEqual(next(account for account in accounts if account["account_id"] == self.accounts[0])["account_fullname"], "—")
+        voted = set(VotingResult.objects.filter(meeting_id=self.meeting, json_result__isnull=False)
+                    .values_list("account_id", flat=True))
+        self.assertTrue(voted)
+        self.assertEqual({account["account_id"] for account in accounts if account["has_voted"]}, voted & set(self.accounts))
+
+    def test_queries_do_not_grow_with_accounts(self):
+        for accounts_per_user in (1, 20):
+            fixture = create_voting_fixture(users=1, accounts_per_user=accounts_per_user, questions=1)
+            with self.assertNumQueries(1):
+                accounts = get_accounts(fixture["meeting"], fixture["users"][0], bulk=True)
+            self.assertEqual(len(accounts), accounts_per_user)
+
+
+class MeetingStatusTest(EvotingTestCase):
+    """Обновление статусов отправленных собраний по наступившим датам (advance_statuses, update_meeting_statuses)"""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+        self.meetings = {
+            "waiting": create_meeting(questions=0, is_draft=False, status=1, checkin=future),
+            "registration": create_meeting(questions=0, is_draft=False, status=1, checkin=past, meeting_open=future),
+            "closed": create_meeting(questions=0, is_draft=False, status=1, checkin=past, meeting_open=past,
+                                     vote_counting=past, meeting_close=past),
+            "no_status": create_meeting(questions=0, is_draft=False, status=None, checkin=past),
+            "ahead": create_meeting(questions=0, is_draft=False, status=4, checkin=past),  # Статус не понижается
+            "draft": create_meeting(questions=0, is_draft=True, status=1, checkin=past),
+        }
+
+    def statuses(self):
+        return {name: Main.objects.get(pk=meeting.pk).status for name, meeting in self.meetings.items()}
+
+    def test_advance_statuses(self):
+        self.assertEqual(Main.objects.advance_statuses(), {5: 1, 4: 0, 3: 0, 2: 2})
+        self.assertEqual(self.statuses(), {"waiting": 1, "registration": 2, "closed": 5, "no_status": 2, "ahead": 4,
+                                           "draft": 1})
+        self.assertEqual(Main.objects.advance_statuses(), {5: 0, 4: 0, 3: 0, 2: 0})
+
+        # Статус меняется по наступлении даты
+        later = timezone.now() + timedelta(hours=2)
+        self.assertEqual(Main.objects.advance_statuses(now=later), {5: 0, 4: 0, 3: 1, 2: 1})
+        self.assertEqual(self.statuses()["registration"], 3)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("update_meeting_statuses", stdout=stdout)
+        self.assertIn("статус 2: 2, статус 5: 1", stdout.getvalue())
+        self.assertEqual(self.statuses()["closed"], 5)
+
+        stdout = io.StringIO()
+        call_command("update_meeting_statuses", stdout=stdout)
+        self.assertIn("нет изменений", stdout.getvalue())
+
+
+class MeetingListTest(EvotingTestCase):
+    """Список собраний: постраничный вывод по ключу (meeting_date, meeting_id) и фильтры MeetingFilter"""
+
+    def setUp(self):
+        super().setUp()
+        self.login()
+        # Часть собраний в один день: порядок внутри дня задает meeting_id
+        dates = [date(2026, 5, day) for day in (1, 3, 3, 3, 7, 9, 9)]
+        self.meetings = [create_meeting(questions=0, is_draft=False, meeting_date=day, status=2 + number % 2)
+                         for number, day in enumerate(dates)]
+        create_meeting(questions=0, is_draft=True, meeting_date=dates[0])
+        self.expected = [meeting.meeting_id for meeting in
+                         sorted(self.meetings, key=lambda meeting: (meeting.meeting_date, meeting.meeting_id), reverse=True)]
+
+    def walk(self, url, link="next"):
+        ids, counts = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(context.captured_queries))
+            ids.append([meeting["meeting_id"] for meeting in response.data["results"]])
+            url = response.data[link]
+        return ids, counts
+
+    def test_keyset_pages(self):
+        pages, counts = self.walk("/api/meetings/?page_size=2")
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(len(set(counts)), 1)
+
+        # Обратный проход от последней страницы по ссылкам previous
+        last = self.client.get("/api/meetings/?page_size=2").data
+        while last["next"]:
+            last = self.client.get(last["next"]).data
+        pages, _ = self.walk(last["previous"], link="previous")
+        self.assertEqual(sum(reversed(pages), []), self.expected[:-1])
+
+    def test_null_dates(self):
+        # Собрания без даты идут после остальных и попадают на границы страниц
+        undated = [create_meeting(questions=0, is_draft=False, meeting_date=None).meeting_id for _ in range(4)]
+        expected = self.expected + sorted(undated, reverse=True)
+
+        pages, _ = self.walk("/api/meetings/?page_size=3")
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+
+        last = self.client.get("/api/meetings/?page_size=3").data
+        while last["next"]:
+            last = self.client.get(last["next"]).data
+        pages, _ = self.walk(last["previous"], link="previous")
+        self.assertEqual(sum(reversed(pages), []), expected[:-2])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/meetings/?cursor=abc").status_code, 404)
+
+    def test_drafts_pages(self):
+        pages, _ = self.walk("/api/meetings/drafts/?page_size=1")
+        self.assertEqual(len(sum(pages, [])), 1)
+
+    def test_filters(self):
+        def ids(query):
+            return [meeting["meeting_id"] for meeting in self.client.get(f"/api/meetings/?{query}").data["results"]]
+
+        self.assertEqual(ids("status=3"), [meeting_id for meeting_id in self.expected
+                                           if Main.objects.get(pk=meeting_id).status == 3])
+        self.assertEqual(ids(f"issuer={self.meetings[2].issuer_id}"), [self.meetings[2].meeting_id])
+        self.assertEqual(ids("meeting_date_after=2026-05-03&meeting_date_before=2026-05-07"), self.expected[2:6])
+        self.assertEqual(self.client.get("/api/meetings/?meeting_date_after=abc").status_code, 400)
+
+
+class HotIndexTest(EvotingTestCase):
+    """Индексы горячих выборок (миграция 0018): созданы с нужными колонками и используются планировщиком"""
+
+    COLUMNS = {
+        "relation_user_meeting_idx": ["user_id", "meeting_id", "account_id"],
+        "relation_registered_idx": ["meeting_id", "account_id"],
+        "vote_count_fullname_idx": ["meeting_id", "account_id"],
+        "voting_result_voted_idx": ["meeting_id_id", "account_id", "user_id_id"],
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.fixture = create_voting_fixture(users=20, accounts_per_user=5, questions=2, registered_ratio=0.5,
+                                             voted_ratio=0.3)
+        self.meeting = self.fixture["meeting"]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_indexes_exist(self):
+        constraints = {}
+        with connection.cursor() as cursor:
+            for model in (DjangoRelation, VoteCount, VotingResult):
+                constraints.update(connection.introspection.get_constraints(cursor, model._meta.db_table))
+        self.assertEqual({name: constraints[name]["columns"] for name in HOT_INDEXES if name in constraints},
+                         self.COLUMNS)
+
+    def test_hot_queries(self):
+        user = self.fixture["users"][0]
+        account_id = self.fixture["accounts"][user.pk][0]
+        queries = hot_queries(self.meeting, user.pk, account_id)
+
+        registered = list(DjangoRelation.objects.filter(meeting=self.meeting, registered=True)
+                          .order_by("account_id").values_list("account_id", flat=True))
+        self.assertTrue(registered)
+        self.assertEqual([row["account_id"] for row in queries["registered_users_page"]], registered[:100])
+        self.assertEqual(queries["has_voted"].exists(), VotingResult.objects.get(
+            meeting_id=self.meeting, account_id=account_id).json_result is not None)
+        self.assertEqual(len(queries["get_accounts"]), 5)
+
+    @skipUnless(connection.vendor == "sqlite", "планы выполнения проверяются для SQLite")
+    def test_query_plans_use_indexes(self):
+        user = self.fixture["users"][0]
+        queries = hot_queries(self.meeting, user.pk, self.fixture["accounts"][user.pk][0])
+        self.assertIn("relation_user_meeting_idx", queries["get_accounts"].explain())
+        self.assertIn("relation_registered_idx", queries["registered_users_page"].explain())
+
+
+class VoteIngestionTest(EvotingTestCase):
+    """Проверка бюллетеня и прием голосов по одному и пакетом: 400, 403, повторное голосование"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=2, accounts_per_user=4, questions=2, details=0, quantity=100,
+                                        registered_ratio=1.0)
+        self.meeting = fixture["meeting"]
+        self.user, self.other = fixture["users"]
+        self.accounts = fixture["accounts"][self.user.pk]
+        self.foreign = fixture["accounts"][self.other.pk][0]
+        self.ballot = get_ballot_data(self.meeting.meeting_id)
+        self.questions = [question["question_id"] for question in self.ballot["agenda"]]
+        self.vote = make_vote(self.ballot, 100)
+        self.login(self.user)
+
+    def instruction(self, question_id, **votes):
+        return {"VoteDtls": {"VoteInstrForAgndRsltn": [
+            {"VoteInstr": {"QuestionId": question_id, **{key: {"Quantity": value} for key, value in votes.items()}}}
+        ]}}
+
+    def test_validate_vote(self):
+        quantities = {(question_id, None): Decimal(100) for question_id in self.questions}
+        result = validate_vote(self.ballot, quantities, self.instruction(self.questions[0], For=60, Against="40"))
+        self.assertEqual(result["VoteDtls"]["VoteInstrForAgndRsltn"][0]["VoteInstr"],
+                         {"QuestionId": self.questions[0], "For": {"Quantity": 60}, "Against": {"Quantity": 40}})
+
+        invalid = [
+            {},
+            {"VoteDtls": "abc"},
+            self.instruction(-1, For=1),
+            self.instruction(self.questions[0], For=101),
+            self.instruction(self.questions[0], For=60, Against=41),
+            self.instruction(self.questions[0], For=-1),
+            self.instruction(self.questions[0], For="abc"),
+            {"VoteDtls": {"VoteInstrForAgndRsltn": [
+                {"VoteInstr": {"QuestionId": self.questions[0], "DetailId": 1, "For": {"Quantity": 1}}}]}},
+        ]
+        for vote_data in invalid:
+            with self.subTest(vote_data=vote_data), self.assertRaises(BallotValidationError):
+                validate_vote(self.ballot, quantities, vote_data)
+
+    def test_submit_vote(self):
+        account_id = self.accounts[0]
+        result = submit_vote(self.meeting, self.user, account_id, self.instruction(self.questions[0], For=101))
+        self.assertEqual(result["status"], 400)
+
+        result = submit_vote(self.meeting, self.user, account_id, self.vote)
+        self.assertEqual(result["status"], 201)
+        self.assertEqual(submit_vote(self.meeting, self.user, account_id, self.vote),
+                         {"error": ALREADY_VOTED, "status": 403})
+        self.assertEqual(submit_vote(self.meeting, self.user, self.foreign, self.vote)["status"], 403)
+
+        # Без досрочного голосования по незарегистрированному счету голосовать нельзя
+        DjangoRelation.objects.filter(meeting=self.meeting, account_id=self.accounts[1]).update(registered=False)
+        self.meeting.early_registration = False
+        self.assertEqual(submit_vote(self.meeting, self.user, self.accounts[1], self.vote),
+                         {"error": NOT_REGISTERED, "status": 403})
+
+        totals = format_summary(get_vote_totals(self.meeting, "table"))
+        self.assertEqual([question["results"][0]["For"] for question in totals], [100, 100])
+
+    def test_vote_view(self):
+        url = f"/{self.meeting.meeting_id}/vote/{self.accounts[0]}/"
+        self.assertEqual(self.client.post(url, {}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(url, self.vote, format="json").status_code, 201)
+        self.assertEqual(self.client.post(url, self.vote, format="json").status_code, 403)
+
+    def test_submit_votes(self):
+        VotingResult.objects.filter(meeting_id=self.meeting, account_id=self.accounts[3]).update(json_result=self.vote)
+        votes = [
+            {"account_id": self.accounts[0], **self.vote},
+            {"account_id": str(self.accounts[1]), **self.vote},
+            {"account_id": self.accounts[0], **self.vote},
+            {"account_id": self.accounts[2], **self.instruction(self.questions[0], For=101)},
+            {"account_id": self.accounts[3], **self.vote},
+            {"account_id": self.foreign, **self.vote},
+            {"account_id": [1], **self.vote},
+            {"account_id": True, **self.vote},
+            {"account_id": None, **self.vote},
+            "abc",
+        ]
+        response = self.client.post(f"/{self.meeting.meeting_id}/votes/", {"votes": votes}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["accepted"], self.accounts[:2])
+
+        errors = [(row["account_id"], row["error"]) for row in response.data["rejected"]]
+        self.assertIn(([1], INVALID_ACCOUNT), errors)
+        self.assertIn((True, INVALID_ACCOUNT), errors)
+        self.assertIn((None, INVALID_ACCOUNT), errors)
+        self.assertIn((None, INVALID_BALLOT), errors)
+        self.assertIn((self.accounts[0], "Повторный бюллетень по лицевому счету."), errors)
+        self.assertIn((self.accounts[3], ALREADY_VOTED), errors)
+        self.assertIn((self.foreign, FOREIGN_ACCOUNT), errors)
+        self.assertIn(self.accounts[2], [account_id for account_id, _ in errors])
+        self.assertEqual(len(errors), 8)
+
+        # Повторная отправка: все бюллетени отклонены
+        result = submit_votes(self.meeting, self.user, votes[:2])
+        self.assertEqual(result["status"], 400)
+        self.assertEqual(result["rejected"], [{"account_id": self.accounts[0], "error": ALREADY_VOTED},
+                                              {"account_id": self.accounts[1], "error": ALREADY_VOTED}])
+
+        self.assertEqual(submit_votes(self.meeting, self.user, {"votes": []})["status"], 400)
+        self.assertEqual(self.client.post(f"/{self.meeting.meeting_id}/votes/", {}, format="json").status_code, 400)
+
+    def test_benchmark_command(self):
+        stdout = io.StringIO()
+        call_command("bench_vote_ingestion", accounts=4, questions=1, batch_size=2, stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual((report["single"]["runs"], report["batch"]["runs"]), (2, 1))
+
+
+class LifecycleBenchmarkTest(EvotingTestCase):
+    """Прогон жизненного цикла собрания в малом масштабе: все этапы проходят, запросы на вызов не растут с числом счетов"""
+
+    def test_lifecycle_stages(self):
+        fixture = create_lifecycle_fixture(issuers=1, meetings_per_issuer=2, users=2, accounts_per_user=2,
+                                           questions=3, details=2)
+        report = run_lifecycle(fixture)
+
+        self.assertEqual(set(report["stages"]), set(STAGES))
+        self.assertEqual(report["stages"]["vote_post"]["runs"], 8)
+        for summary in report["stages"].values():
+            self.assertLessEqual(summary["p50_ms"], summary["p99_ms"])
+
+    def test_vote_queries_do_not_grow_with_accounts(self):
+        counts = []
+        for accounts_per_user in (1, 5):
+            fixture = create_lifecycle_fixture(users=1, accounts_per_user=accounts_per_user, questions=2)
+            stages = run_lifecycle(fixture)["stages"]
+            counts.append((stages["vote_get"]["queries"], stages["vote_post"]["queries"]))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unexpected_response_stops_run(self):
+        fixture = create_lifecycle_fixture(users=1, accounts_per_user=1, questions=1)
+        Main.objects.filter(pk=fixture["meetings"][0]["meeting"].pk).update(status=5, early_registration=False)
+        with self.assertRaisesMessage(RuntimeError, "register: ожидался ответ 200"):
+            run_lifecycle(fixture)
+
+
+class RequestMetricsTest(EvotingTestCase):
+    """Метрики запросов: заголовок Server-Timing и гистограммы по имени маршрута"""
+
+    def setUp(self):
+        super().setUp()
+        request_metrics.reset()
+        self.login()
+
+    def test_server_timing_and_histograms(self):
+        meeting = create_meeting(questions=2, is_draft=False)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/meetings/{meeting.meeting_id}/")
+        self.assertIn(f'desc="{len(context.captured_queries)} queries"', response["Server-Timing"])
+
+        report = {row["view"]: row for row in request_metrics.report()}
+        self.assertEqual(report["meetings-detail"]["requests"], 1)
+        self.assertEqual(report["meetings-detail"]["max_queries"], len(context.captured_queries))
+
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('evoting_request_queries_count{view="meetings-detail"} 1', content)
+        self.assertIn("# TYPE evoting_request_duration_milliseconds histogram", content)
+
+        # Счетчики кеша бюллетеней - counter с суффиксом _total, размер кеша - gauge
+        types = dict(line.split()[2:4] for line in content.splitlines() if line.startswith("# TYPE"))
+        for name in ("hits", "shared_hits", "misses", "sets", "invalidations"):
+            self.assertEqual(types.pop(f"evoting_ballot_cache_{name}_total"), "counter")
+        self.assertEqual(types.pop("evoting_ballot_cache_size"), "gauge")
+        self.assertEqual(types.pop("evoting_ballot_cache_max_size"), "gauge")
+        self.assertEqual(set(types.values()), {"histogram"})
+        self.assertIn(f"evoting_ballot_cache_hits_total {ballot_cache.stats()['hits']}", content)
+
+    def test_slow_request_logs_queries(self):
+        meeting = create_meeting(is_draft=False)
+        with self.settings(REQUEST_METRICS={"SLOW_REQUEST_MS": 0}):
+            with self.assertLogs("meeting.monitoring", level="WARNING") as logs:
+                self.client.get(f"/api/meetings/{meeting.meeting_id}/")
+        self.assertIn("meeting_main", logs.output[0])
+
+    def test_metrics_require_admin(self):
+        self.login(User.objects.create_user("user", password="user"))
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+
+
+class RegistrationTest(EvotingTestCase):
+    """Регистрация одним UPDATE: по выбранным счетам, повторный запрос не является ошибкой"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=2, accounts_per_user=3, questions=1)
+        self.meeting = fixture["meeting"]
+        self.user, self.other = fixture["users"]
+        self.accounts = fixture["accounts"][self.user.pk]
+        self.login(self.user)
+        self.url = f"/{self.meeting.meeting_id}/register/"
+
+    def registered_accounts(self):
+        return sorted(DjangoRelation.objects.filter(meeting=self.meeting, user=self.user, registered=True)
+                      .values_list("account_id", flat=True))
+
+    def test_register_subset_then_rest(self):
+        response = self.client.post(self.url, {"account_ids": self.accounts[:2]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["accounts"], self.accounts[:2])
+        self.assertEqual(self.registered_accounts(), self.accounts[:2])
+
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url)
+        self.assertEqual(response.data["accounts"], self.accounts[2:])
+        self.assertEqual(self.registered_accounts(), self.accounts)
+
+    def test_account_ids_are_parsed_like_batch_votes(self):
+        # Строки из цифр принимаются, как в пакетном голосовании (parse_account_id), остальное отклоняется
+        for account_ids in (["abc"], [True], [1.5], []):
+            response = self.client.post(self.url, {"account_ids": account_ids}, format="json")
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {"account_ids": [str(self.accounts[0]), self.accounts[1]]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["accounts"], self.accounts[:2])
+
+    def test_repeated_registration_is_idempotent(self):
+        self.assertEqual(self.client.post(self.url).status_code, 200)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["accounts"], [])
+
+    def test_foreign_accounts_are_not_registered(self):
+        foreign = DjangoRelation.objects.filter(meeting=self.meeting, user=self.other).values_list("account_id", flat=True)
+        response = self.client.post(self.url, {"account_ids": list(foreign)}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DjangoRelation.objects.filter(meeting=self.meeting, registered=True).exists())
+
+        response = self.client.post(self.url, {"account_ids": "1,2"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class RegisteredReportTest(EvotingTestCase):
+    """Список зарегистрированных счетов постранично и кворум по вопросам"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=3, accounts_per_user=4, questions=2, details=3, quantity=10)
+        self.meeting = fixture["meeting"]
+        self.login()
+
+        # Зарегистрированы 5 счетов из 12
+        self.registered = sorted(DjangoRelation.objects.filter(meeting=self.meeting)
+                                 .values_list("account_id", flat=True))[:5]
+        DjangoRelation.objects.filter(meeting=self.meeting, account_id__in=self.registered).update(registered=True)
+
+    def test_registered_users_pages(self):
+        url = f"/{self.meeting.meeting_id}/registered_users/?page_size=2"
+        accounts = []
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            accounts += [row["account_id"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(accounts, self.registered)
+        self.assertEqual(response.data["results"][-1]["account_fullname"], f"Акционер {self.registered[-1]}")
+
+    def test_quorum(self):
+        response = self.client.get(f"/{self.meeting.meeting_id}/quorum/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["accounts"], {"total": 12, "registered": 5})
+        for question in response.data["questions"]:
+            self.assertEqual(question["total_quantity"], 120)
+            self.assertEqual(question["registered_quantity"], 50)
+            self.assertFalse(question["has_quorum"])
+
+        # Доля 50/120 сравнивается с QUORUM_SHARE точно: кворум есть при доле ниже 5/12 и нет при равной
+        with self.settings(QUORUM_SHARE=Decimal("0.4166")):
+            response = self.client.get(f"/{self.meeting.meeting_id}/quorum/")
+        self.assertTrue(all(question["has_quorum"] for question in response.data["questions"]))
+        with self.settings(QUORUM_SHARE=Decimal(50) / Decimal(120)):
+            response = self.client.get(f"/{self.meeting.meeting_id}/quorum/")
+        self.assertFalse(any(question["has_quorum"] for question in response.data["questions"]))
+
+
+class VoteQuantityTest(EvotingTestCase):
+    """Количество голосов хранится по вопросам в VoteQuantity и отдается бюллетеню в прежнем формате json_quantity"""
+
+    def test_import_and_legacy_json_quantity(self):
+        meeting = create_meeting(questions=2, details=2, is_draft=False, status=3)
+        user = User.objects.create_user("holder", password="holder")
+        import_register(meeting, [{"account_id": "7", "account_fullname": "Иванов", "quantity": "15", "user_id": user.pk}])
+
+        self.assertEqual(VoteQuantity.objects.filter(meeting=meeting, account_id=7).count(), 4)
+        DjangoRelation.objects.filter(meeting=meeting).update(registered=True)
+
+        self.login(user)
+        response = self.client.get(f"/{meeting.meeting_id}/vote/7/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["vote_count"], get_json_data(meeting.meeting_id, 15))
+
+    def test_backfill_migration_parses_exact_quantities(self):
+        migration = import_module("meeting.migrations.0019_votequantity")
+        json_quantity = {"VoteDtls": {"VoteInstrForAgndRsltn": [
+            {"VoteInstr": {"QuestionId": 1, "Quantity": "10.25"}},
+            {"VoteInstr": {"QuestionId": "2", "DetailId": 3, "Quantity": 7}},
+        ]}}
+        self.assertEqual(migration.parse_json_quantity(json_quantity), [(1, 0, Decimal("10.25")), (2, 3, Decimal(7))])
+
+        # Некорректный json_quantity останавливает миграцию с номером счета, а не пропускается
+        meeting = create_meeting(questions=1, is_draft=False)
+        vote_count = VoteCount.objects.create(meeting=meeting, account_id=1, account_fullname="Иванов", json_quantity={
+            "VoteDtls": {"VoteInstrForAgndRsltn": [{"VoteInstr": {"QuestionId": 1, "Quantity": "много"}}]}
+        })
+        with self.assertRaisesMessage(ValueError, f"VoteCount {vote_count.pk}"):
+            migration.backfill_vote_quantities(apps, None)
+
+
+class VoteTallyTest(EvotingTestCase):
+    """Таблица итогов: прием голосов и пересчет под блокировкой собрания, заполнение итогов по старым бюллетеням"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=2, accounts_per_user=5, questions=3, details=2, quantity=10,
+                                        registered_ratio=1.0, voted_ratio=0.5, seed=3)
+        self.meeting = fixture["meeting"]
+        self.user = fixture["users"][0]
+        self.open_accounts = list(VotingResult.objects.filter(
+            meeting_id=self.meeting, user_id=self.user, json_result__isnull=True
+        ).values_list("account_id", flat=True))
+        self.vote = make_vote(get_ballot_data(self.meeting.meeting_id), 10)
+
+    def assertTableMatchesBallots(self):
+        self.assertEqual(get_vote_totals(self.meeting, "table"), get_vote_totals(self.meeting, "python"))
+
+    def test_votes_and_rebuild(self):
+        self.assertTableMatchesBallots()
+        for account_id in self.open_accounts:
+            self.assertEqual(submit_vote(self.meeting, self.user, account_id, self.vote)["status"], 201)
+        self.assertTableMatchesBallots()
+
+        VoteTally.objects.filter(meeting=self.meeting)[:1].get().delete()
+        rebuild_vote_tally(self.meeting)
+        self.assertTableMatchesBallots()
+
+    def test_vote_and_rebuild_lock_meeting(self):
+        for action in (lambda: submit_vote(self.meeting, self.user, self.open_accounts[0], self.vote),
+                       lambda: rebuild_vote_tally(self.meeting)):
+            with CaptureQueriesContext(connection) as context:
+                action()
+            locks = [query["sql"] for query in context.captured_queries if 'FROM "meeting_main"' in query["sql"]]
+            self.assertTrue(locks)
+            if connection.features.has_select_for_update:
+                self.assertIn("FOR NO KEY UPDATE", locks[0])
+
+    def test_backfill_migration(self):
+        backfill = import_module("meeting.migrations.0021_backfill_vote_tally").backfill_vote_tally
+        VoteTally.objects.all().delete()
+        backfill(apps, None)
+        self.assertTableMatchesBallots()
+
+        backfill(apps, None)
+        self.assertTableMatchesBallots()
+
+
+class TallyEngineTest(EvotingTestCase):
+    """Способы подсчета итогов дают одинаковый результат на случайных бюллетенях"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=4, accounts_per_user=10, questions=4, details=3, quantity=1000)
+        self.meeting = fixture["meeting"]
+        self.ballot = get_ballot_data(self.meeting.meeting_id)
+        self.login()
+
+        # Случайные бюллетени: случайные варианты голоса и количества, часть количеств - строками
+        rng = random.Random(16)
+        results = list(VotingResult.objects.filter(meeting_id=self.meeting))
+        for result in results[:35]:
+            instructions = []
+            for question in self.ballot["agenda"] + [{"question_id": -1, "details": []}]:
+                for detail in question["details"] or [None]:
+                    vote_instr = {"QuestionId": question["question_id"]}
+                    if detail is not None:
+                        vote_instr["DetailId"] = detail["detail_id"]
+                    for vote_type in rng.sample(VOTE_TYPES, rng.randint(0, 3)):
+                        quantity = rng.randint(0, 10 ** 6)
+                        if rng.random() < 0.3:
+                            quantity = str(quantity)
+                        elif rng.random() < 0.3:
+                            quantity = f"{quantity}.{rng.randint(0, 99):02d}"
+                        vote_instr[vote_type] = {"Quantity": quantity}
+                    instructions.append({"VoteInstr": vote_instr})
+            result.json_result = {"VoteDtls": {"VoteInstrForAgndRsltn": rng.sample(instructions, len(instructions))}}
+        VotingResult.objects.bulk_update(results, ["json_result"])
+        rebuild_vote_tally(self.meeting)
+
+    def test_engines_are_equivalent(self):
+        expected = format_summary(get_vote_totals(self.meeting, "python"))
+        self.assertTrue(expected)
+        self.assertEqual(format_summary(get_vote_totals(self.meeting, "table")), expected)
+        self.assertEqual(format_summary(get_vote_totals(self.meeting, "dense")), expected)
+        # В SQLite способ "postgres" выполняется в Python, в PostgreSQL - запросом jsonb_array_elements
+        self.assertEqual(format_summary(get_vote_totals(self.meeting, "postgres")), expected)
+
+    @skipUnless(connection.vendor == "postgresql", "запрос jsonb_array_elements выполняется только в PostgreSQL")
+    def test_postgres_totals(self):
+        expected = get_vote_totals(self.meeting, "python")
+        self.assertTrue(expected)
+        self.assertEqual(voting_service._postgres_totals(self.meeting), expected)
+
+    def test_results_view_uses_engine_setting(self):
+        responses = []
+        for engine in TALLY_ENGINES:
+            with self.settings(VOTE_TALLY_ENGINE=engine):
+                response = self.client.get(f"/{self.meeting.meeting_id}/all_vote_results/")
+            self.assertEqual(response.status_code, 200)
+            responses.append(response.data["SummarizedVoteResults"])
+        for response in responses[1:]:
+            self.assertEqual(response, responses[0])
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            get_vote_totals(self.meeting, "numpy")
+
+
+class ExactQuantityTest(EvotingTestCase):
+    """Дробные количества голосов учитываются точно, без округления до целых"""
+
+    def test_parse_quantity(self):
+        self.assertEqual(parse_quantity("0.1"), Decimal("0.1"))
+        self.assertEqual(parse_quantity(0.1), Decimal("0.1"))
+        self.assertEqual(quantity_to_json(Decimal("10.500000")), "10.5")
+        self.assertEqual(quantity_to_json(Decimal("10.000000")), 10)
+        for value in ("abc", "NaN", "0.0000001", True, "1e40"):
+            with self.assertRaises(ValueError):
+                parse_quantity(value)
+
+    def test_dense_tally_matches_python(self):
+        ballot = {"agenda": [
+            {"question_id": 1, "details": []},
+            {"question_id": 2, "details": [{"detail_id": 5}, {"detail_id": 6}]},
+        ]}
+        results = [
+            {"VoteDtls": {"VoteInstrForAgndRsltn": [
+                {"VoteInstr": {"QuestionId": 1, "For": {"Quantity": "0.1"}}},
+                {"VoteInstr": {"QuestionId": 2, "DetailId": 5, "Against": {"Quantity": 3}, "For": {"Quantity": 0}}},
+                {"VoteInstr": {"QuestionId": "2", "DetailId": "6", "Abstain": {"Quantity": 1}}},
+                {"VoteInstr": {"QuestionId": 1, "DetailId": 5, "For": {"Quantity": 4}}},
+                {"VoteInstr": {"QuestionId": 9, "Abstain": {"Quantity": "2.5"}}},
+            ]}},
+        ] * 3
+        dense = DenseTally(ballot).add_many(results).result()
+        self.assertEqual(dense, summarize_vote_instructions(results))
+        self.assertEqual(dense[(1, None, "For")], Decimal("0.3"))
+
+    def test_fractional_register_and_vote(self):
+        meeting = create_meeting(questions=1, is_draft=False, status=3)
+        user = User.objects.create_user("holder", password="holder")
+        import_register(meeting, [{"account_id": 1, "account_fullname": "Иванов", "quantity": "10.25", "user_id": user.pk}])
+        DjangoRelation.objects.filter(meeting=meeting).update(registered=True)
+        question_id = get_ballot_data(meeting.meeting_id)["agenda"][0]["question_id"]
+
+        self.login(user)
+        vote = {"VoteDtls": {"VoteInstrForAgndRsltn": [{"VoteInstr": {"QuestionId": question_id, "For": {"Quantity": "10.25"}}}]}}
+        self.assertEqual(self.client.post(f"/{meeting.meeting_id}/vote/1/", vote, format="json").status_code, 201)
+
+        vote["VoteDtls"]["VoteInstrForAgndRsltn"][0]["VoteInstr"]["For"]["Quantity"] = "10.26"
+        import_register(meeting, [{"account_id": 2, "account_fullname": "Петров", "quantity": "10.25", "user_id": user.pk}])
+        DjangoRelation.objects.filter(meeting=meeting).update(registered=True)
+        self.assertEqual(self.client.post(f"/{meeting.meeting_id}/vote/2/", vote, format="json").status_code, 400)
+
+        self.assertEqual(format_summary(get_vote_totals(meeting, "table"))[0]["results"][0]["For"], "10.25")
+
+
+class ElectionResultsTest(EvotingTestCase):
+    """Итоги кумулятивного голосования: недействительные бюллетени, рейтинг кандидатов и избранные на места"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=1, accounts_per_user=4, questions=1, details=3, quantity=100)
+        self.meeting = fixture["meeting"]
+        Agenda.objects.filter(meeting=self.meeting).update(seat_count=2)
+        ballot_cache.invalidate(self.meeting.meeting_id)  # update() не отправляет сигналов
+        question = get_ballot_data(self.meeting.meeting_id)["agenda"][0]
+        self.question_id = question["question_id"]
+        self.candidates = [detail["detail_id"] for detail in question["details"]]
+        self.login()
+
+    def vote(self, account_id, *quantities):
+        instructions = [
+            {"VoteInstr": {"QuestionId": self.question_id, "DetailId": detail_id, "For": {"Quantity": quantity}}}
+            for detail_id, quantity in zip(self.candidates, quantities) if quantity
+        ]
+        VotingResult.objects.filter(meeting_id=self.meeting, account_id=account_id).update(
+            json_result={"VoteDtls": {"VoteInstrForAgndRsltn": instructions}}
+        )
+
+    def test_elected_slate(self):
+        self.vote(1, 50, 150, 0)
+        self.vote(2, 0, 100, "99.5")
+        self.vote(3, 200, 0, "0.5")  # 100 × 2 места + 0.5 - превышение, бюллетень не учитывается
+        response = self.client.get(f"/{self.meeting.meeting_id}/election_results/")
+        self.assertEqual(response.status_code, 200)
+
+        election = response.data["ElectionResults"][0]
+        self.assertEqual((election["ballots"], election["invalid_ballots"]), (3, 1))
+        self.assertEqual(election["elected"], [self.candidates[1], self.candidates[2]])
+        self.assertEqual([candidate["For"] for candidate in election["candidates"]], [250, "99.5", 50])
+        self.assertFalse(election["tie_at_boundary"])
+
+    def test_tie_is_broken_by_ballot_order(self):
+        self.vote(1, 100, 0, 100)
+        self.vote(2, 0, 100, 0)
+        election = self.client.get(f"/{self.meeting.meeting_id}/election_results/").data["ElectionResults"][0]
+        self.assertEqual(election["elected"], [self.candidates[0], self.candidates[1]])
+        self.assertTrue(election["tie_at_boundary"])
+
+    def test_no_cumulative_questions(self):
+        Agenda.objects.filter(meeting=self.meeting).update(cumulative=False)
+        ballot_cache.invalidate(self.meeting.meeting_id)
+        self.assertEqual(self.client.get(f"/{self.meeting.meeting_id}/election_results/").status_code, 404)
+
+
+class ResultsExportTest(EvotingTestCase):
+    """Выгрузка результатов голосования по счетам: потоковый CSV и XLSX"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=1, accounts_per_user=3, questions=2, voted_ratio=1.0)
+        self.meeting = fixture["meeting"]
+        self.questions = [question["question_id"] for question in get_ballot_data(self.meeting.meeting_id)["agenda"]]
+        self.url = f"/{self.meeting.meeting_id}/export_results/"
+        self.login()
+
+    def expected_rows(self):
+        return [
+            [str(account_id), str(question_id), "100", "0", "0"]
+            for account_id in (1, 2, 3) for question_id in self.questions
+        ]
+
+    def test_csv(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="voting_results_', response["Content-Disposition"])
+
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(content.startswith("\ufeff"))
+        rows = list(csv.reader(io.StringIO(content.lstrip("\ufeff"))))
+        self.assertEqual(rows[0], EXPORT_COLUMNS)
+        self.assertEqual([[row[0], row[3], *row[7:]] for row in rows[1:]], self.expected_rows())
+
+    def test_xlsx(self):
+        response = self.client.get(self.url, {"export_format": "xlsx"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(".xlsx", response["Content-Disposition"])
+
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = [list(row) for row in workbook["Результаты"].iter_rows(values_only=True)]
+        self.assertEqual(rows[0], EXPORT_COLUMNS)
+        self.assertEqual([[str(value) for value in (row[0], row[3], *row[7:])] for row in rows[1:]],
+                         self.expected_rows())
+
+    def test_format_and_permissions(self):
+        self.assertEqual(self.client.get(self.url, {"export_format": "pdf"}).status_code, 400)
+        self.login(User.objects.create_user("user", password="user"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class RegisterImportTest(EvotingTestCase):
+    """Загрузка реестра из админки: файл ставится в очередь и загружается командой process_register_imports"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.meeting = create_meeting(questions=2, is_draft=False)
+        self.user = User.objects.create_user("user", password="user")
+
+    def test_upload_is_queued_and_processed(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="admin"))
+        register = (f"account_id,account_fullname,quantity,user_id\n1,Иванов,10,{self.user.pk}\n"
+                    f"2,Петров,20.5,\n3,Сидоров,30,999999\n4,Ошибка,много,\n")
+        response = self.client.post(reverse("admin:meeting_votecount_import"), {
+            "meeting": self.meeting.meeting_id,
+            "register_file": SimpleUploadedFile("register.csv", register.encode("utf-8")),
+        })
+        self.assertEqual(response.status_code, 302)
+
+        # Запрос только сохраняет файл, реестр загружается вне запроса
+        register_import = RegisterImport.objects.get()
+        self.assertEqual((register_import.status, register_import.file_format), (RegisterImport.PENDING, "csv"))
+        self.assertFalse(VoteCount.objects.filter(meeting=self.meeting).exists())
+
+        call_command("process_register_imports", stdout=io.StringIO())
+        register_import.refresh_from_db()
+        self.assertEqual((register_import.status, register_import.rows_done), (RegisterImport.DONE, 4))
+        self.assertEqual((register_import.report["linked"], register_import.report["error_count"]), (1, 2))
+
+        self.assertEqual(VoteCount.objects.filter(meeting=self.meeting).count(), 3)
+        self.assertEqual(list(VoteQuantity.objects.filter(meeting=self.meeting, account_id=2).values_list(
+            "quantity", flat=True)), [Decimal("20.5")] * 2)
+        self.assertEqual(list(DjangoRelation.objects.filter(meeting=self.meeting).values_list("account_id", "user_id")),
+                         [(1, self.user.pk)])
+
+    def test_admin_shows_imported_quantities(self):
+        queue_register_import(
+            self.meeting, SimpleUploadedFile("register.csv", b"account_id,account_fullname,quantity,user_id\n7,Petrov,20.5,\n")
+        )
+        self.assertEqual(run_register_import(claim_register_import()).status, RegisterImport.DONE)
+        vote_count = VoteCount.objects.get(meeting=self.meeting, account_id=7)
+        self.assertIsNone(vote_count.json_quantity)
+
+        # Количество голосов в списке и на странице счета берется из VoteQuantity
+        self.client.force_login(User.objects.create_superuser("admin", password="admin"))
+        response = self.client.get(reverse("admin:meeting_votecount_changelist"), {"q": "Petrov"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "&quot;Quantity&quot;: &quot;20.5&quot;", count=2)
+        response = self.client.get(reverse("admin:meeting_votecount_change", args=[vote_count.pk]))
+        self.assertContains(response, "20.5", count=2)
+
+    def test_failed_import_resumes(self):
+        rows = [json.dumps({"account_id": number, "account_fullname": f"Счет {number}", "quantity": 10})
+                for number in range(1, 5)]
+        register_import = queue_register_import(
+            self.meeting, SimpleUploadedFile("register.jsonl", "\n".join([*rows[:2], "{", *rows[3:]]).encode())
+        )
+
+        # Первая часть загружена, на второй - некорректная строка
+        run_register_import(claim_register_import(), chunk_size=2)
+        register_import.refresh_from_db()
+        self.assertEqual((register_import.status, register_import.rows_done), (RegisterImport.FAILED, 2))
+        self.assertIn("JSONDecodeError", register_import.report["error"])
+        self.assertEqual(VoteCount.objects.filter(meeting=self.meeting).count(), 2)
+        self.assertIsNone(claim_register_import())
+
+        # Исправленный файл загружается со строки, на которой загрузка остановилась
+        register_import.file.save("register.jsonl", ContentFile("\n".join(rows).encode()))
+        RegisterImport.objects.filter(pk=register_import.pk).update(status=RegisterImport.PENDING)
+        register_import = run_register_import(claim_register_import(), chunk_size=2)
+        self.assertEqual(register_import.status, RegisterImport.DONE)
+        self.assertEqual((register_import.report["rows"], register_import.report["skipped"]), (2, 2))
+        self.assertEqual(VoteCount.objects.filter(meeting=self.meeting).count(), 4)
+
+
+class AsyncViewsTest(EvotingTestCase):
+    """Регистрация, просмотр собрания и голосование через ASGI: асинхронные представления и цепочка middleware"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=1, accounts_per_user=2, questions=2)
+        self.meeting = fixture["meeting"]
+        user = fixture["users"][0]
+        self.accounts = fixture["accounts"][user.pk]
+        self.vote = make_vote(get_ballot_data(self.meeting.meeting_id))
+        self.client = AsyncClient()
+        # Заголовки по умолчанию AsyncClient не передает в ASGI scope, поэтому токен указывается в каждом запросе
+        self.headers = {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    async def test_register_retrieve_and_vote(self):
+        meeting_id = self.meeting.meeting_id
+        response = await self.client.post(f"/{meeting_id}/register/", {}, content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["accounts"], self.accounts)
+
+        response = await self.client.get(f"/api/meetings/{meeting_id}/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_registered"])
+        # Запросы к БД из потока запроса учитываются middleware и в асинхронном режиме
+        self.assertNotIn('"0 queries"', response["Server-Timing"])
+
+        url = f"/{meeting_id}/vote/{self.accounts[0]}/"
+        response = await self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["vote_count"])
+
+        response = await self.client.post(url, self.vote, content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        response = await self.client.post(url, self.vote, content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_not_found_and_unauthenticated(self):
+        self.assertEqual((await self.client.get("/api/meetings/999999/", headers=self.headers)).status_code, 404)
+        self.assertEqual((await self.client.get("/api/meetings/abc/", headers=self.headers)).status_code, 404)
+        self.assertEqual((await AsyncClient().get(f"/{self.meeting.meeting_id}/vote/{self.accounts[0]}/")).status_code, 401)
+
+
+class AccountContextTest(EvotingTestCase):
+    """Счета пользователя загружаются для запроса один раз: бюллетень и карточка собрания за постоянное число запросов"""
+
+    def setUp(self):
+        super().setUp()
+        fixture = create_voting_fixture(users=1, accounts_per_user=5, questions=3, registered_ratio=1.0)
+        self.meeting = fixture["meeting"]
+        self.user = fixture["users"][0]
+        self.accounts = fixture["accounts"][self.user.pk]
+        self.login(self.user)
+
+    def test_helpers_accept_context(self):
+        context = AccountContext.load(self.meeting, self.user, quantities=True)
+        account_id = self.accounts[0]
+        self.assertEqual(get_accounts(self.meeting, self.user, context=context),
+                         sorted(get_accounts(self.meeting, self.user), key=lambda account: account["account_id"]))
+        self.assertTrue(registered(self.meeting, self.user, account_id, context=context))
+        self.assertFalse(has_account(self.meeting, self.user, -1, context=context))
+        self.assertEqual(context.quantities(account_id), get_account_quantities(self.meeting, [account_id])[account_id])
+
+    def test_vote_view_queries(self):
+        url = f"/{self.meeting.meeting_id}/vote/{self.accounts[0]}/"
+        self.client.get(url)  # бюллетень попадает в кеш
+
+        # Собрание, счета пользователя, количество голосов
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["vote_count"])
+
+    def test_meeting_detail_queries(self):
+        # Собрание с эмитентом, повестка дня, подвопросы, счета пользователя
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/api/meetings/{self.meeting.meeting_id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["is_registered"])
+
+
+class CachedAuthenticationTest(EvotingTestCase):
+    """Пользователь для аутентификации по JWT берется из кеша, кеш сбрасывается при сохранении пользователя"""
+
+    def setUp(self):
+        super().setUp()
+        self.shared_cache(USER_CACHE={"BACKEND": "shared"})
+        self.user = User.objects.create_user("admin", password="admin", is_staff=True)
+        response = self.client.post("/api/token/", {"username": "admin", "password": "admin"}, format="json")
+        self.tokens = response.data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/meetings/")
+        return response, [query for query in context.captured_queries if 'FROM "auth_user"' in query["sql"]]
+
+    def test_claims(self):
+        token = AccessToken(self.tokens["access"])
+        self.assertEqual((token["username"], token["is_staff"], token["is_superuser"]), ("admin", True, False))
+        self.assertTrue(self.tokens["is_staff"])
+
+        response = self.client.post("/api/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["is_staff"])
+
+    def test_refresh_uses_current_user(self):
+        # Права администратора сняты после выдачи токена: обновление их не возвращает
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.post("/api/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_staff"])
+        self.assertFalse(AccessToken(response.data["access"])["is_staff"])
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post("/api/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_is_cached_and_invalidated(self):
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+        self.user.is_active = False
+        self.user.save()
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(queries), 1)
+
+    def test_change_in_other_worker_is_seen(self):
+        self.assertEqual(self.user_queries()[0].status_code, 200)
+
+        # Пользователь заблокирован в другом воркере: его сигнал сбрасывает запись в своем кеше и меняет версию
+        # в общем кеше, запись в памяти этого процесса остается, но уже недействительна
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        UserCache().invalidate(self.user.pk)
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(queries), 1)
+
+    def test_without_shared_cache(self):
+        # Без общего кеша пользователь загружается из БД на каждый запрос
+        with self.settings(USER_CACHE={"BACKEND": None}):
+            for _ in range(2):
+                response, queries = self.user_queries()
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(queries), 1)
+
+        # Кеш в памяти процесса не допускается
+        with self.settings(USER_CACHE={"BACKEND": "default"}), self.assertRaises(ImproperlyConfigured):
+            get_user_cache()
+
+
+class TokenBlacklistTest(EvotingTestCase):
+    """Проверка refresh-токена по черному списку через кеш и удаление просроченных токенов"""
+
+    def setUp(self):
+        super().setUp()
+        self.shared_cache(TOKEN_BLACKLIST_CACHE={"BACKEND": "shared"})
+        self.user = User.objects.create_user("user", password="user")
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def refresh_token(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/token/refresh/", {"refresh": self.refresh}, format="json")
+        queries = [query for query in context.captured_queries if "token_blacklist_blacklistedtoken" in query["sql"]]
+        return response, queries
+
+    def test_blacklist_check_is_cached(self):
+        response, queries = self.refresh_token()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.refresh_token()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+        # Внесение в черный список снимает отметку: токен снова проверяется по БД и отклоняется
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+        response, queries = self.refresh_token()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(queries), 1)
+
+    def test_without_shared_cache(self):
+        # Без общего кеша каждое обновление токена проверяется по БД
+        with self.settings(TOKEN_BLACKLIST_CACHE={"BACKEND": None}):
+            for _ in range(2):
+                response, queries = self.refresh_token()
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(queries), 1)
+
+        # Кеш в памяти процесса не допускается
+        with self.settings(TOKEN_BLACKLIST_CACHE={"BACKEND": "default"}), self.assertRaises(ImproperlyConfigured):
+            get_blacklist_cache()
+        with self.settings(TOKEN_BLACKLIST_CACHE={"BACKEND": "missing"}), self.assertRaises(ImproperlyConfigured):
+            get_blacklist_cache()
+
+    def test_purge_expired_tokens(self):
+        expired = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=self.user, jti=f"expired-{number}", token="", expires_at=aware_utcnow() - timedelta(days=1))
+            for number in range(5)
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in expired[:2]])
+
+        result = purge_expired_tokens(batch_size=2)
+        self.assertEqual((result["outstanding"], result["blacklisted"], result["batches"]), (5, 2, 3))
+        self.assertEqual(list(OutstandingToken.objects.values_list("user", flat=True)), [self.user.pk])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class DraftAgendaUpdateTest(EvotingTestCase):
+    """Обновление повестки дня черновика: изменения применяются пакетно, число запросов не зависит от размера повестки"""
+
+    def setUp(self):
+        super().setUp()
+        self.login()
+
+    def put_draft(self, meeting, change_agenda):
+        data = self.client.get(f"/api/meetings/{meeting.meeting_id}/draft/").data
+        data["agenda"] = change_agenda(data["agenda"])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(f"/api/meetings/{meeting.meeting_id}/draft/", data, format="json")
+        return response, len(context.captured_queries)
+
+    def test_agenda_diff(self):
+        meeting = create_meeting(questions=3, details=2, is_draft=True)
+
+        def change_agenda(agenda):
+            first, _, third = agenda
+            first["question"] = "Новый текст"
+            first["details"] = [first["details"][0], {"detail_text": "Новый кандидат"}]
+            return [first, third, {"question": "Новый вопрос", "decision": "Решение", "cumulative": False,
+                                   "details": [{"detail_text": "А"}, {"detail_text": "Б"}, {"detail_text": "В"}]}]
+
+        old_agenda = list(meeting.agenda.order_by("question_id"))
+        response, _ = self.put_draft(meeting, change_agenda)
+        self.assertEqual(response.status_code, 200)
+
+        agenda = response.data["agenda"]
+        self.assertEqual([question["question_id"] for question in agenda][:2],
+                         [old_agenda[0].question_id, old_agenda[2].question_id])
+        self.assertEqual(agenda[0]["question"], "Новый текст")
+        self.assertEqual([detail["detail_text"] for detail in agenda[0]["details"]], ["Кандидат 0", "Новый кандидат"])
+        self.assertEqual([question["seat_count"] for question in agenda], [2, 2, 3])
+        self.assertEqual(Agenda.objects.filter(meeting=meeting).count(), 3)
+        self.assertEqual(QuestionDetail.objects.filter(meeting_id=meeting).count(), 7)
+
+    def test_query_count_does_not_depend_on_agenda_size(self):
+        def change_agenda(agenda):
+            for question in agenda:
+                question["question"] += " (изменен)"
+                question["details"] = question["details"][1:] + [{"detail_text": "Новый кандидат"}]
+            return agenda[1:] + [{"question": "Новый вопрос", "decision": "Решение", "cumulative": False, "details": []}]
+
+        counts = []
+        for questions in (2, 20):
+            response, queries = self.put_draft(create_meeting(questions=questions, details=5, is_draft=True),
+                                               change_agenda)
+            self.assertEqual(response.status_code, 200)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+
+
+class MeetingCreateTest(EvotingTestCase):
+    """Создание собрания: повестка дня вставляется пакетно в одной транзакции"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login()
+        self.issuer = Issuer.objects.create(full_name="ПАО Эмитент", short_name="Эмитент", address="Адрес", zip=625000,
+                                            ogrn="1")
+
+    def meeting_data(self, questions, details):
+        return {
+            "issuer": self.issuer.issuer_id, "annual_or_unscheduled": True, "inter_or_extra_mural": False,
+            "agenda": [
+                {"question": f"Вопрос {number}", "decision": "Решение", "cumulative": bool(details),
+                 "details": [{"detail_text": f"Кандидат {detail}"} for detail in range(details)]}
+                for number in range(questions)
+            ],
+        }
+
+    def test_query_count_does_not_depend_on_agenda_size(self):
+        counts = []
+        for questions in (2, 40):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post("/api/meetings/create/", self.meeting_data(questions, 5), format="json")
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(len(response.data["agenda"]), questions)
+            self.assertEqual([len(question["details"]) for question in response.data["agenda"]], [5] * questions)
+            self.assertEqual(QuestionDetail.objects.filter(meeting_id=response.data["meeting_id"]).count(), questions * 5)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_creation_is_atomic(self):
+        data = self.meeting_data(3, 2)
+        data["agenda"][2]["details"][1]["unknown_field"] = 1
+        serializer = MeetingCreateUpdateSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(TypeError):
+            serializer.save(created_by=self.admin)
+        self.assertFalse(Main.objects.exists())
+        self.assertFalse(Agenda.objects.exists())
@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework.routers import SimpleRouter
-from .views import meeting, vote, register, results
+from .views import meeting, vote, register, results, metrics
 
 router = SimpleRouter()
 
@@ -10,10 +10,16 @@ router.register('api/meetings', meeting.MeetingViewSet, basename='meetings')
 urlpatterns = [  
     path('<int:meeting_id>/register/', register.RegisterForMeetingView.as_view(), name='register-for-meeting'),
     path('<int:meeting_id>/vote/<int:account_id>/', vote.VoteView.as_view(), name='meeting-vote'),
+    path('<int:meeting_id>/votes/', vote.VoteBatchView.as_view(), name='meeting-vote-batch'),
     # path('<int:meeting_id>/vote_results/', VotingResultsView.as_view(), name='vote-results'),
     path('<int:meeting_id>/vote_results/<int:account_id>/', results.UserVotingResultsView.as_view(), name='user-voting-results'),
     path('<int:meeting_id>/all_vote_results/', results.AdminVotingResultsView.as_view(), name='admin-voting-results'),
+    path('<int:meeting_id>/election_results/', results.AdminElectionResultsView.as_view(), name='admin-election-results'),
+    path('<int:meeting_id>/export_results/', results.AdminVotingResultsExportView.as_view(), name='admin-voting-results-export'),
     path('<int:meeting_id>/registered_users/', register.RegisteredUsersView.as_view(), name='registered-users'),
+    path('<int:meeting_id>/quorum/', register.QuorumView.as_view(), name='meeting-quorum'),
+    path('ballot_cache/stats/', metrics.BallotCacheStatsView.as_view(), name='ballot-cache-stats'),
+    path('metrics/', metrics.MetricsView.as_view(), name='request-metrics'),
 ]
 
 urlpatterns += router.urls
\ No newline at end of file
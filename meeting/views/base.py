@@ -0,0 +1,46 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.views import APIView
+
+
+# Асинхронная обработка запроса DRF: обработчики async def выполняются в цикле событий (при запуске через ASGI
+# один воркер держит много одновременных медленных клиентов). Аутентификация и проверка прав остаются синхронным
+# кодом DRF и выполняются в потоке, синхронные обработчики (OPTIONS, действия ViewSet без async-версии) - тоже
+class AsyncDispatchMixin:
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncDispatchMixin, APIView):
+    pass
+
+
+# Для ViewSet: DRF не помечает view-функцию ViewSet как асинхронную, это делается здесь
+class AsyncViewSetMixin(AsyncDispatchMixin):
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        return markcoroutinefunction(view)
@@ -3,14 +3,24 @@ from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
 from django.db import transaction
-from meeting.services.account_service import get_accounts
+from django_filters.rest_framework import DjangoFilterBackend
+from meeting.services.account_service import AccountContext, get_accounts
+from meeting.services.agenda_service import update_agenda
+from meeting.ballot.cache import ballot_cache
+from meeting.ballot.loader import aload_meeting_tree, meeting_tree_queryset
 from meeting.permissions import IsAdminOrReadOnly
-from meeting.models import Main, DjangoRelation, Agenda, QuestionDetail, Issuer
+from meeting.filters import MeetingFilter
+from meeting.pagination import MeetingPagination, DraftPagination
+from meeting.models import Main, DjangoRelation, Agenda, Issuer
+from meeting.views.base import AsyncViewSetMixin
 from meeting.serializers import MeetingSerializer, MeetingListSerializer, IssuerInfoSerializer, MeetingCreateUpdateSerializer
 
-# Собрания
-class MeetingViewSet(viewsets.ModelViewSet):
+# Собрания (retrieve - асинхронный, остальные действия выполняются в потоке)
+class MeetingViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
+    pagination_class = MeetingPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = MeetingFilter
 
     def get_serializer_class(self):
         if self.action in ['list', 'drafts']:
@@ -19,12 +29,9 @@ class MeetingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # Статусы собраний обновляются командой update_meeting_statuses, здесь только чтение
         meetings = Main.objects.all()
 
-        # Обновление статуса только для собраний, которые НЕ являются черновиками
-        for meeting in meetings:
-            meeting.update_status()
-
         # Для администратора список всех собраний, которые не являются черновиками
         if user.is_staff:
             return meetings.filter(is_draft=False) 
@@ -49,18 +56,22 @@ class MeetingViewSet(viewsets.ModelViewSet):
         return super().partial_update(request, *args, **kwargs)
     
     # Черновики все (только админ)
-    @action(detail=False, methods=['get'], url_path='drafts', permission_classes=[permissions.IsAdminUser])
+    @action(detail=False, methods=['get'], url_path='drafts', permission_classes=[permissions.IsAdminUser],
+            pagination_class=DraftPagination)
     def drafts(self, request):
         """Список всех черновиков"""
-        drafts = Main.objects.filter(is_draft=True)
-        serializer = MeetingListSerializer(drafts, many=True)
-        return Response(serializer.data)
+        drafts = self.filter_queryset(Main.objects.filter(is_draft=True)).select_related('issuer', 'created_by')
+        page = self.paginate_queryset(drafts)
+        serializer = MeetingListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     # Конкретный черновик (только админ) для возможного редактирования
     @action(detail=True, methods=['get', 'put'], url_path='draft', permission_classes=[permissions.IsAdminUser])
     def draft_detail(self, request, pk=None):
         """Конкретный черновик"""
-        meeting = Main.objects.get(pk=pk)
+        # Для просмотра повестка дня и подвопросы загружаются вместе с собранием
+        queryset = meeting_tree_queryset() if request.method == 'GET' else Main.objects.all()
+        meeting = queryset.get(pk=pk)
 
         if not meeting.is_draft:
             return Response({"error": "Это не черновик."}, status=status.HTTP_400_BAD_REQUEST)
@@ -104,58 +115,17 @@ class MeetingViewSet(viewsets.ModelViewSet):
                     # Сохранение изменений в собрании
                     serializer.save()
 
-                    # Обновление повестки дня
-                    existing_agenda_ids = set(Agenda.objects.filter(meeting=meeting).values_list('question_id', flat=True))
-                    updated_agenda_ids = set()
-
-                    for agenda_item in agenda_data:
-                        question_id = agenda_item.get("question_id")
-                        details_data = agenda_item.pop("details", [])
-
-                        seat_count = len(details_data)  
-
-                        # Если вопрос уже существует, обновляем его
-                        if question_id and question_id in existing_agenda_ids:
-                            agenda_instance = Agenda.objects.get(question_id=question_id, meeting=meeting)
-                            for key, value in agenda_item.items():
-                                setattr(agenda_instance, key, value)
-                            agenda_instance.seat_count = seat_count 
-                            agenda_instance.save()
-                        else:
-                            # Создание нового вопроса
-                            agenda_instance = Agenda.objects.create(meeting=meeting, seat_count=seat_count, **agenda_item)
-
-                        updated_agenda_ids.add(agenda_instance.question_id)
-
-                        # Обновление подвопросов
-                        existing_details = {d.detail_id for d in QuestionDetail.objects.filter(question_id=agenda_instance)}
-                        updated_details = set()
+                    # Обновление повестки дня: изменения вычисляются в памяти и применяются пакетно
+                    update_agenda(meeting, agenda_data)
 
-                        for detail in details_data:
-                            detail_id = detail.get("detail_id")
-
-                            if detail_id and detail_id in existing_details:
-                                detail_instance = QuestionDetail.objects.get(detail_id=detail_id)
-                                detail_instance.detail_text = detail.get("detail_text", detail_instance.detail_text)
-                                detail_instance.save()
-                            else:
-                                detail_instance = QuestionDetail.objects.create(question_id=agenda_instance, meeting_id=meeting, **detail)
-
-                            updated_details.add(detail_instance.detail_id)
-
-                        # Удаление подвопросов, которых нет в новом списке
-                        QuestionDetail.objects.filter(question_id=agenda_instance).exclude(detail_id__in=updated_details).delete()
-
-                        # Автоматически пересчитывается seat_count
-                        agenda_instance.seat_count = QuestionDetail.objects.filter(question_id=agenda_instance).count()
-                        agenda_instance.save()
-
-                    # Удаление вопросов, которых нет в новом списке
-                    Agenda.objects.filter(meeting=meeting).exclude(question_id__in=updated_agenda_ids).delete()
+                    # Сброс кеша бюллетеня после сохранения изменений
+                    transaction.on_commit(lambda: ballot_cache.invalidate(meeting.meeting_id))
 
             except Exception as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+            # Итоговое собрание с повесткой дня (три запроса независимо от размера повестки)
+            serializer = MeetingCreateUpdateSerializer(meeting_tree_queryset().get(pk=meeting.pk))
             return Response(serializer.data, status=status.HTTP_200_OK)
         
     # Отправка сообщения (собрания, меняется is_draft на false и сохраняется дата отправки)
@@ -212,28 +182,27 @@ class MeetingViewSet(viewsets.ModelViewSet):
     
     # Для пользователя список собраний, в которых он может участвовать 
     def list(self, request, *args, **kwargs):
-        meetings = self.get_queryset()
-        serialized_meetings = MeetingListSerializer(meetings, many=True).data
-        return Response(serialized_meetings)
+        meetings = self.filter_queryset(self.get_queryset()).select_related('issuer', 'created_by')
+        page = self.paginate_queryset(meetings)
+        serialized_meetings = MeetingListSerializer(page, many=True).data
+        return self.get_paginated_response(serialized_meetings)
     
-    # Добавить информацию о регистрации для участника собрания
-    def retrieve(self, request, pk=None):
+    # Добавить информацию о регистрации для участника собрания (асинхронно: собрание открывают все участники перед голосованием)
+    async def retrieve(self, request, pk=None):
         """Получение конкретного собрания"""
-        meeting = get_object_or_404(Main, pk=pk)
-        meeting.update_status()
+        meeting = await aload_meeting_tree(pk)
         user = request.user
         serializer = MeetingSerializer(meeting)
 
         response_data = serializer.data
 
         if not user.is_staff:
-            # Проверка, что у пользователя есть лицевые счета для голосования
-            user_accounts = get_accounts(meeting, user)
-            if not user_accounts:
+            # Проверка, что у пользователя есть лицевые счета для голосования (счета и регистрация - одним запросом)
+            context = await AccountContext.aload(meeting, user)
+            if not context.accounts:
                 return Response({"error": "У вас нет прав для голосования в этом собрании."}, status=status.HTTP_403_FORBIDDEN)
 
-            is_registered = DjangoRelation.objects.filter(user=user, meeting=meeting, registered=True).exists()
-            response_data["is_registered"] = is_registered
+            response_data["is_registered"] = context.any_registered()
 
         return Response(response_data)
     
@@ -0,0 +1,31 @@
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from meeting.ballot.cache import COUNTERS, ballot_cache
+from meeting.monitoring.metrics import render_prometheus_values, request_metrics
+
+
+# Счетчики кеша бюллетеней (для админа и систем мониторинга)
+class BallotCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Счетчики попаданий и промахов кеша бюллетеней"""
+        return Response(ballot_cache.stats(), status=status.HTTP_200_OK)
+
+
+# Метрики запросов по маршрутам: гистограммы в формате Prometheus или отчет о медленных маршрутах (?report=slow)
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Метрики запросов: время, SQL-запросы, сериализация, размер ответа"""
+        if request.query_params.get("report") == "slow":
+            return Response(request_metrics.report(), status=status.HTTP_200_OK)
+
+        lines = [
+            request_metrics.render_prometheus(),
+            render_prometheus_values("evoting_ballot_cache", ballot_cache.stats(), counters=COUNTERS),
+        ]
+        return HttpResponse("".join(lines), content_type="text/plain; version=0.0.4; charset=utf-8")
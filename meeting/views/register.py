@@ -1,67 +1,63 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
 from rest_framework import permissions, generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
-from meeting.models import Main, DjangoRelation, VoteCount
-from meeting.ballot.get_ballot import get_ballot_data
+from meeting.models import Main
+from meeting.pagination import RegisteredAccountsPagination
+from meeting.services.registration_service import register, registered_accounts_queryset, get_quorum
+from meeting.views.base import AsyncAPIView
 
-# Регистрация в собрании
-class RegisterForMeetingView(APIView):
+# Регистрация в собрании (асинхронное представление)
+class RegisterForMeetingView(AsyncAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    def post(self, request, meeting_id, *args, **kwargs):
-        """Регистрация в собрании"""
+    async def post(self, request, meeting_id, *args, **kwargs):
+        """Регистрация в собрании (по всем лицевым счетам или по списку account_ids)"""
         user = request.user
-        meeting = get_object_or_404(Main, meeting_id=meeting_id)
+        meeting = await aget_object_or_404(Main, meeting_id=meeting_id)
 
         if not meeting.register():
             return Response({"error": "Регистрация не разрешена."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Проверка на наличие связей
-        registrations = DjangoRelation.objects.filter(user=user, meeting=meeting)
-
-        if not registrations.exists():
-            return Response(
-                {"error": "Вы не можете зарегистрироваться, так как не связаны с этим собранием."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Проверка, зарегистрирован ли он уже по всем записям
-        already_registered = all(registration.registered for registration in registrations)
+        # Необязательный список счетов: {"account_ids": [...]}
+        account_ids = request.data.get("account_ids") if isinstance(request.data, dict) else None
 
-        if already_registered:
-            return Response(
-                {"error": "Вы уже зарегистрированы на это собрание."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # Регистрация одним запросом UPDATE ... RETURNING (выполняется через курсор, поэтому в потоке),
+        # повторная регистрация не считается ошибкой
+        result = await sync_to_async(register)(meeting, user, account_ids)
 
-        registrations.update(registered=True)
+        if "error" in result:
+            return Response({"error": result["error"]}, status=result["status"])
 
-        return Response({"message": "Вы успешно зарегистрированы на собрание."}, status=status.HTTP_200_OK)
+        return Response({"message": result["message"], "accounts": result["accounts"]}, status=result["status"])
     
 
 # Список зарегестрированных на собрании лиц (для админа)
 class RegisteredUsersView(generics.ListAPIView):
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = RegisteredAccountsPagination
 
     def get(self, request, *args, **kwargs):
-        """Список зарегестрированных на собрании лиц (для админа)"""
+        """Список зарегестрированных на собрании лиц (для админа), постранично"""
         meeting_id =  self.kwargs.get("meeting_id")  
         meeting = get_object_or_404(Main, meeting_id=meeting_id)
-        users_dict = []
 
-        # Получение account_fullname
-        account_info = {
-            (vote.account_id, vote.meeting_id): vote.account_fullname
-            for vote in VoteCount.objects.filter(meeting=meeting)
-        }
+        page = self.paginate_queryset(registered_accounts_queryset(meeting))
+        users_dict = [
+            {"account_id": relation.account_id, "account_fullname": relation.account_fullname or "Неизвестный счёт"}
+            for relation in page
+        ]
+
+        return self.get_paginated_response(users_dict)
 
-        for relation in DjangoRelation.objects.filter(meeting=meeting, registered=True).select_related("user"):
-            
-            account_fullname = account_info.get((relation.account_id, meeting.meeting_id), "Неизвестный счёт")
-            users_dict.append({
-                "account_id": relation.account_id,
-                "account_fullname": account_fullname
-            })
 
-        return Response(users_dict, status=status.HTTP_200_OK)
+# Кворум собрания по вопросам повестки дня (для админа)
+class QuorumView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, meeting_id):
+        """Голоса зарегистрированных лиц и всех лиц, имеющих право голоса, по каждому вопросу"""
+        meeting = get_object_or_404(Main, meeting_id=meeting_id)
+        return Response(get_quorum(meeting), status=status.HTTP_200_OK)
@@ -1,3 +1,5 @@
+import tempfile
+from django.http import FileResponse, StreamingHttpResponse
 from rest_framework import permissions,status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -5,6 +7,8 @@ from rest_framework.generics import get_object_or_404
 from meeting.models import Main, DjangoRelation, VotingResult
 from meeting.ballot.get_ballot import get_ballot_data
 from meeting.services.voting_service import get_summarized_voting_results
+from meeting.services.election_service import get_election_results
+from meeting.services.export_service import EXPORT_FORMATS, iter_csv, write_xlsx
 from meeting.services.account_service import registered
 
 
@@ -51,4 +55,42 @@ class AdminVotingResultsView(APIView):
 
         return Response(result, status=result["status"])
 
-    
+
+# Итоги выборов по кумулятивным вопросам: рейтинг кандидатов и избранные на места
+class AdminElectionResultsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, meeting_id):
+        """Итоги выборов по кумулятивным вопросам собрания"""
+        result = get_election_results(meeting_id)
+
+        if "error" in result:
+            return Response({"message": result["error"]}, status=result["status"])
+
+        return Response(result, status=result["status"])
+
+
+# Выгрузка результатов голосования по всем лицевым счетам собрания (для счетной комиссии)
+class AdminVotingResultsExportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, meeting_id):
+        """Выгрузка результатов голосования по счетам в CSV или XLSX (?export_format=xlsx)"""
+        meeting = get_object_or_404(Main, pk=meeting_id)
+        export_format = request.query_params.get("export_format", "csv")
+
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"Поддерживаемые форматы: {', '.join(EXPORT_FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"voting_results_{meeting.meeting_id}.{export_format}"
+
+        if export_format == "csv":
+            response = StreamingHttpResponse(iter_csv(meeting), content_type="text/csv; charset=utf-8")
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        # XLSX собирается во временном файле (в памяти до 10 МБ) и отдается потоком
+        file = write_xlsx(meeting, tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024))
+        return FileResponse(file, as_attachment=True, filename=filename,
+                            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")